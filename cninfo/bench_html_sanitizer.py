@@ -0,0 +1,58 @@
+"""
+页面快照清理的性能对比：原来的多次正则/替换 vs sanitize_html 一次扫描
+
+运行: python bench_html_sanitizer.py [html文件]
+"""
+import re
+import sys
+import timeit
+
+from utils.html_sanitizer import sanitize_html
+
+
+def sanitize_html_legacy(html_content: str) -> str:
+    """原 search_and_save_page 中的清理逻辑"""
+    # 移除所有script标签
+    cleaned_html = re.sub(r'<script\b[^<]*(?:(?!</script>)<[^<]*)*</script>', '', html_content,
+                          flags=re.IGNORECASE)
+
+    # 移除所有事件处理属性（onclick, onload等）
+    event_attrs = ['onclick', 'ondblclick', 'onmousedown', 'onmouseup', 'onmouseover',
+                   'onmousemove', 'onmouseout', 'onkeydown', 'onkeypress', 'onkeyup',
+                   'onload', 'onunload', 'onchange', 'onsubmit', 'onreset', 'onselect',
+                   'onblur', 'onfocus', 'onabort', 'onerror']
+
+    for attr in event_attrs:
+        cleaned_html = re.sub(f'{attr}="[^"]*"', '', cleaned_html, flags=re.IGNORECASE)
+        cleaned_html = re.sub(f"{attr}='[^']*'", '', cleaned_html, flags=re.IGNORECASE)
+
+    # 移除href中的javascript:链接
+    cleaned_html = re.sub(r'href="javascript:[^"]*"', 'href="#"', cleaned_html, flags=re.IGNORECASE)
+    cleaned_html = re.sub(r"href='javascript:[^']*'", "href='#'", cleaned_html, flags=re.IGNORECASE)
+
+    # 禁用所有表单元素
+    cleaned_html = cleaned_html.replace('<input ', '<input disabled ')
+    cleaned_html = cleaned_html.replace('<button ', '<button disabled ')
+    cleaned_html = cleaned_html.replace('<select ', '<select disabled ')
+    cleaned_html = cleaned_html.replace('<textarea ', '<textarea disabled ')
+
+    # 移除meta标签中的自动刷新
+    cleaned_html = re.sub(r'<meta[^>]*http-equiv[^>]*refresh[^>]*>', '', cleaned_html, flags=re.IGNORECASE)
+    return cleaned_html
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "results/company_executives_page_000001.html"
+    with open(path, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    same = sanitize_html(html) == sanitize_html_legacy(html)
+    print(f"文件: {path}, 大小: {len(html) / 1024:.1f}KB, 结果一致: {same}")
+    for name, func in [("legacy", sanitize_html_legacy), ("sanitize_html", sanitize_html)]:
+        number = 20
+        best = min(timeit.repeat(lambda: func(html), number=number, repeat=5)) / number
+        print(f"{name:>14}: {best * 1000:.2f}ms/次")
+
+
+if __name__ == "__main__":
+    main()
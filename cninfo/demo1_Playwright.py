@@ -15,15 +15,27 @@ playwright install
 """
 import asyncio
 import json
-import csv
 import random
 import time
+from typing import Optional
 
 import aiofiles
-import aiohttp
-from playwright.async_api import async_playwright
-import re
-from bs4 import BeautifulSoup
+
+from utils.browser_pool import POOL_MAX_PAGES, BrowserPool
+from utils.cninfo_utils import EXECUTIVE_FIELDS, CNInfoUtils, executive_value
+from utils.cookie_jar import get_cookie_jar
+from utils.html_sanitizer import sanitize_html
+from utils.parse_executor import get_parse_executor
+from utils.result_sink import CsvSink, ResultSink, open_sink
+
+# 公司高管接口
+EXECUTIVES_API = "getCompanyExecutives"
+# 每一步等待页面元素或接口返回的超时时间（毫秒）
+STEP_TIMEOUT = 15000
+# 批量处理时所有公司的高管数据写入同一个文件，后缀可以是 .jsonl / .csv / .db
+EXECUTIVES_SINK_PATH = "results/executives.jsonl"
+# 高管数据的字段：公司代码 + 高管表头
+EXECUTIVES_SINK_FIELDS = ["公司代码"] + list(EXECUTIVE_FIELDS)
 
 
 async def load_stock_codes():
@@ -36,67 +48,36 @@ async def load_stock_codes():
 
 
 async def load_cookies():
-    async with aiofiles.open("cookies/18664892760.txt", "r") as f:
-        cookies_str = await f.read()
-        cookies = []
-        # 设置cookies
-        if cookies_str and cookies_str.strip():
-            for cookie in cookies_str.strip().split('; '):
-                if '=' in cookie:
-                    name, value = cookie.split('=', 1)
-                    cookies.append({
-                        'name': name.strip(),
-                        'value': value.strip(),
-                        'domain': '.cninfo.com.cn',  # 修改为巨潮资讯网的域名
-                        'path': '/'
-                    })
-        return cookies
-
-
-def extract_executives_info(html_content):
-    """从HTML中提取高管信息"""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    executives = []
+    """Playwright 格式的cookies：与 CNInfoUtils 共用同一个 cookie jar，文件只读取一次"""
+    return get_cookie_jar().to_playwright()
 
-    # 查找高管表格
-    table_wrapper = soup.find('div', class_='el-table__body-wrapper')
-    if not table_wrapper:
-        print("未找到高管表格")
-        return executives
 
-    # 查找所有行
-    rows = table_wrapper.find_all('tr', class_='el-table__row')
-    print(f"找到 {len(rows)} 行高管数据")
+def is_executives_response(response) -> bool:
+    """是否为公司高管接口的返回"""
+    return EXECUTIVES_API in response.url and response.ok
 
-    for row in rows:
-        cells = row.find_all('td')
-        if len(cells) >= 5:  # 确保有足够的列
-            try:
-                # 提取各列数据
-                name = cells[0].get_text(strip=True)
-                position = cells[1].get_text(strip=True)
-                education = cells[2].get_text(strip=True)
-                salary = cells[3].get_text(strip=True)
-                shares = cells[4].get_text(strip=True)
-
-                executive = {
-                    '姓名': name,
-                    '职务': position,
-                    '学历': education,
-                    '年薪(万元)': salary,
-                    '持股数(股)': shares
-                }
-                executives.append(executive)
-                print(f"提取高管: {name} - {position}")
-            except Exception as e:
-                print(f"解析行数据时出错: {e}")
-                continue
 
+def executives_from_response(data: dict) -> list:
+    """从 getCompanyExecutives 接口返回的json中提取高管信息（值为文本，缺失时为 "--"）"""
+    records = (data or {}).get("data", {}).get("records") or []
+    executives = []
+    for row in records:
+        executives.append({title: executive_value(row, key) for title, key in EXECUTIVE_FIELDS.items()})
     return executives
 
 
-async def save_executives_data(executives, search_keyword, format_type='all'):
-    """保存高管数据为JSON和CSV格式"""
+async def save_executives_data(executives, search_keyword, format_type='all', sink: Optional[ResultSink] = None):
+    """
+    保存高管数据
+
+    传入sink时，记录加上公司代码后追加到sink（所有公司写入同一个文件/数据库）；
+    否则按公司保存为 results/executives_{公司代码}.json 和 .csv
+    """
+    if sink is not None:
+        await sink.write_many({"公司代码": search_keyword, **e} for e in executives)
+        print(f"高管数据已写入: {sink.path}")
+        return
+
     base_filename = f'results/executives_{search_keyword}'
 
     if format_type in ['json', 'all']:
@@ -107,141 +88,126 @@ async def save_executives_data(executives, search_keyword, format_type='all'):
         print(f"高管数据已保存为JSON: {json_filename}")
 
     if format_type in ['csv', 'all']:
-        # 保存为CSV
+        # 保存为CSV（与JSON一样覆盖原文件，重复运行不会追加重复的记录）
         csv_filename = f'{base_filename}.csv'
         if executives:
-            fieldnames = executives[0].keys()
-            with open(csv_filename, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(executives)
+            async with CsvSink(csv_filename, fieldnames=list(executives[0].keys()), mode="w",
+                               flush_interval=0) as csv_sink:
+                await csv_sink.write_many(executives)
             print(f"高管数据已保存为CSV: {csv_filename}")
 
 
-async def search_and_save_page(url: str, search_keyword: str, headless: bool = True) -> bool:
-    async with async_playwright() as p:
-        # 启动浏览器
-        browser = await p.chromium.launch(headless=headless)  # 设置为True可在后台运行
-        context = await browser.new_context()
-        # 设置cookie
-        cookies = await load_cookies()
-        await context.add_cookies(cookies)
-        # 打开新页面
-        page = await context.new_page()
-
-        try:
-            # 导航到目标网站
-            await page.goto(url)
-            print("已打开首页")
-
-            # 等待搜索框加载完成
-            await page.wait_for_selector('.search-input input.el-input__inner', timeout=10000)
-            print("搜索框已加载")
-
-            # 在搜索框中输入关键词
-            search_input = page.locator('.search-input input.el-input__inner')
-            await search_input.fill(search_keyword)
-            print(f"已输入搜索关键词: {search_keyword}")
-
-            # 点击搜索按钮
-            search_button = page.locator('.chaxun-btn')
-            await search_button.click()
-            print("已点击搜索按钮")
-
-            # 等待搜索结果加载
-            await page.wait_for_timeout(3000)
-
-            # 监听新页面的打开
-            async with context.expect_page() as new_page_info:
-                # 点击"公司介绍"链接
-                company_intro_link = page.locator('a:has-text("公司介绍")')
-                await company_intro_link.click()
-                print("已点击公司介绍，等待新页面打开...")
-
-            # 获取新页面
-            new_page = await new_page_info.value
-            await new_page.wait_for_load_state()
-            print("新页面已加载完成")
-
-            # 关闭旧页面
-            await page.close()
-
-            # 将page指向新页面
-            page = new_page
-
-            # 等待公司介绍页面加载
-            await page.wait_for_timeout(2000)
-
-            # 点击"公司高管"菜单项
-            exec_menu = page.locator('.el-menu-item:has-text("公司高管")')
-            await exec_menu.click()
-            print("已点击公司高管")
-
-            # 等待公司高管页面完全加载
-            await page.wait_for_timeout(3000)
-
-            # 获取页面HTML并移除所有JavaScript
-            html_content = await page.content()
-
-            # 提取高管信息
-            print("开始提取高管信息...")
-            executives = extract_executives_info(html_content)
-            print(f"成功提取 {len(executives)} 条高管信息")
-
-            # 保存高管数据
-            await save_executives_data(executives, search_keyword)
-
-            # 移除所有script标签
-            cleaned_html = re.sub(r'<script\b[^<]*(?:(?!</script>)<[^<]*)*</script>', '', html_content,
-                                  flags=re.IGNORECASE)
-
-            # 移除所有事件处理属性（onclick, onload等）
-            event_attrs = ['onclick', 'ondblclick', 'onmousedown', 'onmouseup', 'onmouseover',
-                           'onmousemove', 'onmouseout', 'onkeydown', 'onkeypress', 'onkeyup',
-                           'onload', 'onunload', 'onchange', 'onsubmit', 'onreset', 'onselect',
-                           'onblur', 'onfocus', 'onabort', 'onerror']
-
-            for attr in event_attrs:
-                cleaned_html = re.sub(f'{attr}="[^"]*"', '', cleaned_html, flags=re.IGNORECASE)
-                cleaned_html = re.sub(f"{attr}='[^']*'", '', cleaned_html, flags=re.IGNORECASE)
-
-            # 移除href中的javascript:链接
-            cleaned_html = re.sub(r'href="javascript:[^"]*"', 'href="#"', cleaned_html, flags=re.IGNORECASE)
-            cleaned_html = re.sub(r"href='javascript:[^']*'", "href='#'", cleaned_html, flags=re.IGNORECASE)
-
-            # 禁用所有表单元素
-            cleaned_html = cleaned_html.replace('<input ', '<input disabled ')
-            cleaned_html = cleaned_html.replace('<button ', '<button disabled ')
-            cleaned_html = cleaned_html.replace('<select ', '<select disabled ')
-            cleaned_html = cleaned_html.replace('<textarea ', '<textarea disabled ')
-
-            # 移除meta标签中的自动刷新
-            cleaned_html = re.sub(r'<meta[^>]*http-equiv[^>]*refresh[^>]*>', '', cleaned_html, flags=re.IGNORECASE)
+async def search_and_save_page(url: str, search_keyword: str, headless: bool = True,
+                               pool: Optional[BrowserPool] = None, fast_mode: bool = False,
+                               sink: Optional[ResultSink] = None) -> bool:
+    """
+    搜索公司并保存高管信息和页面
+
+    Args:
+        url: 巨潮首页
+        search_keyword: 公司代码
+        headless: 是否后台运行，只在未传入pool时生效
+        pool: 浏览器池，为空时临时启动一个浏览器，处理完即关闭
+        fast_mode: 是否拦截图片、字体、样式等无关资源，只在未传入pool时生效
+        sink: 高管数据的写入目标，为空时按公司单独保存为json和csv
+    """
+    if pool is None:
+        async with BrowserPool(max_pages=1, headless=headless, cookies=await load_cookies(),
+                               fast_mode=fast_mode) as pool:
+            rs = await search_and_save_page(url, search_keyword, pool=pool, sink=sink)
+        await get_cookie_jar().save_if_dirty()
+        return rs
+
+    # 出错时异常传出 pool.page()，浏览器池丢弃这个页面（可能已失效），不会放回池中
+    try:
+        async with pool.page() as page:
+            new_page = None
+            try:
+                # 导航到目标网站
+                await page.goto(url)
+                print("已打开首页")
 
-            # 保存清理后的HTML到文件
-            filename = f'results/company_executives_page_{search_keyword}.html'
-            async with aiofiles.open(filename, 'w', encoding='utf-8') as f:
-                await f.write(cleaned_html)
+                # 等待搜索框加载完成
+                await page.wait_for_selector('.search-input input.el-input__inner', timeout=10000)
+                print("搜索框已加载")
 
-            print(f"页面已成功保存为 {filename}")
-            print("所有JavaScript和交互功能已被移除")
-            print("-" * 50)
+                # 在搜索框中输入关键词
+                search_input = page.locator('.search-input input.el-input__inner')
+                await search_input.fill(search_keyword)
+                print(f"已输入搜索关键词: {search_keyword}")
 
-            return True
-        except Exception as e:
-            print(f"操作过程中出现错误: {e}")
-            # 保存错误截图
-            # await page.screenshot(path=f'temps/error_screenshot_{search_keyword}.png')
-            # print(f"错误截图已保存为 temps/error_screenshot_{search_keyword}.png")
-            return False
+                # 点击搜索按钮
+                search_button = page.locator('.chaxun-btn')
+                await search_button.click()
+                print("已点击搜索按钮")
 
-        finally:
-            # 关闭浏览器
-            await browser.close()
+                # 等待搜索结果加载
+                company_intro_link = page.locator('a:has-text("公司介绍")')
+                await company_intro_link.first.wait_for(timeout=STEP_TIMEOUT)
+
+                # 监听高管接口：公司介绍页面加载时或点击"公司高管"后会请求 getCompanyExecutives
+                async with page.context.expect_event("response", predicate=is_executives_response,
+                                                     timeout=STEP_TIMEOUT) as response_info:
+                    # 监听新页面的打开
+                    async with page.context.expect_page() as new_page_info:
+                        # 点击"公司介绍"链接
+                        await company_intro_link.first.click()
+                        print("已点击公司介绍，等待新页面打开...")
+
+                    # 获取新页面（首页留在池中复用，新页面用完关闭）
+                    new_page = await new_page_info.value
+                    print("新页面已打开")
+
+                    # 点击"公司高管"菜单项
+                    exec_menu = new_page.locator('.el-menu-item:has-text("公司高管")')
+                    await exec_menu.click(timeout=STEP_TIMEOUT)
+                    print("已点击公司高管")
+
+                # 直接使用接口返回的高管数据
+                response = await response_info.value
+                executives = executives_from_response(await response.json())
+                print(f"成功获取 {len(executives)} 条高管信息")
+
+                # 保存高管数据
+                await save_executives_data(executives, search_keyword, sink=sink)
+
+                # 等待高管表格渲染后保存页面快照
+                if executives:
+                    await new_page.wait_for_selector('.el-table__body-wrapper tr.el-table__row', timeout=STEP_TIMEOUT)
+                html_content = await new_page.content()
+
+                # 一次扫描移除脚本、事件属性、javascript:链接和自动刷新，并禁用表单元素（在解析执行器中执行，不阻塞其他标签页）
+                cleaned_html = await get_parse_executor().run(sanitize_html, html_content)
+
+                # 保存清理后的HTML到文件
+                filename = f'results/company_executives_page_{search_keyword}.html'
+                async with aiofiles.open(filename, 'w', encoding='utf-8') as f:
+                    await f.write(cleaned_html)
+
+                print(f"页面已成功保存为 {filename}")
+                print("所有JavaScript和交互功能已被移除")
+                print(f"资源统计: {pool.stats(page)}")
+
+                # 浏览器中更新的cookie同步回共享的 cookie jar
+                get_cookie_jar().update_from_playwright(await page.context.cookies())
+                print("-" * 50)
+
+                return True
+            finally:
+                # 关闭公司介绍页面；成功时首页放回浏览器池
+                if new_page is not None:
+                    await new_page.close()
+    except Exception as e:
+        print(f"操作过程中出现错误: {e}")
+        # 保存错误截图
+        # await page.screenshot(path=f'temps/error_screenshot_{search_keyword}.png')
+        # print(f"错误截图已保存为 temps/error_screenshot_{search_keyword}.png")
+        return False
 
 
 # 批量处理多个公司
-async def batch_process_companies(url: str):
+async def batch_process_companies(url: str, concurrency: int = POOL_MAX_PAGES, headless: bool = True,
+                                  fast_mode: bool = False, sink_path: str = EXECUTIVES_SINK_PATH):
     t1 = time.time()
 
     # url = "https://www.cninfo.com.cn/new/index"
@@ -251,14 +217,32 @@ async def batch_process_companies(url: str):
 
     success_count = 0
     error_count = 0
+    queue = asyncio.Queue()
     for company in companies:
-        print(f"开始处理公司: {company}")
-        rs = await search_and_save_page(url, company)
-        if rs:
-            success_count += 1
-        else:
-            error_count += 1
-        await asyncio.sleep(random.randint(3, 6))  # 添加延迟避免请求过快
+        queue.put_nowait(company)
+
+    async def worker():
+        nonlocal success_count, error_count
+        while not queue.empty():
+            company = queue.get_nowait()
+            print(f"开始处理公司: {company}")
+            rs = await search_and_save_page(url, company, pool=pool, sink=sink)
+            if rs:
+                success_count += 1
+            else:
+                error_count += 1
+            await asyncio.sleep(random.randint(3, 6))  # 添加延迟避免请求过快
+
+    # 先预热会话，浏览器使用预热后的cookie
+    async with CNInfoUtils() as cn_utils:
+        await cn_utils.warm_up()
+
+    # 浏览器只启动一次，多个公司在不同标签页中并行处理；高管数据批量写入同一个文件
+    async with BrowserPool(max_pages=concurrency, headless=headless, cookies=await load_cookies(),
+                           fast_mode=fast_mode) as pool, \
+            open_sink(sink_path, fieldnames=EXECUTIVES_SINK_FIELDS) as sink:
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+    await get_cookie_jar().save_if_dirty()
 
     t2 = time.time()
     print("=" * 50)
@@ -272,11 +256,11 @@ async def batch_process_companies(url: str):
 async def main():
     url = "https://www.cninfo.com.cn/new/index"
 
-    # 单个公司处理，观察过程可以设置: headless=False
+    # 单个公司处理，观察过程可以设置: headless=False；只需要数据时可以设置 fast_mode=True 拦截无关资源
     await search_and_save_page(url, "000001", headless=True)
 
-    # # 如果要批量处理，取消下面的注释
-    # await batch_process_companies(url)
+    # # 如果要批量处理，取消下面的注释；所有公司的高管数据写入 sink_path（.jsonl / .csv / .db）
+    # await batch_process_companies(url, sink_path="results/executives.jsonl")
 
 
 if __name__ == "__main__":
@@ -17,3 +17,34 @@ print(rs)
 # rs = crawl("平安银行")
 # rs = crawl("TCL科技")
 # print(rs)
+
+# # 批量查询: 有限并发、每完成一家公司写一次断点，中断后重新运行会从断点继续
+# import logging
+# from utils.cninfo_batch import batch_crawl
+# logging.basicConfig(level=logging.INFO)
+# stats = batch_crawl("data/stock_codes_mini.txt", concurrency=4)
+# print(stats)
+
+# # 本地证券索引: 构建一次后，检索公司时直接从索引解析 code/orgId，不再请求 topSearch
+# # is_update默认为False,如果设置为True则进行数据更新（数据来源为对应网站的数据）
+# from utils.cninfo_utils import securities
+# index = securities(is_update=True)
+# print(len(index), index.lookup("平安银行"))
+
+# # 公司公告: 增量同步，只返回上次同步之后的新公告（水位保存在 data/news_watermarks.json）
+# import asyncio
+# from utils.cninfo_utils import CNInfoUtils
+# async def sync_news():
+#     async with CNInfoUtils() as cn_utils:
+#         return await cn_utils.sync_company_news("000001,gssz0000001")
+# print(len(asyncio.run(sync_news())))
+
+# # 公司公告PDF: 批量下载到 results/announcements，支持断点续传，内容相同的文件只保存一份
+# import asyncio
+# from utils.cninfo_utils import CNInfoUtils
+# from utils.announcement_downloader import AnnouncementDownloader
+# async def download_news():
+#     async with CNInfoUtils() as cn_utils:
+#         news = await cn_utils.sync_company_news("000001,gssz0000001")
+#         return await AnnouncementDownloader(cn_utils).download_many(news)
+# print(asyncio.run(download_news()))
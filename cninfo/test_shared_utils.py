@@ -0,0 +1,27 @@
+"""
+各项目的 utils 互相独立（每个项目单独运行，import 的是自己目录下的 utils），通用模块在需要的项目中各复制一份；
+这里检查这些副本逐字节一致，修改时需要同步修改所有副本
+
+运行: python -m pytest test_shared_utils.py 或 python test_shared_utils.py
+"""
+import pathlib
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+# 通用模块 => 有副本的项目
+SHARED_MODULES = {
+    "parse_executor.py": ["cninfo", "csb", "jobsalary"],
+    "rate_limiter.py": ["cninfo", "hurun"],
+}
+
+
+def test_shared_modules_in_sync():
+    for module, projects in SHARED_MODULES.items():
+        paths = [REPO_ROOT / project / "utils" / module for project in projects]
+        expected = paths[0].read_bytes()
+        for path in paths[1:]:
+            assert path.read_bytes() == expected, f"{path} 与 {paths[0]} 不一致"
+
+
+if __name__ == "__main__":
+    test_shared_modules_in_sync()
+    print("ok")
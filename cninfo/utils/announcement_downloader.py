@@ -0,0 +1,211 @@
+"""
+公司公告PDF批量下载：分块写盘、断点续传、按内容哈希去重
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import pathlib
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+import aiohttp
+
+from .cninfo_utils import COMMON_HEADERS, CNInfoUtils
+
+# 脚本所在目录
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+# 下载目录：parts/ 未完成的文件，objects/ 按内容哈希存放的文件，manifest.jsonl 公告 => 文件的对应关系
+DOWNLOAD_ROOT = SCRIPT_ROOT.parent / "results" / "announcements"
+# 同时下载的文件数
+DOWNLOAD_CONCURRENCY = 4
+# 每次读写的块大小
+CHUNK_SIZE = 64 * 1024
+# 大文件下载不限制总时长，只限制两次读取之间的间隔
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+
+
+def content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    解析 Content-Range 响应头
+
+    Returns: (起始位置, 文件总大小)，如 "bytes 100-199/1000" => (100, 1000)，"bytes */1000" => (None, 1000)，
+             无法解析的部分为None
+    """
+    if not value or not value.startswith("bytes "):
+        return None, None
+    span, _, total = value[len("bytes "):].partition("/")
+    start = span.split("-", 1)[0].strip()
+    return (int(start) if start.isdigit() else None), (int(total) if total.strip().isdigit() else None)
+
+
+class AnnouncementDownloader:
+    """
+    公告PDF下载器
+
+    文件边下载边写入 parts/<announcementId>.part，同时增量计算 sha256，内存中只保留一个块；
+    中断后再次下载会用 Range 请求从已下载的位置继续，大小与服务器返回的文件大小一致才算下载完成；下载完成后按 sha256 存到 objects/，
+    内容相同的公告（如重复发布）只保存一份；同一个公告同时只下载一次，其它调用等待同一个下载的结果
+    """
+
+    def __init__(self, cn_utils: CNInfoUtils, root: pathlib.Path = DOWNLOAD_ROOT,
+                 concurrency: int = DOWNLOAD_CONCURRENCY):
+        self.cn_utils = cn_utils
+        self.root = pathlib.Path(root)
+        self.parts_dir = self.root / "parts"
+        self.objects_dir = self.root / "objects"
+        self.manifest_path = self.root / "manifest.jsonl"
+        self.concurrency = max(1, concurrency)
+        # 已下载的公告：announcementId => manifest记录
+        self._manifest: Optional[Dict[str, dict]] = None
+        self._manifest_lock: Optional[asyncio.Lock] = None
+        # 正在下载的公告：announcementId => 下载任务，避免同时写同一个 .part 文件
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def load_manifest(self) -> Dict[str, dict]:
+        """加载已下载的公告记录（只加载一次，加载完成前其他调用等待，不会看到只读了一部分的记录）"""
+        if self._manifest is not None:
+            return self._manifest
+        if self._manifest_lock is None:
+            self._manifest_lock = asyncio.Lock()
+        async with self._manifest_lock:
+            if self._manifest is None:
+                manifest = {}
+                if self.manifest_path.exists():
+                    async with aiofiles.open(self.manifest_path, "r", encoding="utf-8") as f:
+                        async for line in f:
+                            if line.strip():
+                                row = json.loads(line)
+                                manifest[row["announcementId"]] = row
+                self._manifest = manifest
+        return self._manifest
+
+    def object_path(self, digest: str) -> pathlib.Path:
+        return self.objects_dir / digest[:2] / f"{digest}.pdf"
+
+    async def download_many(self, announcements: List[dict]) -> List[dict]:
+        """
+        批量下载公告PDF
+
+        Args:
+            announcements: 公告列表（get_company_news / iter_company_news 返回的记录，需要有 adjunctUrl）
+
+        Returns: 下载成功的manifest记录，如 {"announcementId": "...", "sha256": "...", "path": "...", "size": 1024}
+        """
+        await self.load_manifest()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _download(announcement: dict):
+            async with semaphore:
+                return await self.download(announcement)
+
+        results = await asyncio.gather(*[_download(a) for a in announcements if a.get("adjunctUrl")])
+        return [r for r in results if r]
+
+    async def download(self, announcement: dict) -> Optional[dict]:
+        """下载单个公告PDF，失败返回None，下次调用会从断点继续"""
+        manifest = await self.load_manifest()
+        ann_id = str(announcement.get("announcementId") or announcement["adjunctUrl"].rsplit("/", 1)[-1])
+        if ann_id in manifest:
+            return manifest[ann_id]
+
+        task = self._inflight.get(ann_id)
+        if task is None:
+            task = asyncio.create_task(self._download(ann_id, announcement))
+            self._inflight[ann_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(ann_id, None))
+        # 某个调用被取消时不取消下载，其它等待同一个公告的调用仍然可以拿到结果
+        return await asyncio.shield(task)
+
+    async def _download(self, ann_id: str, announcement: dict) -> Optional[dict]:
+        manifest = await self.load_manifest()
+        url = f"{self.cn_utils.base_url_static}/{announcement['adjunctUrl']}"
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        part_path = self.parts_dir / f"{ann_id}.part"
+        try:
+            digest, size = await self._fetch_to_part(url, part_path)
+        except Exception as e:
+            logging.exception(f"下载公告失败: {url}, {e}")
+            return None
+
+        # 按内容哈希存放，已有相同内容时丢弃本次下载的文件
+        object_path = self.object_path(digest)
+        if object_path.exists():
+            part_path.unlink()
+        else:
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part_path, object_path)
+
+        row = {
+            "announcementId": ann_id,
+            "announcementTitle": announcement.get("announcementTitle", ""),
+            "url": url,
+            "sha256": digest,
+            "size": size,
+            "path": str(object_path.relative_to(self.root)),
+        }
+        async with self._manifest_lock:
+            async with aiofiles.open(self.manifest_path, "a", encoding="utf-8") as f:
+                await f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            manifest[ann_id] = row
+        return row
+
+    async def _fetch_to_part(self, url: str, part_path: pathlib.Path) -> tuple:
+        """流式下载到临时文件，返回 (sha256, 文件大小)"""
+        sha256 = hashlib.sha256()
+        offset = 0
+        if part_path.exists():
+            # 续传：先把已下载部分计入哈希
+            async with aiofiles.open(part_path, "rb") as f:
+                while True:
+                    chunk = await f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    offset += len(chunk)
+
+        headers = COMMON_HEADERS.copy()
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        await self.cn_utils.rate_limiter.acquire(url)
+        session = await self.cn_utils.get_session()
+        async with session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status == 416 and offset:
+                # 已下载部分与文件大小一致才是完整文件；否则（如 .part 比文件大或无法确认大小）丢弃，下次从头下载
+                _, total = content_range(response.headers.get("Content-Range"))
+                if total == offset:
+                    return sha256.hexdigest(), offset
+                part_path.unlink(missing_ok=True)
+                raise RuntimeError(f"续传失败，已下载 {offset} 字节，文件大小: {total}")
+            if response.status == 200 and offset:
+                # 服务器不支持Range，从头开始
+                sha256 = hashlib.sha256()
+                offset = 0
+            elif response.status not in (200, 206):
+                raise RuntimeError(f"请求失败，状态码: {response.status}")
+            if response.status == 206 and content_range(response.headers.get("Content-Range"))[0] != offset:
+                # 返回的不是请求的位置，已下载部分无法接上：丢弃，下次从头下载
+                part_path.unlink(missing_ok=True)
+                raise RuntimeError(f"续传位置不一致: 请求 {offset}，返回 {response.headers.get('Content-Range')}")
+            total = self._expected_size(response)
+            async with aiofiles.open(part_path, "ab" if offset else "wb") as f:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    sha256.update(chunk)
+                    await f.write(chunk)
+                    offset += len(chunk)
+        if total is not None and offset != total:
+            # 连接中断等原因没有下载完，保留 .part，下次续传
+            raise RuntimeError(f"下载不完整: {offset} / {total}")
+        return sha256.hexdigest(), offset
+
+    @staticmethod
+    def _expected_size(response: aiohttp.ClientResponse) -> Optional[int]:
+        """下载完成后文件应有的大小（206 为 Content-Range 中的总大小，200 为 Content-Length），无法确认时返回None"""
+        if response.status == 206:
+            return content_range(response.headers.get("Content-Range"))[1]
+        length = response.headers.get("Content-Length", "")
+        # 压缩传输时 Content-Length 是压缩后的大小，与写入的字节数不同
+        if length.isdigit() and not response.headers.get("Content-Encoding"):
+            return int(length)
+        return None
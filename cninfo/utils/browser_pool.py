@@ -0,0 +1,248 @@
+"""
+Playwright 浏览器池：常驻浏览器，按需分配 context/page，多个公司并行在不同标签页中处理
+"""
+import asyncio
+import itertools
+import logging
+import re
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, Request, Route, async_playwright
+
+# 常驻的浏览器数量
+POOL_BROWSERS = 1
+# 同时使用的页面数量上限
+POOL_MAX_PAGES = 4
+# 页面使用多少次后回收（关闭对应的context），避免内存持续增长
+POOL_MAX_USES = 20
+# 快速模式：只放行这些类型的资源
+FAST_MODE_RESOURCE_TYPES = {"document", "script", "xhr", "fetch"}
+# 快速模式：只放行这些域名（含子域名）
+FAST_MODE_ALLOWED_HOSTS = ("cninfo.com.cn",)
+# 快速模式：即使类型和域名都放行，也拦截的url（统计、埋点脚本）
+FAST_MODE_BLOCKED_URL_RE = re.compile(r"hm\.baidu\.com|google-analytics|googletagmanager|cnzz|/sp\.js|snowplow",
+                                      re.IGNORECASE)
+# 估算拦截节省的流量：各类资源的大致大小（字节），本进程中加载过同类资源后改用实际的平均大小（见 ResourceSizes）
+FAST_MODE_TYPICAL_BYTES = {
+    "image": 30 * 1024,
+    "media": 500 * 1024,
+    "font": 60 * 1024,
+    "stylesheet": 30 * 1024,
+    "script": 50 * 1024,
+}
+FAST_MODE_TYPICAL_BYTES_OTHER = 5 * 1024
+
+
+def is_allowed_in_fast_mode(request: Request) -> bool:
+    """快速模式下是否放行该请求"""
+    if request.resource_type not in FAST_MODE_RESOURCE_TYPES:
+        return False
+    if FAST_MODE_BLOCKED_URL_RE.search(request.url):
+        return False
+    host = urlsplit(request.url).hostname or ""
+    return any(host == h or host.endswith("." + h) for h in FAST_MODE_ALLOWED_HOSTS)
+
+
+class ResourceSizes:
+    """
+    各类资源实际加载的平均大小，用于估算拦截节省的流量
+
+    被拦截的请求没有响应，无法知道实际大小（单独发 HEAD 请求又会增加请求，失去拦截的意义），
+    因此按同类资源的平均大小估算：本进程中（如非快速模式运行时）加载过的按实际平均值，否则按 FAST_MODE_TYPICAL_BYTES
+    """
+
+    def __init__(self):
+        self._totals: Counter = Counter()
+        self._counts: Counter = Counter()
+
+    def add(self, resource_type: str, size: int):
+        self._totals[resource_type] += size
+        self._counts[resource_type] += 1
+
+    def estimate(self, resource_type: str) -> int:
+        """某类资源一个请求的估算大小（字节）"""
+        if self._counts[resource_type]:
+            return self._totals[resource_type] // self._counts[resource_type]
+        return FAST_MODE_TYPICAL_BYTES.get(resource_type, FAST_MODE_TYPICAL_BYTES_OTHER)
+
+
+# 进程内共享的资源大小统计
+RESOURCE_SIZES = ResourceSizes()
+
+
+class ResourceStats:
+    """
+    单次使用页面期间的资源统计：加载的请求数和流量、拦截的请求数和估算节省的流量
+
+    bytes 为实际加载的流量；blocked_bytes 为估算值（见 ResourceSizes），不是实际测量的结果
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.blocked: Counter = Counter()
+        self.blocked_bytes = 0
+
+    def reset(self):
+        self.requests = 0
+        self.bytes = 0
+        self.blocked.clear()
+        self.blocked_bytes = 0
+
+    @property
+    def blocked_requests(self) -> int:
+        return sum(self.blocked.values())
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "blocked_requests": self.blocked_requests,
+            "blocked_by_type": dict(self.blocked),
+            "blocked_bytes_estimate": self.blocked_bytes,
+        }
+
+    def __str__(self):
+        blocked = ", ".join(f"{k}: {v}" for k, v in self.blocked.most_common())
+        return (f"加载请求: {self.requests}, 流量: {self.bytes / 1024:.1f}KB, "
+                f"拦截请求: {self.blocked_requests}" + (f" ({blocked})" if blocked else "") +
+                (f", 估算节省流量: {self.blocked_bytes / 1024:.1f}KB" if self.blocked_requests else ""))
+
+
+class PooledPage:
+    """池中的页面：独占一个context，记录使用次数"""
+
+    def __init__(self, context: BrowserContext, page: Page, stats: ResourceStats):
+        self.context = context
+        self.page = page
+        self.stats = stats
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    浏览器池
+
+    用法::
+
+        async with BrowserPool(max_pages=4) as pool:
+            async with pool.page() as page:
+                await page.goto(url)
+
+    浏览器只启动一次；页面用完放回池中复用，使用 max_uses 次后回收；出现异常的页面直接回收
+
+    fast_mode 为True时拦截图片、字体、样式、统计脚本等与数据无关的请求（见 FAST_MODE_*），
+    每次使用页面期间的请求和流量统计（含估算节省的流量）可以通过 stats(page) 获取
+    """
+
+    def __init__(self, browsers: int = POOL_BROWSERS, max_pages: int = POOL_MAX_PAGES,
+                 max_uses: int = POOL_MAX_USES, headless: bool = True, cookies: Optional[List[dict]] = None,
+                 fast_mode: bool = False):
+        self.browsers_count = max(1, browsers)
+        self.max_pages = max(1, max_pages)
+        self.max_uses = max(1, max_uses)
+        self.headless = headless
+        # 新建context时设置的cookies
+        self.cookies = cookies or []
+        self.fast_mode = fast_mode
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[Browser] = []
+        self._browser_cycle = None
+        self._idle: List[PooledPage] = []
+        self._stats: Dict[Page, ResourceStats] = {}
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self):
+        """启动浏览器"""
+        if self._playwright is not None:
+            return
+        self._playwright = await async_playwright().start()
+        for _ in range(self.browsers_count):
+            self._browsers.append(await self._playwright.chromium.launch(headless=self.headless))
+        self._browser_cycle = itertools.cycle(self._browsers)
+
+    async def close(self):
+        """关闭所有页面和浏览器"""
+        for pooled in self._idle:
+            await self._discard(pooled)
+        self._idle.clear()
+        for browser in self._browsers:
+            await browser.close()
+        self._browsers.clear()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _create(self) -> PooledPage:
+        """在下一个浏览器中新建context和页面"""
+        if self._playwright is None:
+            await self.start()
+        browser = next(self._browser_cycle)
+        context = await browser.new_context()
+        if self.cookies:
+            await context.add_cookies(self.cookies)
+        stats = ResourceStats()
+
+        async def on_request_finished(request: Request):
+            stats.requests += 1
+            try:
+                sizes = await request.sizes()
+                size = sizes["responseHeadersSize"] + sizes["responseBodySize"]
+            except Exception:
+                return
+            stats.bytes += size
+            RESOURCE_SIZES.add(request.resource_type, size)
+
+        async def on_route(route: Route):
+            if is_allowed_in_fast_mode(route.request):
+                await route.continue_()
+            else:
+                stats.blocked[route.request.resource_type] += 1
+                stats.blocked_bytes += RESOURCE_SIZES.estimate(route.request.resource_type)
+                await route.abort()
+
+        # context级别的统计和拦截，对新打开的标签页同样有效
+        context.on("requestfinished", on_request_finished)
+        if self.fast_mode:
+            await context.route("**/*", on_route)
+        page = await context.new_page()
+        self._stats[page] = stats
+        return PooledPage(context, page, stats)
+
+    def stats(self, page: Page) -> ResourceStats:
+        """页面本次使用期间的资源统计（加载的流量为实际值，拦截节省的流量为估算值）"""
+        return self._stats.get(page) or ResourceStats()
+
+    async def _discard(self, pooled: PooledPage):
+        self._stats.pop(pooled.page, None)
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logging.warning(f"关闭浏览器context异常: {e}")
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """从池中获取一个页面，池满时等待"""
+        async with self._semaphore:
+            pooled = self._idle.pop() if self._idle else await self._create()
+            pooled.stats.reset()
+            ok = False
+            try:
+                yield pooled.page
+                ok = True
+            finally:
+                pooled.uses += 1
+                if ok and pooled.uses < self.max_uses and not pooled.page.is_closed():
+                    self._idle.append(pooled)
+                else:
+                    await self._discard(pooled)
@@ -0,0 +1,176 @@
+"""
+www.cninfo.com.cn 批量检索：有限并发、断点续跑
+"""
+import asyncio
+import json
+import logging
+import pathlib
+import time
+from typing import Dict, List, Optional
+
+import aiofiles
+
+from .cninfo_utils import CNInfoUtils
+
+# 脚本所在目录
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+# 股票代码列表
+STOCK_CODES_PATH = SCRIPT_ROOT.parent / "data" / "stock_codes.txt"
+# 批量检索结果（每行一条json）和断点文件（每行一个已完成的股票代码）
+BATCH_RESULTS_PATH = SCRIPT_ROOT.parent / "results" / "batch_results.jsonl"
+BATCH_CHECKPOINT_PATH = SCRIPT_ROOT.parent / "results" / "batch_checkpoint.txt"
+# 默认同时处理的公司数量
+BATCH_CONCURRENCY = 4
+# 每完成多少条输出一次进度
+PROGRESS_INTERVAL = 10
+
+
+async def load_stock_codes(path: pathlib.Path = STOCK_CODES_PATH) -> List[str]:
+    """加载股票代码列表，文件内容为逗号分隔的代码，可以多行"""
+    async with aiofiles.open(path, "r", encoding="utf-8") as f:
+        codes = []
+        async for line in f:
+            codes += [c.strip() for c in line.split(",") if c.strip()]
+        return codes
+
+
+async def load_checkpoint(path: pathlib.Path = BATCH_CHECKPOINT_PATH) -> set:
+    """加载已完成的股票代码，断点文件不存在时返回空集合"""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return set()
+    async with aiofiles.open(path, "r", encoding="utf-8") as f:
+        return {line.strip() async for line in f if line.strip()}
+
+
+class BatchCrawler:
+    """
+    批量检索公司信息
+
+    同时处理 concurrency 家公司（共享同一个 CNInfoUtils 的连接池和限速器），
+    每完成一家公司就把结果追加到结果文件、把代码追加到断点文件；中途崩溃后重新运行会跳过已完成的代码。
+    检索失败的代码不会写入断点文件，下次运行时会重试
+    """
+
+    def __init__(self, cn_utils: CNInfoUtils, concurrency: int = BATCH_CONCURRENCY,
+                 results_path: pathlib.Path = BATCH_RESULTS_PATH,
+                 checkpoint_path: pathlib.Path = BATCH_CHECKPOINT_PATH,
+                 progress_interval: int = PROGRESS_INTERVAL):
+        self.cn_utils = cn_utils
+        self.concurrency = max(1, concurrency)
+        self.results_path = pathlib.Path(results_path)
+        self.checkpoint_path = pathlib.Path(checkpoint_path)
+        self.progress_interval = max(1, progress_interval)
+        # 统计信息
+        self.total = 0
+        self.success_count = 0
+        self.error_count = 0
+        self.started_at = 0.0
+
+    @property
+    def done_count(self) -> int:
+        return self.success_count + self.error_count
+
+    def throughput(self) -> float:
+        """当前吞吐量：条/秒"""
+        elapsed = time.monotonic() - self.started_at
+        return self.done_count / elapsed if elapsed > 0 else 0.0
+
+    def log_progress(self):
+        logging.info(f"进度: {self.done_count}/{self.total}, 成功: {self.success_count}, "
+                     f"失败: {self.error_count}, 速度: {self.throughput():.2f} 条/秒")
+
+    async def run(self, codes: List[str], resume: bool = True) -> Dict[str, float]:
+        """
+        执行批量检索
+
+        Args:
+            codes: 股票代码列表
+            resume: 是否从断点继续，为False时清空之前的结果和断点
+
+        Returns: 统计信息
+        """
+        self.results_path.parent.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        mode = "a" if resume else "w"
+        finished = await load_checkpoint(self.checkpoint_path) if resume else set()
+        # 去重并保持原有顺序
+        pending = [c for c in dict.fromkeys(codes) if c not in finished]
+        skipped = len(codes) - len(pending)
+        if skipped:
+            logging.info(f"从断点继续，跳过已完成的记录: {skipped}")
+
+        if pending:
+            # 所有worker共用同一个会话，开始前预热一次
+            await self.cn_utils.warm_up()
+
+        self.total = len(pending)
+        self.success_count = 0
+        self.error_count = 0
+        self.started_at = time.monotonic()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for code in pending:
+            queue.put_nowait(code)
+
+        async with aiofiles.open(self.results_path, mode, encoding="utf-8") as results_f, \
+                aiofiles.open(self.checkpoint_path, mode, encoding="utf-8") as checkpoint_f:
+            write_lock = asyncio.Lock()
+
+            async def worker():
+                while True:
+                    try:
+                        code = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        rs = await self.cn_utils.find_by_company_back_markdown(code)
+                    except Exception as e:
+                        logging.exception(f"检索失败: {code}, {e}")
+                        rs = {}
+                    async with write_lock:
+                        if rs and rs.get("result"):
+                            # 先写结果，再写断点：崩溃时最多重复一条，不会丢失
+                            await results_f.write(json.dumps(rs, ensure_ascii=False) + "\n")
+                            await results_f.flush()
+                            await checkpoint_f.write(code + "\n")
+                            await checkpoint_f.flush()
+                            self.success_count += 1
+                        else:
+                            self.error_count += 1
+                        if self.done_count % self.progress_interval == 0:
+                            self.log_progress()
+
+            await asyncio.gather(*[worker() for _ in range(min(self.concurrency, self.total or 1))])
+
+        self.log_progress()
+        return {
+            "total": self.total,
+            "skipped": skipped,
+            "success": self.success_count,
+            "error": self.error_count,
+            "elapsed": time.monotonic() - self.started_at,
+            "throughput": self.throughput(),
+        }
+
+
+def batch_crawl(codes_path: Optional[str] = None, concurrency: int = BATCH_CONCURRENCY,
+                resume: bool = True) -> Dict[str, float]:
+    """
+    批量检索股票代码列表中的公司信息
+
+    Args:
+        codes_path: 股票代码列表文件，默认为 data/stock_codes.txt
+        concurrency: 同时处理的公司数量
+        resume: 是否从断点继续
+
+    Returns: 统计信息，如 {'total': 500, 'success': 498, 'error': 2, 'throughput': 1.2, ...}
+
+    """
+    async def _run():
+        codes = await load_stock_codes(pathlib.Path(codes_path) if codes_path else STOCK_CODES_PATH)
+        async with CNInfoUtils() as cn_utils:
+            crawler = BatchCrawler(cn_utils, concurrency=concurrency)
+            return await crawler.run(codes, resume=resume)
+
+    return asyncio.run(_run())
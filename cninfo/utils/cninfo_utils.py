@@ -4,21 +4,104 @@ www.cninfo.com.cn 工具
 import asyncio
 import json
 import logging
-import random
-from typing import Dict
+import pathlib
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from urllib.parse import quote
 
 import aiohttp
 
+from .cookie_jar import SharedCookieJar, get_cookie_jar
+from .news_watermark import NewsWatermarkStore
+from .rate_limiter import HostRateLimiter
+from .security_index import (SECURITY_INDEX_PATH, SecurityIndex, build_security_index, get_security_index,
+                             parse_key_board_list)
+
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 COMMON_HEADERS = {
     "User-Agent": USER_AGENT,
     "Referer": "https://www.cninfo.com.cn/"
 }
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+# 连接池：总连接数上限、单个域名的连接数上限
+CONNECTOR_LIMIT = 100
+CONNECTOR_LIMIT_PER_HOST = 8
+# 空闲连接保活时间（秒）
+KEEPALIVE_TIMEOUT = 60
+# DNS缓存时间（秒）
+DNS_CACHE_TTL = 600
+# 各域名的限速配置：{域名: (每秒补充的令牌数, 突发容量)}
+HOST_LIMITS = {
+    "www.cninfo.com.cn": (0.5, 3),
+    "static.cninfo.com.cn": (2.0, 5),
+}
+# 进程级共享的限速器
+RATE_LIMITER = HostRateLimiter(HOST_LIMITS)
+# 预热会话时访问的页面，用于获取服务端下发的会话cookie
+WARM_UP_URL = "https://www.cninfo.com.cn/new/index"
+# 单个接口的超时时间（秒）
+CALL_TIMEOUT = 30
+# 公司公告：每页条数、翻页时预取的页数
+NEWS_PAGE_SIZE = 30
+NEWS_PREFETCH_PAGES = 1
+# 公司高管：表头 => 接口字段
+EXECUTIVE_FIELDS = {
+    "姓名": "F002V",
+    "职务": "F009V",
+    "学历": "F017V",
+    "年薪(万元)": "F005N",
+    "持股数(股)": "F012N",
+}
+
+
+def executive_value(row: dict, key: str) -> str:
+    """高管接口字段的值转换为文本，缺失、null、None 时为 "--" """
+    val = row.get(key, "--")
+    if not val or val in ["null", "None"]:
+        val = "--"
+    return str(val)
+
+
+def _build_resolver() -> aiohttp.abc.AbstractResolver:
+    """优先使用基于aiodns的异步解析器，未安装时回退到线程池解析"""
+    try:
+        return aiohttp.AsyncResolver()
+    except (ImportError, RuntimeError):
+        return aiohttp.ThreadedResolver()
 
 
 class CNInfoUtils:
-    def __init__(self):
+    """
+    巨潮资讯工具
+
+    内部持有一个长连接的 ClientSession（连接池、keep-alive、DNS缓存），同一个实例的所有请求复用已建立的连接。
+    推荐用法::
+
+        async with CNInfoUtils() as cn_utils:
+            rs = await cn_utils.find_by_company_back_markdown("000001")
+
+    不使用 async with 时，用完需要调用 await cn_utils.close()
+
+    所有请求都经过按域名的令牌桶限速（见 HOST_LIMITS），多个并发检索共享同一份额度
+
+    cookie 使用进程内共享的 cookie jar（见 cookie_jar.get_cookie_jar），与 Playwright 共用，关闭时有更新则保存（不修改初始cookie文件）
+    """
+
+    def __init__(self, limit_per_host: int = CONNECTOR_LIMIT_PER_HOST,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 security_index: Optional[SecurityIndex] = None,
+                 cookie_jar: Optional[SharedCookieJar] = None):
+        # 连接池配置
+        self.limit_per_host = limit_per_host
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 共享cookie，为空时在创建 ClientSession 时获取（需要在事件循环中）
+        self.cookie_jar = cookie_jar
+        # 按域名限速，默认使用进程内共享的限速器
+        self.rate_limiter = rate_limiter or RATE_LIMITER
+        # 本地证券索引，默认加载 data/security_index.json
+        self.security_index = security_index if security_index is not None else get_security_index()
+
         # 静态资源路径
         self.base_url_static = "https://static.cninfo.com.cn"
 
@@ -37,51 +120,143 @@ class CNInfoUtils:
         self.base_url_uquery = "https://www.cninfo.com.cn/new/executive/recommend"
         self.base_url_user_for_human = "https://www.cninfo.com.cn/new/fulltextSearch?notautosubmit=&keyWord={username}&searchType=0"
 
-    async def find_by_company_back_markdown(self, keyword: str) -> Dict[str, str]:
+    async def __aenter__(self) -> "CNInfoUtils":
+        await self.get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取共享的 ClientSession，不存在或已关闭时新建"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTOR_LIMIT,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                use_dns_cache=True,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                resolver=_build_resolver(),
+            )
+            if self.cookie_jar is None:
+                self.cookie_jar = get_cookie_jar()
+            self._session = aiohttp.ClientSession(connector=connector, cookie_jar=self.cookie_jar)
+        return self._session
+
+    async def close(self):
+        """关闭共享的 ClientSession 及其连接池，cookie有更新时保存"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.cookie_jar is not None:
+            await self.cookie_jar.save_if_dirty()
+
+    async def warm_up(self, timeout: float = CALL_TIMEOUT) -> bool:
+        """
+        预热会话：提前建立连接，并访问首页获取服务端下发的会话cookie，批量抓取前调用一次即可
+
+        Returns: 是否成功
+        """
+        try:
+            await self.rate_limiter.acquire(WARM_UP_URL)
+            session = await self.get_session()
+            async with session.get(WARM_UP_URL, headers=COMMON_HEADERS,
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                await response.read()
+                ok = response.status == 200
+        except Exception as e:
+            logging.warning(f"预热会话失败: {e}")
+            return False
+        await self.cookie_jar.save_if_dirty()
+        return ok
+
+    async def find_by_company_back_markdown(self, keyword: str, timeout: float = CALL_TIMEOUT) -> Dict[str, str]:
         """
         通过公司名称/代码进行检索
 
         Args:
             keyword: 公司名称、公司编码、公司高管名称等
+            timeout: 简介、高管、公告每个接口的超时时间（秒）
 
         Returns: markdown格式，如果找不到记录返回空
 
         """
-        # 查询公司的前置信息
-        rs = await self.find_by_company(keyword)
-        if not rs:
+        # 查询公司的前置信息：优先使用本地证券索引
+        security = await self.resolve_company(keyword)
+        return await self.company_back_markdown(keyword, security, timeout=timeout)
+
+    async def company_back_markdown(self, keyword: str, security: dict,
+                                    timeout: float = CALL_TIMEOUT) -> Dict[str, str]:
+        """
+        根据已解析的证券信息查询公司详情
+
+        Args:
+            keyword: 原始检索关键字
+            security: resolve_company 的返回结果
+            timeout: 简介、高管、公告每个接口的超时时间（秒）
+
+        Returns: markdown格式，如果找不到记录返回空
+
+        """
+        if not security:
             # print("error: find_by_company_back_markdown-1")
             return {"query": keyword, "result": "", "url": ""}
-        dic = json.loads(rs)
-        key_board_list = dic.get("keyBoardList")
-        if not key_board_list or type(key_board_list) != list:
-            # print("error: find_by_company_back_markdown-2")
-            return {"query": keyword, "result": "", "url": ""}
-        s_code = key_board_list[0].get("code")
-        org_id = key_board_list[0].get("orgId", "")
-        s_name = key_board_list[0].get("zwjc", "")
+        s_code = security.get("code")
+        org_id = security.get("orgId", "")
+        s_name = security.get("zwjc", "")
         url = self.base_url_company_for_human.format(org_id=org_id, s_code=s_code)
         if not s_code:
             # print("error: find_by_company_back_markdown-3")
             return {"query": keyword, "result": "", "url": url}
 
-        # 随机休眠一下，避免被限制
-        await asyncio.sleep(random.randint(3, 5))
-
-        # 1. 查询公司的简介信息
-        result = await self.get_company_profile(s_code)
-        if not result:
+        # 简介、高管、公告三者互不依赖，并发获取；某个接口失败或超时只影响对应的部分
+        profile, executives, news = await asyncio.gather(
+            self.get_company_profile(s_code, timeout=timeout),
+            self.get_company_executives(s_code, timeout=timeout),
+            self.get_company_news(f"{s_code},{org_id}", timeout=timeout),
+        )
+        lines = self.profile_to_markdown(profile)
+        contents1_str = self.executives_to_markdown(executives)
+        news_str = self.news_to_markdown(news)
+        if not lines and not contents1_str:
             # print("error: find_by_company_back_markdown-4")
             return {"query": keyword, "result": "", "url": url}
+        title_str = "|".join(EXECUTIVE_FIELDS.keys())
+        split_str = "|".join(["----"] * len(EXECUTIVE_FIELDS))
+
+        markdown = f"""
+# {s_name} 公司信息
+
+## 公司简介
+{lines}
+
+## 公司高管
+|{title_str}|
+|{split_str}|
+{contents1_str}
+
+## 公司公告
+{news_str}
+"""
+        return {"query": keyword, "result": markdown, "url": url}
+
+    @staticmethod
+    def profile_to_markdown(result: dict) -> str:
+        """
+        公司简介转换为文本，数据缺失时返回空
+
+        Args:
+            result: get_company_profile 的返回结果
+        """
+        if not result:
+            return ""
         records = result.get('data', {}).get('records')
         if not records:
-            # print("error: find_by_company_back_markdown-5")
-            return {"query": keyword, "result": "", "url": url}
+            return ""
         basic_info = records[0].get("basicInformation")
         list_info = records[0].get("listingInformation")
         if not basic_info:
-            # print("error: find_by_company_back_markdown-6")
-            return {"query": keyword, "result": "", "url": url}
+            return ""
         basic_info = basic_info[0]
         if list_info:
             list_info = list_info[0]
@@ -104,68 +279,105 @@ class CNInfoUtils:
         lines += f"主营业务: {basic_info.get('F015V', '--')}" + "\n"
         lines += f"经营范围: {basic_info.get('F016V', '--')}" + "\n"
         lines += f"机构简介: {basic_info.get('F017V', '--')}" + "\n"
+        return lines
 
-        # 随机休眠一下，避免被限制
-        await asyncio.sleep(random.randint(3, 5))
+    @staticmethod
+    def executives_to_markdown(result: dict) -> str:
+        """
+        公司高管转换为markdown表格的数据行，数据缺失时返回空
 
-        # 2. 查询公司的高管
-        result = await self.get_company_executives(s_code)
+        Args:
+            result: get_company_executives 的返回结果
+        """
         if not result:
-            # print("error: find_by_company_back_markdown-7")
-            return {"query": keyword, "result": "", "url": url}
+            return ""
         records = result.get('data', {}).get('records')
         if not records:
-            # print("error: find_by_company_back_markdown-8")
-            return {"query": keyword, "result": "", "url": url}
-        title_map = {
-            "姓名": "F002V",
-            "职务": "F009V",
-            "学历": "F017V",
-            "年薪(万元)": "F005N",
-            "持股数(股)": "F012N",
-        }
-        title_lis = ["姓名", "职务", "学历", "年薪(万元)", "持股数(股)"]
-        title_str = "|".join(title_lis)
-        split_str = "|".join(["----"] * len(title_lis))
+            return ""
         contents1 = []
         for i, row in enumerate(records, 1):
             content = []
-            for k in title_lis:
-                key = title_map.get(k)
-                val = row.get(key, "--")
-                if not val or val in ["null", "None"]:
-                    val = "--"
-                content.append(str(val))
+            for key in EXECUTIVE_FIELDS.values():
+                content.append(executive_value(row, key))
             contents1.append("|" + "|".join(content) + "|")
-        contents1_str = "\n".join(contents1)
-        # 随机休眠一下，避免被限制
-        await asyncio.sleep(random.randint(3, 5))
+        return "\n".join(contents1)
 
-        # 3. 获取公司的新闻
-        result = await self.get_company_news(f"{s_code},{org_id}")
+    def news_to_markdown(self, result: dict, limit: int = 3) -> str:
+        """
+        公司公告转换为文本，数据缺失时返回空
+
+        Args:
+            result: get_company_news 的返回结果
+            limit: 最多保留的公告条数
+        """
         if not result or not result.get("announcements", []):
-            news_str = ""
-        else:
-            announcements = result.get("announcements", [])
-            news_str = ""
-            for row in announcements[:3]:
-                news_str += f"{row.get('announcementTitle')}, url为: {self.base_url_static}/{row.get('adjunctUrl')}" + "\n"
+            return ""
+        announcements = result.get("announcements", [])
+        news_str = ""
+        for row in announcements[:limit]:
+            news_str += f"{row.get('announcementTitle')}, url为: {self.base_url_static}/{row.get('adjunctUrl')}" + "\n"
+        return news_str
 
-        markdown = f"""
-# {s_name} 公司信息
+    async def find_back_markdown(self, query: str, speculative: bool = True) -> Dict[str, str]:
+        """
+        先按公司检索，找不到再按高管检索
 
-## 公司简介
-{lines}
+        Args:
+            query: 公司名称、公司编码、公司高管名称等
+            speculative: 是否同时发起公司和高管的解析请求，公司有结果时取消高管检索，
+                否则使用已经发出的高管检索的结果；为False时按顺序检索
 
-## 公司高管
-|{title_str}|
-|{split_str}|
-{contents1_str}
+        Returns: markdown格式，如果找不到记录返回空
 
-## 公司公告
-{news_str}
-"""
-        return {"query": keyword, "result": markdown, "url": url}
+        """
+        if not speculative:
+            rs = await self.find_by_company_back_markdown(query)
+            if rs and rs.get("result") and rs.get("result").strip():
+                return rs
+            return await self.find_by_username_back_markdown(query)
+
+        # 本地证券索引命中时不需要推测
+        security = self.security_index.lookup(query)
+        if security:
+            rs = await self.company_back_markdown(query, security)
+            if rs.get("result", "").strip():
+                return rs
+            return await self.find_by_username_back_markdown(query)
+
+        # 公司和高管的解析请求同时发出
+        company_task = asyncio.create_task(self.resolve_company(query))
+        username_task = asyncio.create_task(self.find_by_username(query))
+        try:
+            security = await company_task
+            if security:
+                # 公司优先：高管检索继续在后台进行，公司没有结果时直接使用，公司有结果时在 finally 中取消
+                rs = await self.company_back_markdown(query, security)
+                if rs.get("result", "").strip():
+                    return rs
+            return self.username_back_markdown(query, await username_task)
+        finally:
+            for task in (company_task, username_task):
+                if not task.done():
+                    task.cancel()
+
+    async def resolve_company(self, keyword: str) -> dict:
+        """
+        关键字解析为证券信息，本地证券索引未命中时才请求 topSearch/detailOfQuery
+
+        Args:
+            keyword: 公司名称、公司编码等
+
+        Returns: 如 {"code": "000001", "orgId": "gssz0000001", "zwjc": "平安银行", ...}，找不到返回空
+        """
+        security = self.security_index.lookup(keyword)
+        if security:
+            return security
+        rows = parse_key_board_list(await self.find_by_company(keyword))
+        if not rows:
+            return {}
+        # 记到内存索引中，同一进程内再次检索时不再请求
+        self.security_index.add(rows[0])
+        return rows[0]
 
     async def find_by_username_back_markdown(self, username: str) -> Dict[str, str]:
         """
@@ -178,6 +390,19 @@ class CNInfoUtils:
 
         """
         rs = await self.find_by_username(username)
+        return self.username_back_markdown(username, rs)
+
+    def username_back_markdown(self, username: str, rs: str) -> Dict[str, str]:
+        """
+        高管检索结果转换为markdown
+
+        Args:
+            username: 高管姓名
+            rs: find_by_username 的返回内容
+
+        Returns: str 成功返回markdown内容，否则返回空
+
+        """
         url = self.base_url_user_for_human.format(username=quote(username))
         if not rs:
             return {"query": username, "result": "", "url": url}
@@ -247,14 +472,15 @@ class CNInfoUtils:
         url = f"{self.base_url_cquery}"
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, data=form) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        return html
-                    else:
-                        print(f"请求失败，状态码: {response.status}")
-                        return ""
+            await self.rate_limiter.acquire(url)
+            session = await self.get_session()
+            async with session.post(url, headers=headers, data=form) as response:
+                if response.status == 200:
+                    html = await response.text()
+                    return html
+                else:
+                    print(f"请求失败，状态码: {response.status}")
+                    return ""
         except Exception as e:
             logging.exception(f"发生错误: {e}")
             return ""
@@ -278,24 +504,26 @@ class CNInfoUtils:
         url = f"{self.base_url_uquery}"
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, data=form) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        return html
-                    else:
-                        print(f"请求失败，状态码: {response.status}")
-                        return ""
+            await self.rate_limiter.acquire(url)
+            session = await self.get_session()
+            async with session.post(url, headers=headers, data=form) as response:
+                if response.status == 200:
+                    html = await response.text()
+                    return html
+                else:
+                    print(f"请求失败，状态码: {response.status}")
+                    return ""
         except Exception as e:
             logging.exception(f"发生错误: {e}")
             return ""
 
-    async def get_company_executives(self, s_code: str) -> dict:
+    async def get_company_executives(self, s_code: str, timeout: float = CALL_TIMEOUT) -> dict:
         """
         获取公司高管信息
 
         Args:
             s_code: 股票代码，如 '000001'
+            timeout: 请求超时时间（秒）
         """
         # 定义请求头
         headers = COMMON_HEADERS
@@ -303,24 +531,26 @@ class CNInfoUtils:
         url = f"{self.base_url_company_executive}{s_code}"
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data
-                    else:
-                        print(f"请求失败，状态码: {response.status}")
-                        return {}
+            await self.rate_limiter.acquire(url)
+            session = await self.get_session()
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data
+                else:
+                    print(f"请求失败，状态码: {response.status}")
+                    return {}
         except Exception as e:
             logging.exception(f"发生错误: {e}")
             return {}
 
-    async def get_company_profile(self, s_code: str) -> dict:
+    async def get_company_profile(self, s_code: str, timeout: float = CALL_TIMEOUT) -> dict:
         """
         获取公司简介信息
 
         Args:
             s_code: 股票代码，如 '000001'
+            timeout: 请求超时时间（秒）
         """
         # 定义请求头
         headers = COMMON_HEADERS
@@ -328,24 +558,29 @@ class CNInfoUtils:
         url = f"{self.base_url_company_profile}{s_code}"
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data
-                    else:
-                        print(f"请求失败，状态码: {response.status}")
-                        return {}
+            await self.rate_limiter.acquire(url)
+            session = await self.get_session()
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data
+                else:
+                    print(f"请求失败，状态码: {response.status}")
+                    return {}
         except Exception as e:
             logging.exception(f"发生错误: {e}")
             return {}
 
-    async def get_company_news(self, s_code: str) -> dict:
+    async def get_company_news(self, s_code: str, timeout: float = CALL_TIMEOUT,
+                               page_num: int = 1, page_size: int = NEWS_PAGE_SIZE) -> dict:
         """
         获取公司新闻
 
         Args:
-            s_code: 股票代码，如 '000001'
+            s_code: 股票代码，如 '000001,gssz0000001'
+            timeout: 请求超时时间（秒）
+            page_num: 页码，从1开始
+            page_size: 每页条数
         """
         # 定义请求头
         headers = COMMON_HEADERS
@@ -353,8 +588,8 @@ class CNInfoUtils:
         form = aiohttp.FormData()
         form.add_field("stock", s_code)
         form.add_field("tabName", "fulltext")
-        form.add_field("pageSize", 30)
-        form.add_field("pageNum", 1)
+        form.add_field("pageSize", page_size)
+        form.add_field("pageNum", page_num)
         form.add_field("column", "szse")
         form.add_field("plate", "sz")
         form.add_field("isHLtitle", True)
@@ -362,25 +597,172 @@ class CNInfoUtils:
         url = self.base_url_company_news
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, data=form) as response:
-                    if response.status == 200:
-                        dic = await response.json()
-                        return dic
-                    else:
-                        print(f"请求失败，状态码: {response.status}")
-                        return {}
+            await self.rate_limiter.acquire(url)
+            session = await self.get_session()
+            async with session.post(url, headers=headers, data=form,
+                                    timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status == 200:
+                    dic = await response.json()
+                    return dic
+                else:
+                    print(f"请求失败，状态码: {response.status}")
+                    return {}
         except Exception as e:
             logging.exception(f"发生错误: {e}")
             return {}
 
+    async def iter_news_pages(self, s_code: str, page_size: int = NEWS_PAGE_SIZE,
+                              max_pages: Optional[int] = None, prefetch: int = NEWS_PREFETCH_PAGES,
+                              timeout: float = CALL_TIMEOUT) -> AsyncIterator[Tuple[List[dict], bool]]:
+        """
+        逐页获取公司公告（按时间倒序），处理当前页的同时预取后面的 prefetch 页
+
+        Args:
+            s_code: 股票代码，如 '000001,gssz0000001'
+            page_size: 每页条数
+            max_pages: 最多获取的页数，默认不限制
+            prefetch: 预取的页数（至少为1）
+            timeout: 每页请求的超时时间（秒）
+
+        Returns: 逐页返回 (公告列表, 后面是否还有公告)；因为 max_pages 停止时最后一页的 has_more 为True。
+                 某一页请求失败时抛出 RuntimeError；调用方提前结束迭代时
+                 需要用 contextlib.aclosing 或 aclose() 关闭，才会立即取消预取的请求
+        """
+        pending = deque()
+        next_page = 1
+
+        def schedule(last_page: int):
+            # 预取到 last_page 为止
+            nonlocal next_page
+            while next_page <= last_page and (max_pages is None or next_page <= max_pages):
+                pending.append(asyncio.create_task(
+                    self.get_company_news(s_code, timeout=timeout, page_num=next_page, page_size=page_size)))
+                next_page += 1
+
+        schedule(1)
+        page_num = 0
+        try:
+            while pending:
+                result = await pending.popleft()
+                page_num += 1
+                if not result:
+                    # 请求失败（get_company_news 返回空），不能当作公告已经取完
+                    raise RuntimeError(f"获取公司公告失败: {s_code}, 第{page_num}页")
+                announcements = result.get("announcements") or []
+                total_pages = result.get("totalpages") or 0
+                has_more = bool(announcements) and result.get("hasMore", page_num < total_pages)
+                if has_more:
+                    last_page = page_num + max(1, prefetch)
+                    if total_pages:
+                        last_page = max(page_num + 1, min(last_page, total_pages))
+                    schedule(last_page)
+                else:
+                    # 最后一页：丢弃多预取的页
+                    for task in pending:
+                        task.cancel()
+                    pending.clear()
+                yield announcements, has_more
+                if not has_more:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_company_news(self, s_code: str, page_size: int = NEWS_PAGE_SIZE,
+                                max_pages: Optional[int] = None, prefetch: int = NEWS_PREFETCH_PAGES,
+                                timeout: float = CALL_TIMEOUT) -> AsyncIterator[dict]:
+        """
+        逐条获取公司公告（按时间倒序），参数见 iter_news_pages；某一页请求失败时抛出 RuntimeError
 
-def crawl(query: str) -> Dict[str, str]:
+        提前停止时用 contextlib.aclosing 或 aclose() 关闭，预取中的页面请求会立即取消
+        """
+        async with aclosing(self.iter_news_pages(s_code, page_size, max_pages, prefetch, timeout)) as pages:
+            async for announcements, _ in pages:
+                for row in announcements:
+                    yield row
+
+    async def sync_company_news(self, s_code: str, store: Optional[NewsWatermarkStore] = None,
+                                max_pages: Optional[int] = None) -> List[dict]:
+        """
+        增量同步公司公告：只获取水位之后的新公告，并推进水位
+
+        只有翻页到了已同步的公告或最后一页时才推进水位；因为 max_pages 提前停止时返回已获取的新公告，但不推进水位，
+        避免没有获取到的页面中的新公告以后再也不会同步；某一页请求失败时抛出 RuntimeError（不推进水位）
+
+        Args:
+            s_code: 股票代码，如 '000001,gssz0000001'
+            store: 水位存储，默认为 data/news_watermarks.json
+            max_pages: 最多获取的页数，默认不限制
+
+        Returns: 新公告列表（按时间倒序）
+        """
+        store = store or NewsWatermarkStore()
+        key = s_code.split(",")[0]
+        news = []
+        complete = False
+        # 到达水位提前退出时关闭翻页，立即取消预取中的页面请求（不占用限速额度）
+        async with aclosing(self.iter_news_pages(s_code, max_pages=max_pages)) as pages:
+            async for announcements, has_more in pages:
+                for row in announcements:
+                    if store.is_older(key, row):
+                        # 之后的都是已经同步过的历史公告
+                        complete = True
+                        break
+                    if not store.is_seen(key, row):
+                        news.append(row)
+                if complete or not has_more:
+                    complete = True
+                    break
+        if not complete:
+            logging.warning(f"公告没有同步完（max_pages={max_pages}），不推进水位: {s_code}")
+            return news
+        if news:
+            store.advance(key, news)
+            store.save()
+        return news
+
+
+def securities(is_update: bool = False, codes: Optional[List[str]] = None) -> SecurityIndex:
+    """
+    获取本地证券索引
+
+    Args:
+        is_update: 是否更新，如果为True将会通过 topSearch/detailOfQuery 重新解析股票代码（慢），否则直接加载已有索引
+        codes: 需要解析的股票代码，默认为 data/stock_codes.txt 中的全部代码
+
+    Returns:
+
+    """
+    try:
+        if is_update:
+            async def _build():
+                codes_ = codes
+                if codes_ is None:
+                    with open(SCRIPT_ROOT.parent / "data" / "stock_codes.txt", "r", encoding="utf-8") as f:
+                        codes_ = [c.strip() for c in f.read().split(",") if c.strip()]
+                async with CNInfoUtils(security_index=SecurityIndex()) as cn_utils:
+                    return await build_security_index(cn_utils, codes_, base=SecurityIndex.load())
+
+            index = asyncio.run(_build())
+            if len(index):
+                # 更新本地索引
+                index.save(SECURITY_INDEX_PATH)
+                return index
+        # 加载已有索引
+        return get_security_index()
+    except Exception as e:
+        logging.exception(f"加载证券索引异常: {e}")
+        return SecurityIndex()
+
+
+def crawl(query: str, speculative: bool = True) -> Dict[str, str]:
     """
     Performs a crawl operation based on the given query string.
 
     Args:
         query: The search query string to use for crawling.
+        speculative: If set to True, resolves the query as a company and as an executive at the same time,
+            and continues with whichever has hits. Defaults to True.
 
     Returns:
         A dictionary containing the query, result, and URL.
@@ -390,14 +772,11 @@ def crawl(query: str) -> Dict[str, str]:
     if not query or not query.strip():
         return {"query": query, "result": "", "url": ""}
 
-    # 初始化工具
-    cn_utils = CNInfoUtils()
+    return asyncio.run(_crawl(query, speculative))
 
-    # 1. 优先查询公司信息
-    rs = asyncio.run(cn_utils.find_by_company_back_markdown(query))
-    if rs and rs.get("result") and rs.get("result").strip():
-        return rs
 
-    # 2. 查询高管的信息
-    rs = asyncio.run(cn_utils.find_by_username_back_markdown(query))
-    return rs
+async def _crawl(query: str, speculative: bool = True) -> Dict[str, str]:
+    """在同一个事件循环、同一个连接池中完成公司和高管的检索"""
+    # 初始化工具
+    async with CNInfoUtils() as cn_utils:
+        return await cn_utils.find_back_markdown(query, speculative=speculative)
@@ -0,0 +1,222 @@
+"""
+www.cninfo.com.cn 共享cookie：aiohttp 与 Playwright 共用一份，只加载一次，有更新时写回文件
+
+cookies/18664892760.txt 是提交到仓库的初始cookie，只读；运行中更新的cookie（含域名、路径、过期时间等属性）
+保存到 cookies/session_cookies.json（不提交），之后优先加载它，已经过期的cookie不再加载
+"""
+import email.utils
+import json
+import logging
+import os
+import pathlib
+import time
+from collections.abc import Mapping
+from http.cookies import Morsel, SimpleCookie
+from typing import Dict, List, Optional
+
+import aiofiles
+import aiohttp
+from yarl import URL
+
+# 脚本所在目录
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+# 初始cookie文件（只读），内容与浏览器请求头中的 Cookie 格式相同：name1=value1; name2=value2
+COOKIES_PATH = SCRIPT_ROOT.parent / "cookies" / "18664892760.txt"
+# 运行中更新的cookie，保存完整的属性：[{"name", "value", "domain", "path", "expires", "secure", "httponly"}]，
+# expires 为过期时间的时间戳，会话cookie为None
+COOKIES_STATE_PATH = SCRIPT_ROOT.parent / "cookies" / "session_cookies.json"
+# cookie作用的域名（含子域名）
+COOKIE_DOMAIN = "cninfo.com.cn"
+COOKIE_URL = URL("https://www.cninfo.com.cn/")
+
+
+def parse_cookie_string(cookies_str: str) -> List[tuple]:
+    """解析 name1=value1; name2=value2 格式的cookie"""
+    pairs = []
+    if cookies_str and cookies_str.strip():
+        for cookie in cookies_str.strip().split('; '):
+            if '=' in cookie:
+                name, value = cookie.split('=', 1)
+                pairs.append((name.strip(), value.strip()))
+    return pairs
+
+
+def morsel_expires(morsel: Morsel, now: Optional[float] = None) -> Optional[float]:
+    """cookie的过期时间戳：max-age 优先于 expires，都没有时（会话cookie）为None"""
+    now = time.time() if now is None else now
+    max_age = str(morsel["max-age"] or "").strip()
+    if max_age.lstrip("-").isdigit():
+        return float(int(now) + int(max_age))
+    if morsel["expires"]:
+        try:
+            return float(int(email.utils.parsedate_to_datetime(morsel["expires"]).timestamp()))
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+class SharedCookieJar(aiohttp.CookieJar):
+    """
+    可持久化的cookie jar
+
+    作为 aiohttp.ClientSession 的 cookie_jar 使用时，响应中的 Set-Cookie 会更新到这里；
+    Playwright 通过 to_playwright() / update_from_playwright() 读写同一份cookie
+
+    初始cookie文件 path 只读取不写入；更新后的cookie连同过期时间写到 state_path
+    """
+
+    def __init__(self, path: pathlib.Path = COOKIES_PATH, state_path: pathlib.Path = COOKIES_STATE_PATH):
+        # aiohttp.CookieJar 需要在事件循环中创建；按原样发送cookie值，与浏览器保持一致
+        super().__init__(unsafe=False, quote_cookie=False)
+        self.path = pathlib.Path(path)
+        self.state_path = pathlib.Path(state_path)
+        self.dirty = False
+        # cookie名称 => 过期时间戳（会话cookie没有）
+        self._expires: Dict[str, float] = {}
+        self.load()
+
+    def load(self):
+        """加载cookie：优先加载保存的cookie（跳过已过期的），没有时加载初始cookie文件"""
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                now = time.time()
+                self.set_cookies([e for e in entries if e.get("expires") is None or e["expires"] > now])
+                self.dirty = False
+                return
+            except Exception as e:
+                logging.warning(f"加载保存的cookie失败，改用初始cookie: {self.state_path}, {e}")
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.set_pairs(parse_cookie_string(f.read()))
+        self.dirty = False
+
+    def set_pairs(self, pairs: List[tuple]):
+        """设置 (name, value) 列表（会话cookie），作用于 cninfo.com.cn 及其子域名"""
+        self.set_cookies([{"name": name, "value": value} for name, value in pairs])
+
+    def set_cookies(self, entries: List[dict]):
+        """
+        设置cookie
+
+        Args:
+            entries: 如 [{"name": "SID", "value": "...", "expires": 1761026257.0, "secure": True}]，
+                domain 默认为 cninfo.com.cn，path 默认为 /，expires 为空时为会话cookie
+        """
+        cookie = SimpleCookie()
+        now = int(time.time())
+        for entry in entries:
+            name = entry["name"]
+            cookie[name] = entry["value"]
+            cookie[name]["domain"] = (entry.get("domain") or COOKIE_DOMAIN).lstrip(".")
+            cookie[name]["path"] = entry.get("path") or "/"
+            if entry.get("expires") is not None:
+                cookie[name]["max-age"] = str(max(0, int(entry["expires"]) - now))
+            for k in ("secure", "httponly"):
+                if entry.get(k):
+                    cookie[name][k] = True
+        if entries:
+            self.update_cookies(cookie, COOKIE_URL)
+
+    def update_cookies(self, cookies, response_url: URL = URL()) -> None:
+        if not cookies:
+            return
+        before = self.to_state()
+        if (response_url.host or "").endswith(COOKIE_DOMAIN):
+            # 服务端未指定domain的cookie也作用于整个 cninfo.com.cn，保证同名cookie只有一份
+            items = cookies.items() if isinstance(cookies, Mapping) else cookies
+            normalized = SimpleCookie()
+            for name, value in items:
+                if isinstance(value, Morsel):
+                    normalized[name] = value.value
+                    for k in ("path", "expires", "max-age", "secure", "httponly", "samesite"):
+                        if value[k]:
+                            normalized[name][k] = value[k]
+                    normalized[name]["domain"] = value["domain"] or COOKIE_DOMAIN
+                else:
+                    normalized[name] = value
+                    normalized[name]["domain"] = COOKIE_DOMAIN
+                normalized[name]["path"] = normalized[name]["path"] or "/"
+                # 记下过期时间，保存时写入文件
+                expires = morsel_expires(normalized[name])
+                if expires is None:
+                    self._expires.pop(name, None)
+                else:
+                    self._expires[name] = expires
+            cookies = normalized
+        super().update_cookies(cookies, response_url)
+        if self.to_state() != before:
+            self.dirty = True
+
+    def to_pairs(self) -> Dict[str, str]:
+        """cninfo.com.cn 下的cookie：name => value"""
+        return {m.key: m.value for m in self if m["domain"].lstrip(".").endswith(COOKIE_DOMAIN)}
+
+    def to_header_string(self) -> str:
+        """转换为 name1=value1; name2=value2 格式"""
+        return "; ".join(f"{k}={v}" for k, v in self.to_pairs().items())
+
+    def to_state(self) -> List[dict]:
+        """cninfo.com.cn 下的cookie及其属性（已过期的不包含），格式见 COOKIES_STATE_PATH"""
+        return [{
+            "name": m.key,
+            "value": m.value,
+            "domain": m["domain"].lstrip("."),
+            "path": m["path"] or "/",
+            "expires": self._expires.get(m.key),
+            "secure": bool(m["secure"]),
+            "httponly": bool(m["httponly"]),
+        } for m in self if m["domain"].lstrip(".").endswith(COOKIE_DOMAIN)]
+
+    def to_playwright(self) -> List[dict]:
+        """转换为 Playwright context.add_cookies() 的参数"""
+        cookies = []
+        for entry in self.to_state():
+            cookie = {"name": entry["name"], "value": entry["value"], "domain": "." + entry["domain"],
+                      "path": entry["path"], "secure": entry["secure"], "httpOnly": entry["httponly"]}
+            if entry["expires"] is not None:
+                cookie["expires"] = entry["expires"]
+            cookies.append(cookie)
+        return cookies
+
+    def update_from_playwright(self, cookies: List[dict]):
+        """用 Playwright context.cookies() 的结果更新（expires 为 -1 的是会话cookie）"""
+        self.set_cookies([{
+            "name": c["name"],
+            "value": c["value"],
+            "domain": c.get("domain"),
+            "path": c.get("path"),
+            "expires": c["expires"] if (c.get("expires") or -1) > 0 else None,
+            "secure": c.get("secure"),
+            "httponly": c.get("httpOnly"),
+        } for c in cookies if (c.get("domain") or "").lstrip(".").endswith(COOKIE_DOMAIN)])
+
+    async def save(self):
+        """写到 state_path（初始cookie文件不修改）"""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        async with aiofiles.open(tmp_path, "w", encoding="utf-8") as f:
+            await f.write(json.dumps(self.to_state(), ensure_ascii=False, indent=2))
+        os.replace(tmp_path, self.state_path)
+        self.dirty = False
+
+    async def save_if_dirty(self):
+        """有更新时写回文件"""
+        if self.dirty:
+            try:
+                await self.save()
+            except Exception as e:
+                logging.exception(f"保存cookie异常: {e}")
+
+
+_COOKIE_JAR: Optional[SharedCookieJar] = None
+
+
+def get_cookie_jar() -> SharedCookieJar:
+    """进程内共享的cookie jar，第一次调用时从文件加载（需要在事件循环中调用）"""
+    global _COOKIE_JAR
+    if _COOKIE_JAR is None:
+        _COOKIE_JAR = SharedCookieJar()
+    return _COOKIE_JAR
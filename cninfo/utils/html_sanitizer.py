@@ -0,0 +1,54 @@
+"""
+页面快照清理：一次扫描移除脚本、事件属性、javascript:链接、自动刷新，并禁用表单元素
+"""
+import re
+
+# 需要移除的事件处理属性
+EVENT_ATTRS = ['onclick', 'ondblclick', 'onmousedown', 'onmouseup', 'onmouseover',
+               'onmousemove', 'onmouseout', 'onkeydown', 'onkeypress', 'onkeyup',
+               'onload', 'onunload', 'onchange', 'onsubmit', 'onreset', 'onselect',
+               'onblur', 'onfocus', 'onabort', 'onerror']
+# 需要禁用的表单元素
+FORM_TAGS = ['input', 'button', 'select', 'textarea']
+
+# 所有规则合并为一个正则，按位置从左到右只扫描一遍；命中 script 时整块跳过，其中的内容不再参与其他规则
+# 开头的前瞻先按首字符过滤（各规则只可能以 < 、on、href 开头），大部分位置不必逐个尝试分支
+SANITIZE_RE = re.compile(
+    r'(?=[<oOhH])(?:'
+    r'(?P<script><script\b[^<]*(?:(?!</script>)<[^<]*)*</script>)'
+    r'|(?P<refresh><meta[^>]*http-equiv[^>]*refresh[^>]*>)'
+    r'|(?P<event>(?:' + '|'.join(EVENT_ATTRS) + r')=(?:"[^"]*"|\'[^\']*\'))'
+    r'|href=(?:(?P<js_dq>"javascript:[^"]*")|(?P<js_sq>\'javascript:[^\']*\'))'
+    r'|(?-i:<(?P<form>' + '|'.join(FORM_TAGS) + r') ))',
+    flags=re.IGNORECASE,
+)
+
+
+def _replace(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind == "form":
+        return f"<{match.group('form')} disabled "
+    if kind == "js_dq":
+        return 'href="#"'
+    if kind == "js_sq":
+        return "href='#'"
+    # script、refresh、event 直接移除
+    return ""
+
+
+def sanitize_html(html: str) -> str:
+    """
+    清理页面快照，使保存的html可以离线安全打开
+
+    - 移除所有 <script> 标签
+    - 移除事件处理属性（onclick、onload等）
+    - href中的 javascript: 链接替换为 #
+    - 禁用 input、button、select、textarea
+    - 移除 <meta http-equiv="refresh"> 自动刷新
+
+    Args:
+        html: 页面html
+
+    Returns: 清理后的html
+    """
+    return SANITIZE_RE.sub(_replace, html)
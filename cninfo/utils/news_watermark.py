@@ -0,0 +1,79 @@
+"""
+公司公告的增量同步水位：记录每只股票已同步到的最新公告
+"""
+import json
+import logging
+import os
+import pathlib
+from typing import Dict, List
+
+# 脚本所在目录
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+# 水位文件
+NEWS_WATERMARK_PATH = SCRIPT_ROOT.parent / "data" / "news_watermarks.json"
+
+
+class NewsWatermarkStore:
+    """
+    公告同步水位
+
+    每只股票记录最新公告的时间 announcementTime，以及该时间点上已同步的 announcementId
+    （同一天的公告时间往往相同，只靠时间无法区分）
+    """
+
+    def __init__(self, path: pathlib.Path = NEWS_WATERMARK_PATH):
+        self.path = pathlib.Path(path)
+        self._marks: Dict[str, dict] = {}
+        self.load()
+
+    def load(self):
+        """加载水位文件，不存在时为空"""
+        if not self.path.exists():
+            self._marks = {}
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._marks = json.loads(f.read())
+        except Exception as e:
+            logging.exception(f"加载公告水位异常: {e}")
+            self._marks = {}
+
+    def save(self):
+        """保存水位文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._marks, ensure_ascii=False))
+        os.replace(tmp_path, self.path)
+
+    def get(self, s_code: str) -> dict:
+        """获取水位，如 {"announcementTime": 1729699200000, "announcementIds": ["1221541234"]}"""
+        return self._marks.get(s_code, {})
+
+    def is_seen(self, s_code: str, announcement: dict) -> bool:
+        """公告是否已经同步过"""
+        mark = self.get(s_code)
+        if not mark:
+            return False
+        ann_time = announcement.get("announcementTime") or 0
+        if ann_time != mark["announcementTime"]:
+            return ann_time < mark["announcementTime"]
+        return str(announcement.get("announcementId")) in mark["announcementIds"]
+
+    def is_older(self, s_code: str, announcement: dict) -> bool:
+        """公告是否早于水位时间，公告按时间倒序返回，遇到时可以停止翻页"""
+        mark = self.get(s_code)
+        return bool(mark) and (announcement.get("announcementTime") or 0) < mark["announcementTime"]
+
+    def advance(self, s_code: str, announcements: List[dict]):
+        """用新同步的公告推进水位"""
+        if not announcements:
+            return
+        mark = self.get(s_code)
+        latest = max(a.get("announcementTime") or 0 for a in announcements)
+        ids = {str(a.get("announcementId")) for a in announcements if (a.get("announcementTime") or 0) == latest}
+        if mark and mark["announcementTime"] > latest:
+            return
+        if mark and mark["announcementTime"] == latest:
+            ids |= set(mark["announcementIds"])
+        self._marks[s_code] = {"announcementTime": latest, "announcementIds": sorted(ids)}
@@ -0,0 +1,90 @@
+"""
+页面解析执行器：BeautifulSoup等CPU密集的解析放到线程池或进程池中执行，不阻塞事件循环
+
+- inline: 在当前线程直接执行（与原来的行为相同）
+- thread: 线程池，解析期间其他请求可以继续收发数据
+- process: 进程池，批量解析大量页面时可以用满所有CPU核心（解析函数和参数需要可以被pickle）
+
+cninfo、csb、jobsalary 的 utils 中各有一份相同的副本（各项目单独运行），修改时同步修改，见 cninfo/test_shared_utils.py
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+PARSE_MODES = ("inline", "thread", "process")
+# 默认的执行方式
+DEFAULT_PARSE_MODE = "thread"
+# 线程池/进程池的大小，为空时使用CPU核心数
+DEFAULT_PARSE_WORKERS = None
+
+
+class ParseExecutor:
+    """
+    解析执行器
+
+    用法::
+
+        results = await get_parse_executor().run(extract_salary_data, html)
+    """
+
+    def __init__(self, mode: str = DEFAULT_PARSE_MODE, max_workers: Optional[int] = DEFAULT_PARSE_WORKERS):
+        if mode not in PARSE_MODES:
+            raise ValueError(f"不支持的解析方式: {mode}，可选: {PARSE_MODES}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="parse")
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """执行解析函数"""
+        if self.mode == "inline":
+            return func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池/进程池，之后调用 run 会重新创建"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_DEFAULT_EXECUTOR: Optional[ParseExecutor] = None
+
+
+def get_parse_executor() -> ParseExecutor:
+    """进程内共享的解析执行器，默认使用线程池"""
+    global _DEFAULT_EXECUTOR
+    if _DEFAULT_EXECUTOR is None:
+        _DEFAULT_EXECUTOR = ParseExecutor()
+    return _DEFAULT_EXECUTOR
+
+
+def set_parse_executor(mode: str = DEFAULT_PARSE_MODE,
+                       max_workers: Optional[int] = DEFAULT_PARSE_WORKERS) -> ParseExecutor:
+    """
+    设置进程内共享的解析执行器
+
+    Args:
+        mode: inline / thread / process
+        max_workers: 线程池/进程池的大小，为空时使用CPU核心数
+
+    Returns: 新的解析执行器
+    """
+    global _DEFAULT_EXECUTOR
+    executor = ParseExecutor(mode, max_workers)
+    if _DEFAULT_EXECUTOR is not None:
+        _DEFAULT_EXECUTOR.shutdown(wait=False)
+    _DEFAULT_EXECUTOR = executor
+    return executor
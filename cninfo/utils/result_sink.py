@@ -0,0 +1,251 @@
+"""
+结果写入：所有公司的记录追加到同一个存储（JSONL、CSV、SQLite），批量写入，不阻塞事件循环
+"""
+import abc
+import asyncio
+import csv
+import io
+import json
+import logging
+import pathlib
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+import aiofiles
+
+# 缓冲多少条记录后写入
+SINK_BATCH_SIZE = 200
+# 缓冲中有记录时，最多间隔多久写入一次（秒）
+SINK_FLUSH_INTERVAL = 2.0
+
+
+class ResultSink(abc.ABC):
+    """
+    结果写入基类
+
+    用法::
+
+        async with JsonlSink("results/executives.jsonl") as sink:
+            await sink.write_many(records)
+
+    write() 只把记录放入缓冲，缓冲达到 batch_size 条或距上次写入超过 flush_interval 秒时批量写入；
+    关闭时写入剩余记录。子类实现 _open / _write_batch / _close
+    """
+
+    def __init__(self, path, batch_size: int = SINK_BATCH_SIZE, flush_interval: float = SINK_FLUSH_INTERVAL):
+        self.path = pathlib.Path(path)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._buffer: List[dict] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._opened = False
+
+    async def __aenter__(self) -> "ResultSink":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self):
+        """打开存储，并启动定时写入"""
+        if self._opened:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = asyncio.Lock()
+        await self._open()
+        self._opened = True
+        if self.flush_interval and self.flush_interval > 0:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def write(self, record: dict):
+        """写入一条记录"""
+        await self.write_many([record])
+
+    async def write_many(self, records: Iterable[dict]):
+        """写入多条记录"""
+        if not self._opened:
+            await self.open()
+        self._buffer.extend(records)
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """写入缓冲中的所有记录"""
+        if not self._opened:
+            return
+        async with self._lock:
+            if not self._buffer:
+                return
+            records, self._buffer = self._buffer, []
+            await self._write_batch(records)
+            self.written += len(records)
+
+    async def close(self):
+        """写入剩余记录并关闭存储"""
+        if not self._opened:
+            return
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        try:
+            await self.flush()
+        finally:
+            await self._close()
+            self._opened = False
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.exception(f"写入结果异常: {self.path}, {e}")
+
+    @abc.abstractmethod
+    async def _open(self):
+        """打开存储"""
+
+    @abc.abstractmethod
+    async def _write_batch(self, records: List[dict]):
+        """写入一批记录"""
+
+    @abc.abstractmethod
+    async def _close(self):
+        """关闭存储"""
+
+
+class JsonlSink(ResultSink):
+    """每条记录一行json，mode 为 "a" 时追加，为 "w" 时覆盖原文件"""
+
+    def __init__(self, path, mode: str = "a", **kwargs):
+        super().__init__(path, **kwargs)
+        self.mode = mode
+        self._f = None
+
+    async def _open(self):
+        self._f = await aiofiles.open(self.path, self.mode, encoding="utf-8")
+
+    async def _write_batch(self, records: List[dict]):
+        await self._f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        await self._f.flush()
+
+    async def _close(self):
+        await self._f.close()
+        self._f = None
+
+
+class CsvSink(ResultSink):
+    """
+    CSV，fieldnames 为空时使用第一条记录的字段；mode 为 "a" 时追加（文件为空时先写表头），
+    为 "w" 时覆盖原文件
+
+    每批记录先在内存中格式化，再一次性异步写入
+    """
+
+    def __init__(self, path, fieldnames: Optional[List[str]] = None, mode: str = "a", **kwargs):
+        super().__init__(path, **kwargs)
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.mode = mode
+        self._f = None
+        self._need_header = True
+
+    async def _open(self):
+        self._need_header = self.mode == "w" or not self.path.exists() or self.path.stat().st_size == 0
+        self._f = await aiofiles.open(self.path, self.mode, encoding="utf-8", newline="")
+
+    async def _write_batch(self, records: List[dict]):
+        if self.fieldnames is None:
+            self.fieldnames = list(records[0].keys())
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=self.fieldnames, extrasaction="ignore")
+        if self._need_header:
+            writer.writeheader()
+            self._need_header = False
+        writer.writerows(records)
+        await self._f.write(buf.getvalue())
+        await self._f.flush()
+
+    async def _close(self):
+        await self._f.close()
+        self._f = None
+
+
+class SqliteSink(ResultSink):
+    """
+    SQLite，表不存在时按 fieldnames（为空时使用第一条记录的字段）建表，所有列为 TEXT
+
+    sqlite3 是阻塞接口，建表、插入、提交都在线程中执行
+    """
+
+    def __init__(self, path, table: str = "results", fieldnames: Optional[List[str]] = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.table = table
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._insert_sql: Optional[str] = None
+
+    async def _open(self):
+        # 连接只在 flush 的锁内、一次一个线程地使用
+        self._conn = await asyncio.to_thread(sqlite3.connect, str(self.path), check_same_thread=False)
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def _prepare(self, records: List[dict]):
+        if self.fieldnames is None:
+            self.fieldnames = list(records[0].keys())
+        columns = ", ".join(f"{self._quote(c)} TEXT" for c in self.fieldnames)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self._quote(self.table)} ({columns})")
+        self._insert_sql = (f"INSERT INTO {self._quote(self.table)} "
+                            f"({', '.join(self._quote(c) for c in self.fieldnames)}) "
+                            f"VALUES ({', '.join('?' for _ in self.fieldnames)})")
+
+    def _insert(self, records: List[dict]):
+        if self._insert_sql is None:
+            self._prepare(records)
+        rows = [tuple(None if r.get(c) is None else str(r.get(c)) for c in self.fieldnames) for r in records]
+        with self._conn:
+            self._conn.executemany(self._insert_sql, rows)
+
+    async def _write_batch(self, records: List[dict]):
+        await asyncio.to_thread(self._insert, records)
+
+    async def _close(self):
+        await asyncio.to_thread(self._conn.close)
+        self._conn = None
+
+
+# 文件后缀 => 写入类
+SINK_TYPES: Dict[str, type] = {
+    ".jsonl": JsonlSink,
+    ".csv": CsvSink,
+    ".db": SqliteSink,
+    ".sqlite": SqliteSink,
+}
+
+
+def open_sink(path, **kwargs) -> ResultSink:
+    """
+    按文件后缀创建结果写入
+
+    Args:
+        path: 文件路径，后缀为 .jsonl / .csv / .db / .sqlite
+        kwargs: 传给对应写入类的参数，如 batch_size、flush_interval、fieldnames
+
+    Returns: 未打开的 ResultSink，需要 async with 或 await sink.open()
+    """
+    suffix = pathlib.Path(path).suffix.lower()
+    if suffix not in SINK_TYPES:
+        raise ValueError(f"不支持的结果格式: {suffix}")
+    sink_type = SINK_TYPES[suffix]
+    if sink_type is JsonlSink:
+        kwargs.pop("fieldnames", None)
+    return sink_type(path, **kwargs)
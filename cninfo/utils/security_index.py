@@ -0,0 +1,291 @@
+"""
+www.cninfo.com.cn 证券的本地索引：关键字 => code/orgId/zwjc，避免每次检索都请求 topSearch/detailOfQuery
+
+索引只包含构建时解析过的代码（默认为 data/stock_codes.txt 中的代码）以及检索时从网络查到的证券，不是完整的证券目录
+"""
+import asyncio
+import bisect
+import json
+import logging
+import os
+import pathlib
+import re
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+# 脚本所在目录
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+# 索引文件
+SECURITY_INDEX_PATH = SCRIPT_ROOT.parent / "data" / "security_index.json"
+# 索引文件格式版本（2: 同一个代码可以有多条记录，按 代码+orgId 区分）
+SECURITY_INDEX_VERSION = 2
+# 每条记录保存的字段（按列顺序存储，文件更紧凑）
+SECURITY_FIELDS = ["code", "orgId", "zwjc", "name", "pinyin", "category", "formerNames"]
+# 构建索引时的并发数
+BUILD_CONCURRENCY = 4
+# 曾用简称的分隔符，如 "深发展Ａ->平安银行"
+FORMER_NAME_SPLIT_RE = re.compile(r"->|→|[>,，、;；]")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_key(text: str) -> str:
+    """统一全角/半角、去掉空白、忽略大小写，如 '万  科Ａ' => '万科a'"""
+    if not text:
+        return ""
+    return WHITESPACE_RE.sub("", unicodedata.normalize("NFKC", str(text))).casefold()
+
+
+def split_former_names(text: str) -> List[str]:
+    """拆分曾用简称"""
+    if not text or text in ("null", "None", "--"):
+        return []
+    return [n.strip() for n in FORMER_NAME_SPLIT_RE.split(text) if n.strip()]
+
+
+def parse_key_board_list(rs: str) -> List[dict]:
+    """解析 topSearch/detailOfQuery 的返回内容，得到证券列表"""
+    if not rs:
+        return []
+    try:
+        dic = json.loads(rs)
+    except ValueError:
+        return []
+    key_board_list = dic.get("keyBoardList") if type(dic) == dict else None
+    if not key_board_list or type(key_board_list) != list:
+        return []
+    return [row for row in key_board_list if type(row) == dict and row.get("code")]
+
+
+def security_key(code: str, record: dict) -> str:
+    """
+    记录的唯一键：代码+orgId（没有orgId时用类别），如 '000001|gssz0000001'
+
+    同一个代码可能对应不同的证券，如 000001 既是平安银行也是上证指数，只按代码合并会互相覆盖
+    """
+    return f"{code}|{record.get('orgId') or record.get('category') or ''}"
+
+
+class SecurityIndex:
+    """
+    证券索引
+
+    支持：代码精确查找、公司简称/全称查找、拼音简称查找、曾用简称（F002V）查找、前缀匹配
+    """
+
+    def __init__(self, records: Optional[Iterable[dict]] = None, built_at: float = 0):
+        self.built_at = built_at
+        self.records: List[dict] = []
+        # 代码+orgId => 记录下标
+        self._by_key: Dict[str, int] = {}
+        # 代码 => 记录下标（按添加顺序）
+        self._by_code: Dict[str, List[int]] = {}
+        # 名称（简称、全称、拼音） => 记录下标
+        self._by_name: Dict[str, int] = {}
+        # 曾用简称 => 记录下标
+        self._by_former: Dict[str, int] = {}
+        # 前缀匹配用的有序键，按需生成
+        self._sorted_keys: Optional[List[str]] = None
+        for record in records or []:
+            self.add(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _find(self, code: str, record: dict) -> Optional[int]:
+        if record.get("orgId") or record.get("category"):
+            return self._by_key.get(security_key(code, record))
+        # 没有orgId和类别（如只有公司简介的补充信息）：合并到该代码的第一条记录
+        ids = self._by_code.get(code)
+        return ids[0] if ids else None
+
+    def add(self, record: dict):
+        """添加或更新一条证券记录（按 代码+orgId 合并，没有orgId和类别时合并到该代码的第一条记录）"""
+        code = str(record.get("code") or "").strip()
+        if not code:
+            return
+        i = self._find(code, record)
+        record = {k: record.get(k) or ([] if k == "formerNames" else "") for k in SECURITY_FIELDS}
+        record["code"] = code
+        if i is None:
+            i = len(self.records)
+            self.records.append(record)
+            self._by_key[security_key(code, record)] = i
+            self._by_code.setdefault(code, []).append(i)
+        else:
+            # 合并：新值为空时保留旧值
+            old = self.records[i]
+            for k in SECURITY_FIELDS:
+                if not record[k]:
+                    record[k] = old[k]
+            self.records[i] = record
+        for k in ("zwjc", "name", "pinyin"):
+            key = normalize_key(record[k])
+            if key:
+                self._by_name.setdefault(key, i)
+        for former in record["formerNames"]:
+            key = normalize_key(former)
+            if key:
+                self._by_former.setdefault(key, i)
+        self._sorted_keys = None
+
+    def get(self, code: str, org_id: Optional[str] = None) -> Optional[dict]:
+        """按代码精确查找，同一个代码有多条记录时返回最先添加的一条，可以用orgId指定"""
+        code = str(code).strip()
+        if org_id:
+            i = self._by_key.get(security_key(code, {"orgId": org_id}))
+            return self.records[i] if i is not None else None
+        ids = self._by_code.get(code)
+        return self.records[ids[0]] if ids else None
+
+    def lookup(self, keyword: str) -> Optional[dict]:
+        """
+        关键字解析为证券记录：代码 => 简称/全称/拼音 => 曾用简称 => 唯一的前缀匹配
+
+        Args:
+            keyword: 公司名称、公司代码、公司简称、曾用简称等
+
+        Returns: 找不到或前缀匹配不唯一时返回None
+        """
+        record = self.get(keyword)
+        if record:
+            return record
+        key = normalize_key(keyword)
+        if not key:
+            return None
+        i = self._by_name.get(key)
+        if i is None:
+            i = self._by_former.get(key)
+        if i is not None:
+            return self.records[i]
+        matches = self.search_prefix(keyword, limit=2)
+        return matches[0] if len(matches) == 1 else None
+
+    def search_prefix(self, prefix: str, limit: int = 10) -> List[dict]:
+        """前缀匹配代码、简称、全称、拼音、曾用简称，按键的字典序返回不重复的记录"""
+        key = normalize_key(prefix)
+        if not key:
+            return []
+        if self._sorted_keys is None:
+            keys = set(self._by_name) | set(self._by_former) | set(self._by_code)
+            self._sorted_keys = sorted(keys)
+        results = []
+        seen = set()
+        pos = bisect.bisect_left(self._sorted_keys, key)
+        while pos < len(self._sorted_keys) and len(results) < limit:
+            k = self._sorted_keys[pos]
+            if not k.startswith(key):
+                break
+            ids = list(self._by_code.get(k, []))
+            for i in (self._by_name.get(k), self._by_former.get(k)):
+                if i is not None:
+                    ids.append(i)
+            for i in ids:
+                if i not in seen and len(results) < limit:
+                    seen.add(i)
+                    results.append(self.records[i])
+            pos += 1
+        return results
+
+    def save(self, path: pathlib.Path = SECURITY_INDEX_PATH):
+        """按列顺序保存为紧凑的json"""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        dic = {
+            "version": SECURITY_INDEX_VERSION,
+            "built_at": self.built_at,
+            "fields": SECURITY_FIELDS,
+            "rows": [[r[k] for k in SECURITY_FIELDS] for r in self.records],
+            # 预先归一化好的查找键，加载时直接使用，不必逐条重新计算
+            "names": self._by_name,
+            "formers": self._by_former,
+        }
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(dic, ensure_ascii=False, separators=(",", ":")))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: pathlib.Path = SECURITY_INDEX_PATH) -> "SecurityIndex":
+        """加载索引，文件不存在或格式不对时返回空索引"""
+        path = pathlib.Path(path)
+        if not path.exists():
+            return cls()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                dic = json.loads(f.read())
+            if dic.get("version") != SECURITY_INDEX_VERSION:
+                logging.warning(f"证券索引版本不匹配，忽略: {path}")
+                return cls()
+            fields = dic["fields"]
+            index = cls(built_at=dic.get("built_at", 0))
+            index.records = [dict(zip(fields, row)) for row in dic["rows"]]
+            for i, r in enumerate(index.records):
+                index._by_key[security_key(r["code"], r)] = i
+                index._by_code.setdefault(r["code"], []).append(i)
+            index._by_name = dic["names"]
+            index._by_former = dic["formers"]
+            return index
+        except Exception as e:
+            logging.exception(f"加载证券索引异常: {e}")
+            return cls()
+
+
+_DEFAULT_INDEX: Optional[SecurityIndex] = None
+_DEFAULT_INDEX_MTIME = None
+
+
+def get_security_index(path: pathlib.Path = SECURITY_INDEX_PATH) -> SecurityIndex:
+    """进程内共享的默认索引，文件有更新时重新加载"""
+    global _DEFAULT_INDEX, _DEFAULT_INDEX_MTIME
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if _DEFAULT_INDEX is None or mtime != _DEFAULT_INDEX_MTIME:
+        _DEFAULT_INDEX = SecurityIndex.load(path)
+        _DEFAULT_INDEX_MTIME = mtime
+    return _DEFAULT_INDEX
+
+
+async def build_security_index(cn_utils, codes: List[str], with_profile: bool = True,
+                               concurrency: int = BUILD_CONCURRENCY,
+                               base: Optional[SecurityIndex] = None) -> SecurityIndex:
+    """
+    通过 topSearch/detailOfQuery 逐个解析股票代码，构建证券索引
+
+    Args:
+        cn_utils: CNInfoUtils 实例
+        codes: 股票代码列表，索引中只保存这些代码的证券
+        with_profile: 是否同时查询公司简介，补充公司全称和曾用简称（F002V）
+        concurrency: 并发数
+        base: 在已有索引的基础上更新
+
+    Returns: 新的索引
+    """
+    index = SecurityIndex(base.records if base else None)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(code: str):
+        async with semaphore:
+            rows = parse_key_board_list(await cn_utils.find_by_company(code))
+            # topSearch 是模糊检索，只保存代码完全相同的证券
+            for row in rows:
+                if str(row.get("code")).strip() == code:
+                    index.add(row)
+            if not with_profile or not index.get(code):
+                return
+            result = await cn_utils.get_company_profile(code)
+            records = (result or {}).get("data", {}).get("records")
+            basic_info = records[0].get("basicInformation") if records else None
+            if basic_info:
+                index.add({
+                    "code": code,
+                    "orgId": index.get(code)["orgId"],
+                    "name": basic_info[0].get("ORGNAME"),
+                    "formerNames": split_former_names(basic_info[0].get("F002V")),
+                })
+
+    await asyncio.gather(*[resolve(code) for code in codes])
+    index.built_at = time.time()
+    return index
@@ -0,0 +1,86 @@
+"""
+薪资表页面解析的性能对比：原来的整页 html.parser 解析 vs 只解析 #mainContent
+
+运行: python bench_csb_parse.py [薪资表html文件 ...]
+不传文件时使用按 csb.gov.hk 页面结构生成的示例页面（导航、页脚 + 50行薪资表）
+"""
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+from utils.csb_utils import HTML_PARSER, CsbUtils, clean_text_enhanced
+
+
+def extract_salary_data_legacy(html_content: str):
+    """原 CsbUtils.extract_salary_data 的解析逻辑"""
+    soup = BeautifulSoup(html_content, "html.parser")
+    main_content = soup.find(id="mainContent")
+    if not main_content:
+        return {}
+    title = clean_text_enhanced(main_content.find("h1").get_text().strip())
+    table = main_content.find("table")
+    data_list = []
+    headers = []
+    header_rows = table.find_all("tr")[:2]
+    for row in header_rows:
+        th_elements = row.find_all("th")
+        for th in th_elements:
+            header_text = th.get_text().strip()
+            header_text = clean_text_enhanced(header_text)
+            if header_text and header_text not in headers:
+                headers.append(header_text)
+
+    data_rows = table.find_all("tr")[2:]
+    m0 = headers[0]
+    m1 = headers[1]
+    m2 = headers[2]
+    for row in data_rows:
+        cells = row.find_all(["td", "th"])
+        if len(cells) >= 3:
+            data_list.append({
+                m0: clean_text_enhanced(cells[0].get_text().strip()),
+                m1: clean_text_enhanced(cells[1].get_text().strip()),
+                m2: clean_text_enhanced(cells[2].get_text().strip()),
+            })
+    return {"title": title, "headers": headers, "data": data_list, "keys": [m0, m1, m2]}
+
+
+def sample_page(rows: int = 50, nav_links: int = 400) -> str:
+    """生成与薪资表页面结构相同的示例页面"""
+    nav = "".join(f'<li><a href="/english/nav/{i}.html" title="Menu {i}">Menu item {i}</a></li>'
+                  for i in range(nav_links))
+    body = "".join(f"<tr><td>{p}</td><td>{14280 + p * 2700:,}</td><td>{14280 + p * 2700:,}</td></tr>"
+                   for p in range(rows - 1, -1, -1))
+    return f"""<!DOCTYPE html><html lang="en"><head><title>Master Pay Scale</title>
+<script src="/js/jquery.js"></script><script>var a = 1;</script>
+<link rel="stylesheet" href="/css/main.css"></head><body>
+<div id="header"><ul class="nav">{nav}</ul></div>
+<div id="mainContent"><h1>Master&nbsp;Pay Scale</h1>
+<table><tr><th rowspan="2">Point</th><th>as at 31.3.2025</th><th>w.e.f. 1.4.2025</th></tr>
+<tr><th colspan="2">$</th></tr>{body}</table></div>
+<div id="footer"><ul>{nav}</ul><p>2025 &copy; Civil Service Bureau</p></div>
+</body></html>"""
+
+
+def main():
+    pages = []
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((path, f.read()))
+    if not pages:
+        pages.append(("示例页面", sample_page()))
+
+    print(f"解析器: {HTML_PARSER}")
+    for name, html in pages:
+        same = CsbUtils.extract_salary_data(html) == extract_salary_data_legacy(html)
+        print(f"页面: {name}, 大小: {len(html) / 1024:.1f}KB, 结果一致: {same}")
+        for label, func in [("legacy", extract_salary_data_legacy),
+                            ("extract_salary_data", CsbUtils.extract_salary_data)]:
+            number = 10
+            best = min(timeit.repeat(lambda: func(html), number=number, repeat=5)) / number
+            print(f"{label:>20}: {best * 1000:.2f}ms/次")
+
+
+if __name__ == "__main__":
+    main()
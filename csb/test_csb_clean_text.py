@@ -0,0 +1,60 @@
+"""
+clean_text_enhanced / clean_texts 与原实现的结果逐字节一致
+
+运行: python -m pytest test_csb_clean_text.py 或 python test_csb_clean_text.py
+"""
+import random
+import re
+import unicodedata
+
+from utils.csb_utils import CLEAN_TEXT_SEP, clean_text_enhanced, clean_texts
+
+
+def clean_text_legacy(text):
+    """原 clean_text_enhanced 的实现"""
+    text = unicodedata.normalize('NFKC', text)
+    text = text.replace('\xa0', ' ')
+    text = text.replace('\u200b', '')
+    text = text.replace('\u200e', '')
+    text = text.replace('\u200f', '')
+    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+# 薪资表中常见的文本，以及各种空白、控制字符、全角字符、组合字符
+CORPUS = [
+    "", " ", "Point", "as at 31.3.2025", "w.e.f.\xa01.4.2025", "147,125", "46 (44B)", "$",
+    "Master\xa0Pay Scale", "  Training\u200b Pay\u200e Scale\u200f ", "a\tb\nc\r\nd\x0be\x0cf",
+    "\x00\x01\x1f\x7f\x80\x85\x9f", "x\u3000y", "\uff21\uff22\uff23\uff11\uff12\uff13", "\ufb01 ligature",
+    "\u2460\u2461\u2462", "e\u0301", "\uac01", "\u1100\u1161", "line\u2028sep\u2029para", "\u00a0\u00a0",
+    "中文\u3000全角空格", "\u00bc \u00bd", "\u2122 \u2103",
+    "\ufeffBOM", "tab\t\tbetween", " \x85 ", "\u202fnarrow", "\u2007figure\u2009thin", "\U0001d400",
+]
+WEIRD_CHARS = "\xa0\u200b\u200e\u200f\t\n\r\x00\x1f\x7f\x85\x9f\u3000\u2028\u0301\uff21\ufb01\u2460\uac01 " + CLEAN_TEXT_SEP
+
+
+def random_corpus(n: int = 2000, seed: int = 20251017) -> list:
+    rng = random.Random(seed)
+    alphabet = "abcXYZ019.,$() " + WEIRD_CHARS
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24))) for _ in range(n)]
+
+
+def test_clean_text_enhanced_matches_legacy():
+    for text in CORPUS + random_corpus():
+        assert clean_text_enhanced(text) == clean_text_legacy(text), repr(text)
+
+
+def test_clean_texts_matches_legacy():
+    corpus = CORPUS + random_corpus()
+    assert clean_texts(corpus) == [clean_text_legacy(t) for t in corpus]
+    for i in range(0, len(corpus), 3):
+        row = corpus[i:i + 3]
+        assert clean_texts(row) == [clean_text_legacy(t) for t in row], repr(row)
+    assert clean_texts([]) == []
+
+
+if __name__ == "__main__":
+    test_clean_text_enhanced_matches_legacy()
+    test_clean_texts_matches_legacy()
+    print("ok")
@@ -3,13 +3,22 @@
 """
 import json
 
-from utils.csb_utils import jobs, crawl
+from utils.csb_utils import jobs, crawl, salary_engine, salary_snapshot
 
 # # 加载工作岗位信息
 # # is_update默认为False,如果设置为True则进行数据更新（数据来源为对应网站的数据）
 # jobs_menu = jobs(is_update=True)
 # print(jobs_menu)
 
+# # 下载所有岗位的薪酬表保存为本地快照（只重新解析有变化的页面），之后 crawl 直接使用快照
+# snapshot = salary_snapshot(is_update=True)
+# print(f"快照版本: {snapshot.version}, 薪酬表数量: {len(snapshot)}")
+
+# # 跨薪酬表分析：最新生效日期下月薪在 50,000 ~ 60,000 之间的所有薪点、两个生效日期之间的调整
+# engine = salary_engine()
+# print(engine.between(50000, 60000))
+# print(engine.deltas(engine.dates[0], engine.latest_date))
+
 # 查询查询工作岗位的薪水
 # rs = crawl("Master")
 rs = crawl("Training")
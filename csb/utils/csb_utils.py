@@ -7,11 +7,16 @@ import logging
 import pathlib
 import re
 import unicodedata
-from typing import Dict
+from typing import Dict, List, Optional
 
 import aiohttp
 from aiohttp import ClientTimeout
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .jobs_index import JOBS_MENU_PATH, get_jobs_index
+from .parse_executor import get_parse_executor
+from .salary_engine import SalaryEngine, get_salary_engine
+from .salary_snapshot import SALARY_SNAPSHOT_PATH, SalarySnapshot, get_salary_snapshot, refresh_salary_snapshot
 
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 COMMON_HEADERS = {
@@ -20,24 +25,63 @@ COMMON_HEADERS = {
 }
 SCRIPT_ROOT = pathlib.Path(__file__).parent
 TIMEOUT = ClientTimeout(total=300)
+# 页面中只有 #mainContent 有用，解析时只构建这部分
+MAIN_CONTENT = SoupStrainer(id="mainContent")
+
+
+def _html_parser() -> str:
+    """优先使用lxml解析（更快），未安装时使用内置的html.parser"""
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+HTML_PARSER = _html_parser()
+
+
+def parse_main_content(html_content: str):
+    """只解析页面的 #mainContent，找不到时返回None"""
+    soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=MAIN_CONTENT)
+    return soup.find(id="mainContent")
+
+
+# 文本清理：&nbsp; 替换为空格，移除零宽度空格、左到右/右到左标记和控制字符
+CLEAN_TEXT_TABLE = {0xa0: " ", 0x200b: None, 0x200e: None, 0x200f: None}
+CLEAN_TEXT_TABLE.update(dict.fromkeys(range(0x00, 0x20)))
+CLEAN_TEXT_TABLE.update(dict.fromkeys(range(0x7f, 0xa0)))
+WHITESPACE_RE = re.compile(r'\s+')
+# 批量清理时用来拼接文本的分隔符（私有区字符，NFKC不会改变它，也不是空白或控制字符）
+CLEAN_TEXT_SEP = "\ue000"
 
 
 def clean_text_enhanced(text):
     """增强版文本清理"""
-    # 标准化Unicode字符
-    text = unicodedata.normalize('NFKC', text)
+    # 标准化Unicode字符，纯ASCII文本标准化后不变，直接跳过
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text)
+    # 替换/移除特殊空白字符和控制字符
+    text = text.translate(CLEAN_TEXT_TABLE)
+    # 合并多个空格
+    return WHITESPACE_RE.sub(' ', text).strip()
 
-    # 替换各种空白字符
-    text = text.replace('\xa0', ' ')  # &nbsp;
-    text = text.replace('\u200b', '')  # 零宽度空格
-    text = text.replace('\u200e', '')  # 左到右标记
-    text = text.replace('\u200f', '')  # 右到左标记
 
-    # 使用正则表达式清理
-    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)  # 移除控制字符
-    text = re.sub(r'\s+', ' ', text)  # 合并多个空格
+def clean_texts(texts) -> List[str]:
+    """
+    批量清理文本（如表格的一行或一列），结果与逐个调用 clean_text_enhanced 相同
 
-    return text.strip()
+    所有文本拼接后只做一次标准化、替换和正则处理
+    """
+    texts = list(texts)
+    joined = CLEAN_TEXT_SEP.join(texts)
+    if len(texts) < 2 or joined.count(CLEAN_TEXT_SEP) != len(texts) - 1:
+        # 文本中本身含有分隔符时逐个处理
+        return [clean_text_enhanced(t) for t in texts]
+    if not joined.isascii():
+        joined = unicodedata.normalize('NFKC', joined)
+    joined = WHITESPACE_RE.sub(' ', joined.translate(CLEAN_TEXT_TABLE))
+    return [t.strip() for t in joined.split(CLEAN_TEXT_SEP)]
 
 
 class CsbUtils:
@@ -68,17 +112,20 @@ class CsbUtils:
 
     async def extract_jobs_data(self, html_content: str) -> dict:
         """
-        解析出岗位信息
+        解析出岗位信息（通过解析执行器，不阻塞事件循环）
         Args:
             html_content:
 
         Returns:
 
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        return await get_parse_executor().run(self.parse_jobs_data, html_content, self.base_url)
 
-        # 定位到目标内容
-        main_content = soup.find(id="mainContent")
+    @staticmethod
+    def parse_jobs_data(html_content: str, base_url: str) -> dict:
+        """解析出岗位信息"""
+        # 只解析目标内容
+        main_content = parse_main_content(html_content)
         if not main_content:
             return {}
         # 提取标题
@@ -92,13 +139,13 @@ class CsbUtils:
                 title = clean_text_enhanced(link.get_text().strip())
                 href = link['href'] if not link['href'].startswith('http') else link['href']
                 path = pathlib.Path("/") / href
-                url1 = self.base_url + "/" + str(path.resolve().relative_to('/'))
+                url1 = base_url + "/" + str(path.resolve().relative_to('/'))
                 pay_scales.append({"title": title, "url": url1})
 
             # 输出结果
             result = {
                 "page_title": page_title,
-                "base_url": self.base_url,
+                "base_url": base_url,
                 "pay_scales": pay_scales
             }
         else:
@@ -122,8 +169,22 @@ class CsbUtils:
 
         # 查询岗位薪水的信息
         rs = await self.find_job_salary(job_url)
+        return self.salary_back_markdown(job_name, job_url, rs)
+
+    @staticmethod
+    def salary_back_markdown(job_name: str, job_url: str, rs: dict) -> Dict[str, str]:
+        """
+        薪资数据转换为markdown
+
+        Args:
+            job_name: 岗位名称
+            job_url: 薪资岗位的url
+            rs: extract_salary_data 的结果
+
+        Returns: markdown格式，没有数据时result为空
+        """
         url = f"{job_url}"
-        if not rs and type(rs) != dict:
+        if not rs:
             return {"query": job_name, "result": "", "url": url}
         headers = rs["headers"]
         keys = rs["keys"]
@@ -155,64 +216,73 @@ Data:
 
         Returns: markdown格式，如果找不到记录返回空
 
+        """
+        html = await self.fetch_salary_page(url)
+        if not html:
+            return {}
+        return await get_parse_executor().run(self.extract_salary_data, html)
+
+    async def fetch_salary_page(self, url: str, session: Optional[aiohttp.ClientSession] = None) -> str:
+        """
+        获取岗位薪水页面的html
+
+        Args:
+            url: 岗位薪水的url
+            session: 复用的 ClientSession，为空时临时创建
+
+        Returns: 页面html，失败返回空
         """
         # 定义请求头
         headers = COMMON_HEADERS.copy()
         headers["Referer"] = self.base_url_query
 
         try:
-            async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        results = self.extract_salary_data(html)
-                        return results
-                    else:
-                        logging.error(f"请求失败，状态码: {response.status}")
-                        return {}
+            if session is None:
+                async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
+                    return await self.fetch_salary_page(url, session)
+            async with session.get(url, headers=headers) as response:
+                if response.status == 200:
+                    return await response.text()
+                else:
+                    logging.error(f"请求失败，状态码: {response.status}")
+                    return ""
         except Exception as e:
             logging.exception(f"发生错误: {e}")
-            return {}
+            return ""
 
     @staticmethod
     def extract_salary_data(html_content: str):
         """
         按照指定路径提取薪资数据
         """
-        # 创建BeautifulSoup对象
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        # 定位到目标内容
-        main_content = soup.find(id="mainContent")
+        # 只解析目标内容
+        main_content = parse_main_content(html_content)
         if not main_content:
             return {}
         # 提取标题
         title = clean_text_enhanced(main_content.find("h1").get_text().strip())
         # 提取表格数据
         table = main_content.find("table")
+        if not table:
+            return {}
         data_list = []
+        # 表格行只查找一次：前两行是表头，从第三行开始是数据
+        rows = table.find_all("tr")
         # 提取表头
         headers = []
-        header_rows = table.find_all("tr")[:2]  # 前两行是表头
-        for row in header_rows:
-            th_elements = row.find_all("th")
-            for th in th_elements:
-                header_text = th.get_text().strip()
-                header_text = clean_text_enhanced(header_text)
+        for row in rows[:2]:
+            for header_text in clean_texts(th.get_text().strip() for th in row.find_all("th")):
                 if header_text and header_text not in headers:
                     headers.append(header_text)
 
         # 提取数据行
-        data_rows = table.find_all("tr")[2:]  # 从第三行开始是数据
         m0 = headers[0]
         m1 = headers[1]
         m2 = headers[2]
-        for row in data_rows:
+        for row in rows[2:]:
             cells = row.find_all(["td", "th"])
             if len(cells) >= 3:
-                point = clean_text_enhanced(cells[0].get_text().strip())
-                as_at_3132025 = clean_text_enhanced(cells[1].get_text().strip())
-                wef_142025 = clean_text_enhanced(cells[2].get_text().strip())
+                point, as_at_3132025, wef_142025 = clean_texts(c.get_text().strip() for c in cells[:3])
 
                 data_list.append({
                     m0: point,
@@ -242,33 +312,79 @@ def jobs(is_update: bool = False) -> list:
 
     """
     try:
-        job_menu_path = f"{SCRIPT_ROOT}/jobs_menus.json"
         if is_update:
             # 加载新记录
             job_utils = CsbUtils()
             dic = asyncio.run(job_utils.get_jobs_menu())
             if dic:
-                # 更新最新的工作岗位信息
-                with open(job_menu_path, "w", encoding="utf-8") as f:
+                # 更新最新的工作岗位信息，文件更新后索引会自动重新加载
+                with open(JOBS_MENU_PATH, "w", encoding="utf-8") as f:
                     f.write(json.dumps(dic))
                 return dic["pay_scales"]
-        # 加载旧记录
-        # 从之前的记录中加载
-        with open(job_menu_path, "r", encoding="utf-8") as f:
-            s = f.read()
-            dic = json.loads(s)
-        return dic["pay_scales"]
+        # 加载旧记录：使用进程内的岗位索引，文件未更新时不再重新读取
+        return list(get_jobs_index().pay_scales)
     except Exception as e:
         logging.exception(f"加载工作岗位异常: {e}")
         return []
 
 
-def crawl(query: str) -> Dict[str, str]:
+def search_jobs(query: str, limit: Optional[int] = None) -> List[dict]:
+    """
+    检索岗位，返回所有匹配的岗位，按匹配程度排序
+
+    Args:
+        query: 岗位名称或其中的单词，忽略大小写
+        limit: 最多返回的数量，为空时返回全部
+
+    Returns: 如 [{"title": "Training Pay Scale", "url": "...", "match": 2}]
+    """
+    try:
+        return get_jobs_index().search(query, limit=limit)
+    except Exception as e:
+        logging.exception(f"检索工作岗位异常: {e}")
+        return []
+
+
+def salary_snapshot(is_update: bool = False) -> SalarySnapshot:
+    """
+    获取所有岗位的薪酬表快照
+
+    Args:
+        is_update: 是否更新，如果为True将会下载所有岗位的薪水页面（只重新解析有变化的页面，撤销源网站已删除的薪资表）并保存，否则直接加载已有快照
+
+    Returns: 快照
+
+    """
+    if is_update:
+        try:
+            snapshot = SalarySnapshot.load(SALARY_SNAPSHOT_PATH)
+            stats = asyncio.run(refresh_salary_snapshot(CsbUtils(), jobs(), snapshot))
+            logging.info(f"薪酬表快照已刷新: {stats}")
+            if stats["changed"] or stats["retired"]:
+                snapshot.save(SALARY_SNAPSHOT_PATH)
+        except Exception as e:
+            logging.exception(f"刷新薪酬表快照异常: {e}")
+    return get_salary_snapshot()
+
+
+def salary_engine() -> SalaryEngine:
+    """
+    基于薪酬表快照的分析引擎：跨薪酬表按薪资区间检索、比较不同生效日期的差额
+
+    Returns: SalaryEngine，快照为空时没有数据（先调用 salary_snapshot(is_update=True)）
+
+    """
+    return get_salary_engine()
+
+
+def crawl(query: str, offline: bool = True) -> Dict[str, str]:
     """
     Performs a crawl operation based on the given query string.
 
     Args:
         query: The search query string to use for crawling.
+        offline: Answer from the local pay-scale snapshot (see salary_snapshot()); pages missing
+            from the snapshot, or every page when False, are fetched live.
 
     Returns:
         A dictionary containing the query, result, and URL.
@@ -278,22 +394,22 @@ def crawl(query: str) -> Dict[str, str]:
     if not query or not query.strip():
         return {"query": query, "result": "", "url": ""}
 
-    # 获取岗位列表
-    jobs_menu = jobs()
-    if not jobs_menu:
+    # 匹配出岗位代码和岗位名称：取匹配程度最高的岗位
+    matches = search_jobs(query, limit=1)
+    if not matches:
         return {"query": query, "result": "", "url": ""}
-    # 匹配出岗位代码和岗位名称
-    job_name = ""
-    job_url = ""
-    for row in jobs_menu:
-        if query in row.get("title"):
-            job_name = row.get("title")
-            job_url = row.get("url")
-            break
+    job_name = matches[0].get("title")
+    job_url = matches[0].get("url")
 
     # 初始化工具
     job_utils = CsbUtils()
 
+    # 优先使用本地快照
+    if offline:
+        salary = get_salary_snapshot().get(job_url)
+        if salary:
+            return job_utils.salary_back_markdown(job_name, job_url, salary)
+
     # 检索岗位的薪资
     rs = asyncio.run(job_utils.find_job_salary_back_markdown(job_name, job_url))
     return rs
@@ -0,0 +1,126 @@
+"""
+薪酬表岗位索引：jobs_menus.json 只加载一次，文件更新后自动重新加载；按单词索引检索并排序
+"""
+import bisect
+import json
+import os
+import pathlib
+import re
+import unicodedata
+from typing import Dict, List, Optional, Set
+
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+JOBS_MENU_PATH = SCRIPT_ROOT / "jobs_menus.json"
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+# 匹配等级，越小越靠前
+MATCH_EXACT = 0  # 标题完全相同
+MATCH_PREFIX = 1  # 标题以查询开头
+MATCH_TOKENS = 2  # 查询的每个单词都是标题中的完整单词
+MATCH_TOKEN_PREFIX = 3  # 查询的每个单词都是标题中某个单词的前缀
+MATCH_SUBSTRING = 4  # 标题包含查询（与原来的检索方式相同）
+
+
+def normalize_key(text: str) -> str:
+    """检索用的key：NFKC标准化、合并空白、忽略大小写"""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split()).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """拆分为单词（已标准化的文本）"""
+    return TOKEN_RE.findall(text)
+
+
+class JobsIndex:
+    """
+    薪酬表岗位索引
+
+    pay_scales 为 jobs_menus.json 中的 [{"title": ..., "url": ...}]，
+    按标题的单词建立倒排索引，search() 返回所有匹配的岗位，按匹配程度排序
+    """
+
+    def __init__(self, pay_scales: List[dict]):
+        self.pay_scales = list(pay_scales)
+        self._keys = [normalize_key(row.get("title", "")) for row in self.pay_scales]
+        self._tokens = [tokenize(key) for key in self._keys]
+        # 单词 => 岗位序号
+        self._token_index: Dict[str, Set[int]] = {}
+        for i, tokens in enumerate(self._tokens):
+            for token in tokens:
+                self._token_index.setdefault(token, set()).add(i)
+        # 有序的单词列表，用于前缀匹配
+        self._sorted_tokens = sorted(self._token_index)
+
+    def __len__(self):
+        return len(self.pay_scales)
+
+    @classmethod
+    def load(cls, path: pathlib.Path = JOBS_MENU_PATH) -> "JobsIndex":
+        """从 jobs_menus.json 加载"""
+        with open(path, "r", encoding="utf-8") as f:
+            dic = json.load(f)
+        return cls(dic.get("pay_scales") or [])
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        ids = set()
+        i = bisect.bisect_left(self._sorted_tokens, prefix)
+        while i < len(self._sorted_tokens) and self._sorted_tokens[i].startswith(prefix):
+            ids |= self._token_index[self._sorted_tokens[i]]
+            i += 1
+        return ids
+
+    def _rank(self, i: int, key: str, q_tokens: List[str]) -> int:
+        if self._keys[i] == key:
+            return MATCH_EXACT
+        if self._keys[i].startswith(key):
+            return MATCH_PREFIX
+        if all(t in self._token_index and i in self._token_index[t] for t in q_tokens):
+            return MATCH_TOKENS
+        return MATCH_TOKEN_PREFIX
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        检索岗位
+
+        Args:
+            query: 岗位名称或其中的单词，忽略大小写，如 "training"、"disciplined officer"
+            limit: 最多返回的数量，为空时返回全部
+
+        Returns: 按匹配程度排序的岗位，如 [{"title": "Training Pay Scale", "url": "...", "match": 2}]
+        """
+        key = normalize_key(query)
+        if not key:
+            return []
+        q_tokens = tokenize(key)
+        ids: Optional[Set[int]] = None
+        for token in q_tokens:
+            matched = self._prefix_ids(token)
+            ids = matched if ids is None else ids & matched
+            if not ids:
+                break
+        if ids:
+            ranked = [(self._rank(i, key, q_tokens), len(self._tokens[i]), i) for i in ids]
+        else:
+            # 单词检索不到时，退回到子串匹配，如 "aster" 可以匹配 "Master Pay Scale"
+            ranked = [(MATCH_SUBSTRING, len(self._tokens[i]), i) for i, k in enumerate(self._keys) if key in k]
+        ranked.sort()
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [{**self.pay_scales[i], "match": match} for match, _, i in ranked]
+
+
+_DEFAULT_INDEX: Optional[JobsIndex] = None
+_DEFAULT_INDEX_MTIME: Optional[int] = None
+
+
+def get_jobs_index(path: pathlib.Path = JOBS_MENU_PATH) -> JobsIndex:
+    """进程内共享的岗位索引，文件有更新时重新加载"""
+    global _DEFAULT_INDEX, _DEFAULT_INDEX_MTIME
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if _DEFAULT_INDEX is None or mtime != _DEFAULT_INDEX_MTIME:
+        _DEFAULT_INDEX = JobsIndex.load(path) if mtime is not None else JobsIndex([])
+        _DEFAULT_INDEX_MTIME = mtime
+    return _DEFAULT_INDEX
@@ -0,0 +1,218 @@
+"""
+薪酬表分析：把快照中所有薪资表转换为紧凑的数值列，跨薪酬表按薪资区间检索、比较不同生效日期的差额
+
+数据只有几百行，使用标准库 array 存储（不依赖numpy）：每一行是某个薪酬表的一个薪点，
+薪资按生效日期分列存储，并为每个生效日期预先排好序，区间检索用二分查找
+"""
+import bisect
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .salary_snapshot import SalarySnapshot, get_salary_snapshot
+
+# 没有对应薪资时的值
+MISSING = -1
+# 薪点，如 "46 (44B)" => 46, "44B"
+POINT_RE = re.compile(r"^\s*(\d+)\s*(?:\((.*?)\))?")
+# 生效日期，如 "as at 31.3.2025"、"w.e.f. 1.4.2025"
+DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})")
+
+
+def parse_point(text: str) -> Tuple[int, str]:
+    """解析薪点，返回 (薪点, 别名)，无法解析时薪点为 MISSING"""
+    m = POINT_RE.match(text or "")
+    if not m:
+        return MISSING, ""
+    return int(m.group(1)), (m.group(2) or "").strip()
+
+
+def parse_salary(text: str) -> int:
+    """解析薪资，如 "132,275" => 132275，无法解析时返回 MISSING"""
+    digits = (text or "").replace(",", "").replace("$", "").strip()
+    return int(digits) if digits.isdigit() else MISSING
+
+
+def date_sort_key(label: str) -> tuple:
+    """生效日期按时间排序，无法识别日期的排在最后"""
+    m = DATE_RE.search(label)
+    if not m:
+        return (1, label)
+    day, month, year = (int(g) for g in m.groups())
+    return (0, year, month, day)
+
+
+class SalaryEngine:
+    """
+    跨薪酬表的薪资检索
+
+    用法::
+
+        engine = SalaryEngine.from_snapshot(get_salary_snapshot())
+        # 最新生效日期下薪资在区间内的所有薪点
+        engine.between(50000, 60000)
+        # 两个生效日期之间的调整
+        engine.deltas("as at 31.3.2025", "w.e.f. 1.4.2025")
+    """
+
+    def __init__(self, tables: Iterable[Tuple[str, dict]]):
+        """
+        Args:
+            tables: (薪酬表名称, extract_salary_data 的结果)
+        """
+        self.scales: List[str] = []
+        self.aliases: List[str] = [""]
+        alias_ids: Dict[str, int] = {"": 0}
+        # 每行的列
+        self.scale_ids = array("H")
+        self.points = array("i")
+        self.alias_ids = array("H")
+        self.salaries: Dict[str, array] = {}
+        rows = 0
+        for title, salary in tables:
+            if not salary or not salary.get("data"):
+                continue
+            scale_id = len(self.scales)
+            self.scales.append(title or salary.get("title", ""))
+            keys = salary["keys"]
+            for date in keys[1:]:
+                if date not in self.salaries:
+                    # 新出现的生效日期，之前的行都没有该日期的薪资
+                    self.salaries[date] = array("l", [MISSING]) * rows
+            for row in salary["data"]:
+                point, alias = parse_point(row.get(keys[0], ""))
+                if alias not in alias_ids:
+                    alias_ids[alias] = len(self.aliases)
+                    self.aliases.append(alias)
+                self.scale_ids.append(scale_id)
+                self.points.append(point)
+                self.alias_ids.append(alias_ids[alias])
+                for date, column in self.salaries.items():
+                    column.append(parse_salary(row.get(date, "")) if date in keys[1:] else MISSING)
+                rows += 1
+        # 生效日期按时间排序，最后一个为最新
+        self.dates: List[str] = sorted(self.salaries, key=date_sort_key)
+        # 每个生效日期：按薪资排序的行号和对应的薪资（不含缺失值）
+        self._order: Dict[str, array] = {}
+        self._sorted: Dict[str, array] = {}
+        # (调整前, 调整后) => 差额列
+        self._deltas: Dict[Tuple[str, str], array] = {}
+        for date, column in self.salaries.items():
+            order = sorted((i for i in range(rows) if column[i] != MISSING), key=column.__getitem__)
+            self._order[date] = array("I", order)
+            self._sorted[date] = array("l", (column[i] for i in order))
+
+    def __len__(self):
+        return len(self.points)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: SalarySnapshot) -> "SalaryEngine":
+        """从薪酬表快照构建"""
+        return cls((t.get("title", ""), t.get("salary")) for t in snapshot.tables.values())
+
+    @property
+    def latest_date(self) -> Optional[str]:
+        return self.dates[-1] if self.dates else None
+
+    def _date(self, date: Optional[str]) -> str:
+        date = date or self.latest_date
+        if date not in self.salaries:
+            raise KeyError(f"没有该生效日期的薪资: {date}")
+        return date
+
+    def row(self, i: int, date: Optional[str] = None) -> dict:
+        """第i行转换为dict"""
+        date = self._date(date)
+        return {
+            "scale": self.scales[self.scale_ids[i]],
+            "point": self.points[i],
+            "alias": self.aliases[self.alias_ids[i]],
+            "date": date,
+            "salary": self.salaries[date][i],
+        }
+
+    def between_ids(self, low: int, high: int, date: Optional[str] = None) -> array:
+        """薪资在 [low, high] 区间内的行号，按薪资从低到高排序"""
+        date = self._date(date)
+        values = self._sorted[date]
+        start = bisect.bisect_left(values, low)
+        end = bisect.bisect_right(values, high)
+        return self._order[date][start:end]
+
+    def count_between(self, low: int, high: int, date: Optional[str] = None) -> int:
+        """薪资在 [low, high] 区间内的薪点数量"""
+        values = self._sorted[self._date(date)]
+        return bisect.bisect_right(values, high) - bisect.bisect_left(values, low)
+
+    def between(self, low: int, high: int, date: Optional[str] = None) -> List[dict]:
+        """
+        所有薪酬表中薪资在 [low, high] 区间内的薪点
+
+        Args:
+            low: 最低薪资
+            high: 最高薪资
+            date: 生效日期，如 "w.e.f. 1.4.2025"，为空时使用最新的生效日期
+
+        Returns: 按薪资从低到高排序，如 [{"scale": "Master Pay Scale", "point": 25, "alias": "", "date": "...", "salary": 56450}]
+        """
+        date = self._date(date)
+        return [self.row(i, date) for i in self.between_ids(low, high, date)]
+
+    def delta_column(self, from_date: str, to_date: str) -> array:
+        """每行在两个生效日期之间的薪资差额，任一日期缺失时为0（结果会缓存，不要修改）"""
+        key = (self._date(from_date), self._date(to_date))
+        if key not in self._deltas:
+            a = self.salaries[key[0]]
+            b = self.salaries[key[1]]
+            self._deltas[key] = array("l", (y - x if x != MISSING and y != MISSING else 0
+                                            for x, y in zip(a, b)))
+        return self._deltas[key]
+
+    def deltas(self, from_date: str, to_date: str, changed_only: bool = True) -> List[dict]:
+        """
+        两个生效日期之间的薪资调整
+
+        Args:
+            from_date: 调整前的生效日期
+            to_date: 调整后的生效日期
+            changed_only: 是否只返回有变化的薪点
+
+        Returns: 如 [{"scale": "...", "point": 25, "alias": "", "from": 56450, "to": 58145, "delta": 1695, "ratio": 0.03}]
+        """
+        a = self.salaries[self._date(from_date)]
+        b = self.salaries[self._date(to_date)]
+        results = []
+        for i, delta in enumerate(self.delta_column(from_date, to_date)):
+            if a[i] == MISSING or b[i] == MISSING or (changed_only and delta == 0):
+                continue
+            results.append({
+                "scale": self.scales[self.scale_ids[i]],
+                "point": self.points[i],
+                "alias": self.aliases[self.alias_ids[i]],
+                "from": a[i],
+                "to": b[i],
+                "delta": delta,
+                "ratio": round(delta / a[i], 4) if a[i] else None,
+            })
+        return results
+
+    def scale_rows(self, scale: str) -> List[int]:
+        """某个薪酬表的所有行号"""
+        if scale not in self.scales:
+            return []
+        scale_id = self.scales.index(scale)
+        return [i for i, s in enumerate(self.scale_ids) if s == scale_id]
+
+
+_DEFAULT_ENGINE: Optional[SalaryEngine] = None
+_DEFAULT_ENGINE_SNAPSHOT: Optional[SalarySnapshot] = None
+
+
+def get_salary_engine() -> SalaryEngine:
+    """基于默认快照的分析引擎，快照重新加载后重新构建"""
+    global _DEFAULT_ENGINE, _DEFAULT_ENGINE_SNAPSHOT
+    snapshot = get_salary_snapshot()
+    if _DEFAULT_ENGINE is None or snapshot is not _DEFAULT_ENGINE_SNAPSHOT:
+        _DEFAULT_ENGINE = SalaryEngine.from_snapshot(snapshot)
+        _DEFAULT_ENGINE_SNAPSHOT = snapshot
+    return _DEFAULT_ENGINE
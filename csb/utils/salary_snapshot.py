@@ -0,0 +1,169 @@
+"""
+薪酬表快照：所有岗位的薪资表保存在一个本地文件中，检索时直接使用，不再请求网站
+
+薪酬表大约一年才调整一次，快照只需要偶尔刷新；刷新时并发下载所有页面，只有内容有变化的页面才重新解析
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from .parse_executor import get_parse_executor
+
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+SALARY_SNAPSHOT_PATH = SCRIPT_ROOT / "pay_scales_snapshot.json"
+# 刷新快照时同时下载的页面数
+SNAPSHOT_CONCURRENCY = 4
+# 单个页面的超时时间（秒）
+SNAPSHOT_TIMEOUT = aiohttp.ClientTimeout(total=60)
+
+
+class SalarySnapshot:
+    """
+    薪酬表快照
+
+    文件格式::
+
+        {
+          "version": 3,
+          "updated_at": "2025-04-01 10:00:00",
+          "tables": {
+            "<url>": {"title": "...", "sha256": "<页面内容的哈希>", "fetched_at": "...", "salary": {extract_salary_data 的结果}}
+          },
+          "retired": {
+            "<url>": {同 tables 的内容, "retired_in": <从该版本起岗位列表中不再有这个页面>}
+          }
+        }
+
+    每次刷新有任何薪资表变化（含撤销的薪资表）时 version 加1；
+    tables 只包含当前有效的薪资表，源网站撤销的薪资表移到 retired 中，检索时不再使用
+    """
+
+    def __init__(self, version: int = 0, updated_at: str = "", tables: Optional[Dict[str, dict]] = None,
+                 retired: Optional[Dict[str, dict]] = None):
+        self.version = version
+        self.updated_at = updated_at
+        self.tables: Dict[str, dict] = tables or {}
+        self.retired: Dict[str, dict] = retired or {}
+
+    def __len__(self):
+        return len(self.tables)
+
+    def get(self, url: str) -> dict:
+        """岗位薪水url对应的薪资数据（extract_salary_data 的结果），没有时返回空"""
+        table = self.tables.get(url)
+        return table["salary"] if table else {}
+
+    @classmethod
+    def load(cls, path: pathlib.Path = SALARY_SNAPSHOT_PATH) -> "SalarySnapshot":
+        """加载快照，文件不存在时返回空快照"""
+        path = pathlib.Path(path)
+        if not path.exists():
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            dic = json.load(f)
+        return cls(dic.get("version", 0), dic.get("updated_at", ""), dic.get("tables") or {}, dic.get("retired") or {})
+
+    def save(self, path: pathlib.Path = SALARY_SNAPSHOT_PATH):
+        """保存快照（先写临时文件再替换，避免读取到写了一半的文件）"""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "updated_at": self.updated_at, "tables": self.tables,
+                       "retired": self.retired}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+_DEFAULT_SNAPSHOT: Optional[SalarySnapshot] = None
+_DEFAULT_SNAPSHOT_MTIME: Optional[int] = None
+
+
+def get_salary_snapshot(path: pathlib.Path = SALARY_SNAPSHOT_PATH) -> SalarySnapshot:
+    """进程内共享的快照，文件有更新时重新加载"""
+    global _DEFAULT_SNAPSHOT, _DEFAULT_SNAPSHOT_MTIME
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if _DEFAULT_SNAPSHOT is None or mtime != _DEFAULT_SNAPSHOT_MTIME:
+        _DEFAULT_SNAPSHOT = SalarySnapshot.load(path)
+        _DEFAULT_SNAPSHOT_MTIME = mtime
+    return _DEFAULT_SNAPSHOT
+
+
+async def refresh_salary_snapshot(job_utils, pay_scales: List[dict], snapshot: Optional[SalarySnapshot] = None,
+                                  concurrency: int = SNAPSHOT_CONCURRENCY) -> Dict[str, int]:
+    """
+    刷新快照：并发下载所有岗位的薪水页面，内容哈希没有变化的页面不重新解析；
+    快照中有、但 pay_scales 中已经没有的页面视为源网站已撤销，移到 snapshot.retired 并记录撤销的版本
+    （下载或解析失败的页面保留原有数据，不视为撤销）
+
+    Args:
+        job_utils: CsbUtils
+        pay_scales: 岗位列表，如 jobs() 的结果
+        snapshot: 要刷新的快照，为空时加载默认快照；刷新后需要调用 snapshot.save() 保存
+        concurrency: 同时下载的页面数
+
+    Returns: 统计信息，如 {"total": 11, "changed": 1, "unchanged": 10, "failed": 0, "retired": 0, "version": 2}
+    """
+    snapshot = snapshot if snapshot is not None else SalarySnapshot.load()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    stats = {"total": len(pay_scales), "changed": 0, "unchanged": 0, "failed": 0, "retired": 0}
+
+    async def _refresh(session: aiohttp.ClientSession, row: dict):
+        url = row.get("url")
+        if not url:
+            stats["failed"] += 1
+            return
+        async with semaphore:
+            html = await job_utils.fetch_salary_page(url, session)
+        if not html:
+            stats["failed"] += 1
+            return
+        digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        table = snapshot.tables.get(url)
+        if table and table.get("sha256") == digest:
+            stats["unchanged"] += 1
+            return
+        try:
+            # 在解析执行器中解析，其他页面的下载可以同时进行
+            salary = await get_parse_executor().run(job_utils.extract_salary_data, html)
+        except Exception as e:
+            logging.exception(f"解析薪资表异常: {url}, {e}")
+            salary = {}
+        if not salary:
+            stats["failed"] += 1
+            return
+        snapshot.tables[url] = {
+            "title": row.get("title", ""),
+            "sha256": digest,
+            "fetched_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "salary": salary,
+        }
+        # 撤销后又重新出现的页面
+        snapshot.retired.pop(url, None)
+        stats["changed"] += 1
+
+    async with aiohttp.ClientSession(timeout=SNAPSHOT_TIMEOUT) as session:
+        await asyncio.gather(*[_refresh(session, row) for row in pay_scales])
+
+    # 岗位列表为空（多半是获取列表失败）时不撤销，避免清空快照
+    listed = {row.get("url") for row in pay_scales}
+    withdrawn = [url for url in snapshot.tables if url not in listed] if pay_scales else []
+    for url in withdrawn:
+        snapshot.retired[url] = dict(snapshot.tables.pop(url), retired_in=snapshot.version + 1)
+        logging.info(f"薪资表已从源网站撤销: {url}")
+    stats["retired"] = len(withdrawn)
+
+    if stats["changed"] or stats["retired"]:
+        snapshot.version += 1
+        snapshot.updated_at = time.strftime("%Y-%m-%d %H:%M:%S")
+    stats["version"] = snapshot.version
+    return stats
@@ -3,7 +3,7 @@
 """
 import json
 
-from utils.hurun_utils import jobs, crawl
+from utils.hurun_utils import jobs, crawl, full_rankings
 
 # 加载工作岗位信息
 # is_update默认为False,如果设置为True则进行数据更新（数据来源为对应网站的数据）
@@ -16,3 +16,27 @@ print(jobs_menu)
 # print(json.dumps(rs, indent=2, ensure_ascii=False))
 # print("result美化效果：")
 # print(rs["result"])
+
+# # 获取完整榜单（并发加载所有分页），不只是前20条
+# rows = full_rankings("胡润百富榜")
+# print(f"榜单条数: {len(rows)}, 前3条: {rows[:3]}")
+
+# # 按人名、企业名称检索：使用本地缓存的完整榜单，没有缓存或缓存中找不到时调用接口检索
+# # 先下载完整榜单到本地缓存（默认一周过期，未过期时跳过），crawl 不会自动下载
+# from utils.hurun_utils import warm_up_rankings
+# print(warm_up_rankings())
+# rs = crawl("任正非")
+# print(rs["result"])
+
+# # 列式存储：只保留用到的字段，按财富取前10、按行业过滤，并对比内存占用
+# from utils.ranking_columns import RankingColumns, deep_sizeof
+# columns = RankingColumns.from_rows("rich", rows)
+# print(f"原始记录: {deep_sizeof(rows)} 字节, 列式存储: {columns.memory_bytes()} 字节")
+# print("\n".join(columns.markdown_lines(columns.top_k(10))))
+# print("\n".join(columns.markdown_lines(columns.filter(industry="房地产", min_wealth=500))))
+
+# # 榜单历史版本：更新榜单缓存时有变化的榜单自动保存为新版本（只保存差异），查询排名上升最多的记录
+# from utils.hurun_utils import ranking_movers
+# print(ranking_movers("胡润百富榜", limit=10))
+# # 财富减少最多的记录
+# print(ranking_movers("胡润百富榜", by="wealth", rising=False, limit=10))
@@ -0,0 +1,157 @@
+"""
+rankings_to_markdown（列式存储）与原实现的结果逐字节一致，缓存、历史版本的往返转换不改变输出
+
+运行: python -m pytest test_ranking_columns.py 或 python test_ranking_columns.py
+"""
+import json
+import random
+
+from utils.hurun_utils import CsbUtils
+from utils.ranking_columns import RankingColumns
+
+URL = "https://www.hurun.net/zh-CN/Rank/HsRankDetails?pagetype=rich"
+
+
+def rankings_to_markdown_legacy(page_type: str, name: str, url: str, rs: list, query: str = ""):
+    """原 rankings_to_markdown 的实现"""
+    name = name or ""
+    query = query or name
+    if not rs:
+        return {"query": query, "result": "", "url": url}
+
+    lines = ""
+    if page_type == "rich":
+        titles = ["排名", "财富(￥)", "排名变化", "个人信息", "企业信息"]
+        lines += ",".join(titles) + "\n"
+        for row in rs:
+            male_str = row["hs_Character"][0]["hs_Character_Gender"]
+            age_str = row["hs_Character"][0]["hs_Character_Age"] + "岁"
+            line = [
+                str(row["hs_Rank_Rich_Ranking"]),
+                str(row["hs_Rank_Rich_Wealth"]),
+                str(row["hs_Rank_Rich_Ranking_Change"]),
+                row["hs_Rank_Rich_ChaName_Cn"] + " " + male_str + " " + age_str,
+                row["hs_Rank_Rich_Industry_Cn"] + " 行业：" + row["hs_Rank_Rich_Industry_Cn"],
+            ]
+            lines += (",".join(line)).replace("\n", " ") + "\n"
+    elif page_type == "ctop500":
+        titles = ["排名", "企业估值(￥)", "企业信息", "CEO", "行业"]
+        lines += ",".join(titles) + "\n"
+        for row in rs:
+            line = [
+                str(row["hs_Rank_CTop500_Ranking"]),
+                str(row["hs_Rank_CTop500_Wealth"]),
+                row["hs_Rank_CTop500_ComName_Cn"],
+                row["hs_Rank_CTop500_ChaName_Cn"],
+                row["hs_Rank_CTop500_Industry_Cn"],
+            ]
+            lines += ",".join(line).replace("\n", " ") + "\n"
+    else:
+        return {"query": query, "result": "", "url": url}
+
+    markdown = f"""
+# {name}
+
+{lines}
+"""
+    return {"query": query, "result": markdown, "url": url}
+
+
+# 接口返回的记录：财富整数、小数混在一起，排名变化有数字、负数，也有 "新上榜"、"-" 这样的文本
+RICH_ROWS = [
+    {"hs_Rank_Rich_Ranking": 1, "hs_Rank_Rich_Wealth": 5700, "hs_Rank_Rich_Ranking_Change": 0,
+     "hs_Rank_Rich_ChaName_Cn": "钟睒睒", "hs_Rank_Rich_Industry_Cn": "饮料、医药",
+     "hs_Character": [{"hs_Character_Gender": "先生", "hs_Character_Age": "70"}]},
+    {"hs_Rank_Rich_Ranking": 2, "hs_Rank_Rich_Wealth": 4900.5, "hs_Rank_Rich_Ranking_Change": 3,
+     "hs_Rank_Rich_ChaName_Cn": "张一鸣", "hs_Rank_Rich_Industry_Cn": "社交媒体",
+     "hs_Character": [{"hs_Character_Gender": "先生", "hs_Character_Age": "41"}]},
+    {"hs_Rank_Rich_Ranking": 3, "hs_Rank_Rich_Wealth": 3500.0, "hs_Rank_Rich_Ranking_Change": -1,
+     "hs_Rank_Rich_ChaName_Cn": "马化腾", "hs_Rank_Rich_Industry_Cn": "互联网服务",
+     "hs_Character": [{"hs_Character_Gender": "先生", "hs_Character_Age": "53"}]},
+    {"hs_Rank_Rich_Ranking": 4, "hs_Rank_Rich_Wealth": 2600, "hs_Rank_Rich_Ranking_Change": "新上榜",
+     "hs_Rank_Rich_ChaName_Cn": "张三、李四\n家族", "hs_Rank_Rich_Industry_Cn": "房地产",
+     "hs_Character": [{"hs_Character_Gender": "女士", "hs_Character_Age": "62"}]},
+    {"hs_Rank_Rich_Ranking": 4, "hs_Rank_Rich_Wealth": 2600, "hs_Rank_Rich_Ranking_Change": "-",
+     "hs_Rank_Rich_ChaName_Cn": "张三", "hs_Rank_Rich_Industry_Cn": "房地产",
+     "hs_Character": [{"hs_Character_Gender": "先生", "hs_Character_Age": "未知"}]},
+]
+CTOP500_ROWS = [
+    {"hs_Rank_CTop500_Ranking": 1, "hs_Rank_CTop500_Wealth": 34300, "hs_Rank_CTop500_ComName_Cn": "台积电",
+     "hs_Rank_CTop500_ChaName_Cn": "魏哲家", "hs_Rank_CTop500_Industry_Cn": "半导体"},
+    {"hs_Rank_CTop500_Ranking": 2, "hs_Rank_CTop500_Wealth": 29500.5, "hs_Rank_CTop500_ComName_Cn": "腾讯",
+     "hs_Rank_CTop500_ChaName_Cn": "马化腾", "hs_Rank_CTop500_Industry_Cn": "互联网服务"},
+    {"hs_Rank_CTop500_Ranking": 3, "hs_Rank_CTop500_Wealth": 12000.0, "hs_Rank_CTop500_ComName_Cn": "字节\n跳动",
+     "hs_Rank_CTop500_ChaName_Cn": "梁汝波", "hs_Rank_CTop500_Industry_Cn": "社交媒体"},
+]
+
+
+def random_rich_rows(n: int = 1000, seed: int = 20251018) -> list:
+    rng = random.Random(seed)
+    industries = ["房地产", "汽车", "医药", "半导体", "食品饮料"]
+    changes = ["新上榜", "-", "持平"]
+    rows = []
+    for i in range(n):
+        wealth = rng.choice([rng.randint(20, 6000), round(rng.uniform(20, 6000), rng.randint(1, 2)),
+                             float(rng.randint(20, 6000))])
+        change = rng.choice([rng.randint(-300, 300), rng.choice(changes)])
+        rows.append({
+            "hs_Rank_Rich_Ranking": i + 1,
+            "hs_Rank_Rich_Wealth": wealth,
+            "hs_Rank_Rich_Ranking_Change": change,
+            "hs_Rank_Rich_ChaName_Cn": f"人名{rng.randint(0, n)}",
+            "hs_Rank_Rich_Industry_Cn": rng.choice(industries),
+            "hs_Character": [{"hs_Character_Gender": rng.choice(["先生", "女士"]),
+                              "hs_Character_Age": str(rng.randint(25, 95))}],
+        })
+    return rows
+
+
+def round_trips(page_type: str, rows: list) -> list:
+    """直接构建、缓存文件（json）往返、历史版本（row记录）往返得到的列式榜单"""
+    columns = RankingColumns.from_rows(page_type, rows)
+    cached = RankingColumns.from_dict(json.loads(json.dumps(columns.to_dict(), ensure_ascii=False)))
+    recorded = RankingColumns.from_records(page_type, json.loads(json.dumps(columns.records(), ensure_ascii=False)))
+    return [columns, cached, recorded]
+
+
+def test_rich_markdown_matches_legacy():
+    for rows in (RICH_ROWS, random_rich_rows()):
+        expected = rankings_to_markdown_legacy("rich", "胡润百富榜", URL, rows, "张三")
+        assert CsbUtils.rankings_to_markdown("rich", "胡润百富榜", URL, rows, "张三") == expected
+        for columns in round_trips("rich", rows):
+            assert CsbUtils.rankings_to_markdown("rich", "胡润百富榜", URL, columns, "张三") == expected
+
+
+def test_ctop500_markdown_matches_legacy():
+    expected = rankings_to_markdown_legacy("ctop500", "中国500强", URL, CTOP500_ROWS)
+    assert CsbUtils.rankings_to_markdown("ctop500", "中国500强", URL, CTOP500_ROWS) == expected
+    for columns in round_trips("ctop500", CTOP500_ROWS):
+        assert CsbUtils.rankings_to_markdown("ctop500", "中国500强", URL, columns) == expected
+
+
+def test_empty_and_unknown_ranking_match_legacy():
+    assert CsbUtils.rankings_to_markdown("rich", "胡润百富榜", URL, []) == \
+        rankings_to_markdown_legacy("rich", "胡润百富榜", URL, [])
+    assert CsbUtils.rankings_to_markdown("other", "其他榜单", URL, CTOP500_ROWS) == \
+        rankings_to_markdown_legacy("other", "其他榜单", URL, CTOP500_ROWS)
+
+
+def test_mixed_wealth_is_typed_array():
+    for columns in round_trips("rich", random_rich_rows()):
+        assert columns.wealth.typecode == "d" and columns.wealth_is_int.typecode == "b"
+        assert [type(r["wealth"]) for r in columns.records()] == \
+            [type(r["hs_Rank_Rich_Wealth"]) for r in random_rich_rows()]
+
+
+def test_sort_by_change_treats_text_as_zero():
+    columns = RankingColumns.from_rows("rich", RICH_ROWS)
+    assert [columns.change[i] for i in columns.sort(by="change")] == ["3", "0", "新上榜", "-", "-1"]
+
+
+if __name__ == "__main__":
+    test_rich_markdown_matches_legacy()
+    test_ctop500_markdown_matches_legacy()
+    test_empty_and_unknown_ranking_match_legacy()
+    test_mixed_wealth_is_typed_array()
+    test_sort_by_change_treats_text_as_zero()
+    print("ok")
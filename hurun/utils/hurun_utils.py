@@ -5,11 +5,17 @@ import asyncio
 import json
 import logging
 import pathlib
-from typing import Dict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
 
 import aiohttp
 from aiohttp import ClientTimeout
 
+from .ranking_cache import RANKING_CACHE_TTL, get_ranking_index, refresh_ranking_cache
+from .ranking_columns import RankingColumns
+from .ranking_history import get_ranking_history
+from .rate_limiter import HostRateLimiter
+
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 COMMON_HEADERS = {
     "User-Agent": USER_AGENT,
@@ -17,15 +23,31 @@ COMMON_HEADERS = {
 }
 SCRIPT_ROOT = pathlib.Path(__file__).parent
 TIMEOUT = ClientTimeout(total=300)
+# 榜单：每次请求的条数（榜单页面默认20条）、加载完整榜单时每页的条数和同时请求的页数
+RANK_PAGE_SIZE = 20
+RANK_FULL_PAGE_SIZE = 100
+RANK_CONCURRENCY = 4
+# 加载完整榜单时每页失败后的重试次数和间隔（秒，按次数递增）
+RANK_RETRIES = 2
+RANK_RETRY_DELAY = 1.0
+# 各域名的限速配置：{域名: (每秒补充的令牌数, 突发容量)}
+HOST_LIMITS = {
+    "www.hurun.net": (2.0, 4),
+}
+# 进程级共享的限速器
+RATE_LIMITER = HostRateLimiter(HOST_LIMITS)
 
 
 class CsbUtils:
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[HostRateLimiter] = None):
+        # 按域名限速，默认使用进程内共享的限速器
+        self.rate_limiter = rate_limiter or RATE_LIMITER
         # 百富榜：浏览器端
         self.view_url = "https://www.hurun.net/zh-CN/Rank/HsRankDetails?pagetype={page_type}"
-        # 百富榜：前20榜单，可以调整offset和limit实现加载更多
+        # 百富榜：按offset和limit分页加载，返回 {"total": 总条数, "rows": [...]}
         # search: %E4%BB%BB%E6%AD%A3%E9%9D%9E => 任正非，支持检索
-        self.base_url_query = "https://www.hurun.net/zh-CN/Rank/HsRankDetailsList?num={num}&search=&offset=0&limit=20"
+        self.base_url_query = ("https://www.hurun.net/zh-CN/Rank/HsRankDetailsList"
+                               "?num={num}&search={search}&offset={offset}&limit={limit}")
 
     @staticmethod
     async def get_rankings_names() -> list:
@@ -54,76 +76,287 @@ class CsbUtils:
         # 查询岗位薪水的信息
         rs = await self.find_rankings(num)
         url = self.view_url.format(page_type=page_type)
-        if not rs and type(rs) != dict:
-            return {"query": name, "result": "", "url": url}
+        return self.rankings_to_markdown(page_type, name, url, rs)
+
+    @staticmethod
+    def rankings_to_markdown(page_type: str, name: str, url: str, rs: list, query: str = "") -> Dict[str, str]:
+        """
+        榜单记录转换为markdown
+
+        Args:
+            page_type: 页面类型，rich / ctop500
+            name: 榜单的名称
+            url: 给用户核对数据的url
+            rs: 榜单记录（接口返回的记录或 RankingColumns）
+            query: 返回结果中的query，为空时使用榜单名称
+
+        Returns: markdown格式，没有记录时result为空
+        """
+        columns = rs if isinstance(rs, RankingColumns) else RankingColumns.from_rows(page_type, rs or [])
+        return CsbUtils.columns_to_markdown(columns, name, url, query)
+
+    @staticmethod
+    def columns_to_markdown(columns: RankingColumns, name: str, url: str, query: str = "",
+                            ids: Optional[Iterable[int]] = None) -> Dict[str, str]:
+        """
+        列式榜单转换为markdown
+
+        Args:
+            columns: 列式榜单
+            name: 榜单的名称
+            url: 给用户核对数据的url
+            query: 返回结果中的query，为空时使用榜单名称
+            ids: 输出的行号（如检索、排序、过滤的结果），为空时输出全部
 
+        Returns: markdown格式，没有记录时result为空
+        """
+        name = name or ""
+        query = query or name
         # 形成markdown文档
-        lines = ""
-        if page_type == "rich":
-            # 百富榜
-            titles = ["排名", "财富(￥)", "排名变化", "个人信息", "企业信息"]
-            lines += ",".join(titles) + "\n"
-            for row in rs:
-                male_str = row["hs_Character"][0]["hs_Character_Gender"]
-                age_str = row["hs_Character"][0]["hs_Character_Age"] + "岁"
-                line = [
-                    str(row["hs_Rank_Rich_Ranking"]),
-                    str(row["hs_Rank_Rich_Wealth"]),
-                    str(row["hs_Rank_Rich_Ranking_Change"]),
-                    row["hs_Rank_Rich_ChaName_Cn"] + " " + male_str + " " + age_str,
-                    row["hs_Rank_Rich_Industry_Cn"] + " 行业：" + row["hs_Rank_Rich_Industry_Cn"],
-                ]
-                lines += (",".join(line)).replace("\n", " ") + "\n"
-        elif page_type == "ctop500":
-            # 中国500强
-            titles = ["排名", "企业估值(￥)", "企业信息", "CEO", "行业"]
-            lines += ",".join(titles) + "\n"
-            for row in rs:
-                line = [
-                    str(row["hs_Rank_CTop500_Ranking"]),
-                    str(row["hs_Rank_CTop500_Wealth"]),
-                    row["hs_Rank_CTop500_ComName_Cn"],
-                    row["hs_Rank_CTop500_ChaName_Cn"],
-                    row["hs_Rank_CTop500_Industry_Cn"],
-                ]
-                lines += ",".join(line).replace("\n", " ") + "\n"
-        else:
-            return {"query": name, "result": "", "url": url}
+        lines = columns.markdown_lines(ids)
+        if len(lines) <= 1:
+            return {"query": query, "result": "", "url": url}
+        lines = "\n".join(lines) + "\n"
 
         markdown = f"""
 # {name}
 
 {lines}
 """
-        return {"query": name, "result": markdown, "url": url}
+        return {"query": query, "result": markdown, "url": url}
 
-    async def find_rankings(self, num: str) -> list:
+    async def find_by_name_back_markdown(self, query: str, rankings: List[dict],
+                                         ttl: float = RANKING_CACHE_TTL) -> Dict[str, str]:
         """
-        通过num来查询对应的榜单
+        按人名、企业名称、CEO或行业检索各个榜单
+
+        有未过期本地缓存的榜单（见 warm_up_rankings）只在内存中检索：缓存的都是完整榜单，找不到就是没有，不再请求接口；
+        没有缓存或缓存已过期的榜单使用接口的search参数检索；这里不会下载完整榜单
+
+        Args:
+            query: 如 "任正非"、"华为"
+            rankings: 榜单列表，如 jobs() 的结果
+            ttl: 榜单缓存的有效期（秒）
+
+        Returns: markdown格式，如果找不到记录result为空
+
+        """
+        if not query or not query.strip() or not rankings:
+            return {"query": query, "result": "", "url": ""}
+
+        hits = []
+        for ranking in rankings:
+            index = get_ranking_index(ranking, ttl=ttl)
+            if index is not None:
+                ids = index.search_ids(query)
+                if ids:
+                    hits.append((ranking, index.columns, ids))
+                continue
+            # 没有有效的缓存：使用接口检索
+            rows = await self.search_rankings(ranking["num"], query)
+            if rows:
+                hits.append((ranking, RankingColumns.from_rows(ranking["page_type"], rows), None))
+
+        results = [self.columns_to_markdown(columns, ranking["name"],
+                                            self.view_url.format(page_type=ranking["page_type"]), query, ids)
+                   for ranking, columns, ids in hits]
+        results = [rs for rs in results if rs["result"]]
+        if not results:
+            return {"query": query, "result": "", "url": ""}
+        return {"query": query, "result": "".join(rs["result"] for rs in results), "url": results[0]["url"]}
+
+    async def warm_up_rankings(self, rankings: List[dict], ttl: float = RANKING_CACHE_TTL,
+                               force: bool = False) -> Dict[str, int]:
+        """
+        下载完整榜单并更新本地缓存（缓存未过期时跳过），之后 find_by_name_back_markdown 在内存中检索
+
+        Args:
+            rankings: 榜单列表，如 jobs() 的结果
+            ttl: 榜单缓存的有效期（秒）
+            force: 是否忽略有效期强制刷新
+
+        Returns: 各榜单缓存的条数，如 {"ODQWW2BI": 1094}，没有缓存的榜单为0
+        """
+        counts = {}
+        for ranking in rankings:
+            index = await refresh_ranking_cache(self, ranking, ttl=ttl, force=force)
+            counts[ranking["num"]] = len(index) if index is not None else 0
+        return counts
+
+    async def search_rankings(self, num: str, query: str, limit: int = RANK_PAGE_SIZE) -> list:
+        """
+        通过接口的search参数检索榜单
 
         Args:
             num: 榜单编码
+            query: 检索的关键词，如 "任正非"
+            limit: 最多返回的条数
 
-        Returns: markdown格式，如果找不到记录返回空
+        Returns: 榜单记录，如果找不到记录返回空
+        """
+        try:
+            async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
+                page = await self.fetch_rank_page(session, num, 0, limit, search=query)
+                return page["rows"] if page else []
+        except Exception as e:
+            logging.exception(f"发生错误: {e}")
+            return []
 
+    async def find_rankings(self, num: str, offset: int = 0, limit: int = RANK_PAGE_SIZE) -> list:
         """
-        # 定义请求头
-        headers = COMMON_HEADERS.copy()
-        url = self.base_url_query.format(num=num)
+        通过num来查询对应的榜单
+
+        Args:
+            num: 榜单编码
+            offset: 从第几条开始
+            limit: 条数，默认为前20条
+
+        Returns: 榜单记录，如果找不到记录返回空
 
+        """
         try:
             async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        dic = await response.json()
-                        return dic["rows"]
-                    else:
-                        logging.error(f"请求失败，状态码: {response.status}")
-                        return []
+                page = await self.fetch_rank_page(session, num, offset, limit)
+                return page["rows"] if page else []
         except Exception as e:
             logging.exception(f"发生错误: {e}")
             return []
 
+    async def fetch_rank_page(self, session: aiohttp.ClientSession, num: str, offset: int, limit: int,
+                              search: str = "") -> Optional[dict]:
+        """
+        获取榜单的一页
+
+        Args:
+            session: ClientSession
+            num: 榜单编码
+            offset: 从第几条开始
+            limit: 条数
+            search: 检索的关键词，为空时不过滤
+
+        Returns: {"total": 总条数, "rows": [...]}，请求失败返回None
+        """
+        # 定义请求头
+        headers = COMMON_HEADERS.copy()
+        url = self.base_url_query.format(num=num, search=quote(search), offset=offset, limit=limit)
+        await self.rate_limiter.acquire(url)
+        async with session.get(url, headers=headers) as response:
+            if response.status == 200:
+                dic = await response.json(content_type=None)
+                return {"total": int(dic.get("total") or 0), "rows": dic.get("rows") or []}
+            else:
+                logging.error(f"请求失败，状态码: {response.status}, offset: {offset}")
+                return None
+
+    async def fetch_rank_page_with_retry(self, session: aiohttp.ClientSession, num: str, offset: int, limit: int,
+                                         expected: Optional[int] = None) -> dict:
+        """
+        获取榜单的一页，请求失败或条数少于 expected 时重试
+
+        Returns: {"total": 总条数, "rows": [...]}，重试后仍然失败时抛出 RuntimeError
+        """
+        error = ""
+        for attempt in range(RANK_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(RANK_RETRY_DELAY * attempt)
+            try:
+                page = await self.fetch_rank_page(session, num, offset, limit)
+            except Exception as e:
+                logging.exception(f"获取榜单失败: {num}, offset: {offset}, {e}")
+                error = str(e)
+                continue
+            if page is None:
+                error = "请求失败"
+            elif expected is not None and len(page["rows"]) < expected:
+                error = f"条数不足: {len(page['rows'])} < {expected}"
+            else:
+                return page
+        raise RuntimeError(f"获取榜单失败: {num}, offset: {offset}, {error}")
+
+    async def iter_rank_pages(self, num: str, page_size: int = RANK_FULL_PAGE_SIZE,
+                              concurrency: int = RANK_CONCURRENCY,
+                              max_rows: Optional[int] = None) -> AsyncIterator[Tuple[int, List[dict]]]:
+        """逐页返回完整榜单 (offset, rows)，参数和异常见 iter_rank_pages_with_total"""
+        async for offset, rows, _ in self.iter_rank_pages_with_total(num, page_size, concurrency, max_rows):
+            yield offset, rows
+
+    async def iter_rank_pages_with_total(self, num: str, page_size: int = RANK_FULL_PAGE_SIZE,
+                                         concurrency: int = RANK_CONCURRENCY,
+                                         max_rows: Optional[int] = None) -> AsyncIterator[Tuple[int, List[dict], int]]:
+        """
+        获取完整榜单：先请求第一页得到总条数，再并发请求其余各页（受限速器控制），每返回一页就交给调用方
+
+        Args:
+            num: 榜单编码
+            page_size: 每页条数（服务端返回的条数更少时按实际条数分页）
+            concurrency: 同时请求的页数
+            max_rows: 最多获取的条数，默认为整个榜单
+
+        Returns: 按返回的先后顺序逐页返回 (offset, rows, total)，total为要获取的总条数，不保证offset有序；调用方提前结束迭代时会取消未完成的请求。
+                 某一页重试后仍然失败时抛出 RuntimeError，不会返回缺页的榜单
+        """
+        async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
+            first = await self.fetch_rank_page_with_retry(session, num, 0, page_size)
+            if not first["rows"]:
+                return
+            total = first["total"] or len(first["rows"])
+            if max_rows is not None:
+                total = min(total, max_rows)
+            # 服务端可能限制了每页的最大条数，按实际返回的条数计算后续的offset
+            if len(first["rows"]) < page_size and len(first["rows"]) < total:
+                page_size = len(first["rows"])
+            yield 0, first["rows"][:total], total
+
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+
+            async def _fetch(offset: int) -> Tuple[int, List[dict]]:
+                async with semaphore:
+                    page = await self.fetch_rank_page_with_retry(session, num, offset, page_size,
+                                                                 expected=min(page_size, total - offset))
+                return offset, page["rows"]
+
+            tasks = [asyncio.create_task(_fetch(offset)) for offset in range(page_size, total, page_size)]
+            try:
+                for future in asyncio.as_completed(tasks):
+                    offset, rows = await future
+                    yield offset, rows[:total - offset], total
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def iter_rankings(self, num: str, page_size: int = RANK_FULL_PAGE_SIZE,
+                            concurrency: int = RANK_CONCURRENCY,
+                            max_rows: Optional[int] = None) -> AsyncIterator[dict]:
+        """逐条返回完整榜单的记录（按各页返回的先后顺序），参数同 iter_rank_pages"""
+        async for _, rows in self.iter_rank_pages(num, page_size, concurrency, max_rows):
+            for row in rows:
+                yield row
+
+    async def find_all_rankings(self, num: str, page_size: int = RANK_FULL_PAGE_SIZE,
+                                concurrency: int = RANK_CONCURRENCY, max_rows: Optional[int] = None) -> list:
+        """
+        获取完整榜单
+
+        Returns: 按榜单顺序排列的所有记录；某一页获取失败时抛出 RuntimeError
+        """
+        return (await self.fetch_full_ranking(num, page_size, concurrency, max_rows))["rows"]
+
+    async def fetch_full_ranking(self, num: str, page_size: int = RANK_FULL_PAGE_SIZE,
+                                 concurrency: int = RANK_CONCURRENCY, max_rows: Optional[int] = None) -> dict:
+        """
+        获取完整榜单，并确认条数与总条数一致
+
+        Returns: {"total": 总条数, "rows": 按榜单顺序排列的所有记录}；某一页获取失败或条数不一致时抛出 RuntimeError
+        """
+        pages = {}
+        total = 0
+        async for offset, rows, total in self.iter_rank_pages_with_total(num, page_size, concurrency, max_rows):
+            pages[offset] = rows
+        rows = [row for offset in sorted(pages) for row in pages[offset]]
+        if len(rows) != total:
+            raise RuntimeError(f"榜单条数不完整: {num}, {len(rows)} / {total}")
+        return {"total": total, "rows": rows}
+
 
 def jobs(is_update: bool = False) -> list:
     """
@@ -157,6 +390,81 @@ def jobs(is_update: bool = False) -> list:
         return []
 
 
+def match_ranking(query: str) -> dict:
+    """
+    按名称、页面类型或编码匹配榜单
+
+    Returns: 如 {"page_type": "rich", "num": "ODQWW2BI", "name": "胡润百富榜单"}，找不到时返回空
+    """
+    if not query or not query.strip():
+        return {}
+    for row in jobs():
+        # {"page_type": "rich", "num": "ODQWW2BI", "name": "胡润百富榜单"}
+        if query in row.get("name") or query in row.get("page_type") or query in row.get("num"):
+            return row
+    return {}
+
+
+def full_rankings(query: str, max_rows: Optional[int] = None) -> list:
+    """
+    获取完整榜单（不只是前20条）
+
+    Args:
+        query: 榜单名称、页面类型或编码，如 "胡润百富榜"、"ctop500"
+        max_rows: 最多获取的条数，默认为整个榜单
+
+    Returns: 按榜单顺序排列的所有记录，找不到榜单时返回空；某一页获取失败时抛出 RuntimeError
+
+    """
+    ranking = match_ranking(query)
+    if not ranking:
+        return []
+    return asyncio.run(CsbUtils().find_all_rankings(ranking["num"], max_rows=max_rows))
+
+
+def warm_up_rankings(query: str = "", force: bool = False) -> Dict[str, int]:
+    """
+    下载完整榜单并更新本地缓存，按人名、企业名称检索时使用（crawl 不会自动下载完整榜单）
+
+    Args:
+        query: 榜单名称、页面类型或编码，为空时更新所有榜单
+        force: 是否忽略有效期强制刷新
+
+    Returns: 各榜单缓存的条数，如 {"ODQWW2BI": 1094}
+
+    """
+    rankings = [match_ranking(query)] if query else jobs()
+    rankings = [ranking for ranking in rankings if ranking]
+    return asyncio.run(CsbUtils().warm_up_rankings(rankings, force=force))
+
+
+def ranking_movers(query: str, version: Optional[int] = None, since: Optional[int] = None, by: str = "rank",
+                   limit: Optional[int] = 10, rising: bool = True) -> list:
+    """
+    从本地保存的榜单历史版本中查询排名/财富变化最大的记录（不请求网站）
+
+    历史版本在更新榜单缓存（warm_up_rankings）时自动保存
+
+    Args:
+        query: 榜单名称、页面类型或编码，如 "胡润百富榜"、"ctop500"
+        version: 版本号，为空时为最新版本
+        since: 对比的版本号，为空时为上一版本
+        by: rank / wealth
+        limit: 最多返回的数量，为空时返回全部
+        rising: True为上升最多，False为下降最多
+
+    Returns: 如 [{"key": "张三|男|房地产", "rank": [10, 3], "wealth": [500, 800], "rise": 7}]，找不到榜单或历史版本时返回空
+
+    """
+    ranking = match_ranking(query)
+    if not ranking:
+        return []
+    history = get_ranking_history(ranking)
+    if history.latest_version < 2:
+        return []
+    return history.movers(version, since, by, limit, rising)
+
+
 def crawl(query: str) -> Dict[str, str]:
     """
     Performs a crawl operation based on the given query string.
@@ -172,21 +480,14 @@ def crawl(query: str) -> Dict[str, str]:
     if not query or not query.strip():
         return {"query": query, "result": "", "url": ""}
 
-    # 获取岗位列表
-    rankings_names = jobs()
-    if not rankings_names:
-        return {"query": query, "result": "", "url": ""}
-    # 匹配出岗位代码和岗位名称
-    page_type = ""
-    num = ""
-    name = ""
-    for row in rankings_names:
-        # {"page_type": "rich", "num": "ODQWW2BI", "name": "胡润百富榜单"}
-        if query in row.get("name") or query in row.get("page_type") or query in row.get("num"):
-            page_type = row.get("page_type")
-            num = row.get("num")
-            name = row.get("name")
-            break
+    # 匹配出榜单
+    ranking = match_ranking(query)
+    if not ranking:
+        # 不是榜单名称：按人名、企业名称等在各个榜单中检索
+        return asyncio.run(CsbUtils().find_by_name_back_markdown(query, jobs()))
+    page_type = ranking.get("page_type", "")
+    num = ranking.get("num", "")
+    name = ranking.get("name", "")
 
     # 初始化工具
     job_utils = CsbUtils()
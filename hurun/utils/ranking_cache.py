@@ -0,0 +1,212 @@
+"""
+榜单本地缓存：完整榜单保存到本地（带过期时间），并按人名（百富榜）、企业名称和CEO（中国500强）、行业建立倒排索引，在内存中检索
+"""
+import json
+import logging
+import os
+import pathlib
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from .ranking_columns import RankingColumns
+from .ranking_history import RANKING_HISTORY_DIR, record_ranking_version
+
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+# 缓存目录：每个榜单一个文件 <num>.json
+RANKING_CACHE_DIR = SCRIPT_ROOT / "rankings_cache"
+# 缓存有效期（秒），榜单每年发布一次，默认一周刷新一次
+RANKING_CACHE_TTL = 7 * 24 * 3600
+# 各类榜单参与检索的列（RankingColumns 的列名），靠前的列匹配优先
+INDEX_FIELDS = {
+    "rich": ["person", "industry"],
+    "ctop500": ["company", "person", "industry"],
+}
+
+
+def normalize_key(text) -> str:
+    """检索用的key：去掉空白、忽略大小写"""
+    return "".join(str(text or "").split()).casefold()
+
+
+def ngrams(text: str) -> Set[str]:
+    """单字和相邻两个字，中文人名、企业名称按字检索"""
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class RankingIndex:
+    """
+    单个榜单的倒排索引
+
+    索引的key为字段值中的单字和相邻两字：查询时先用查询词的两字组合（只有一个字时用单字）求交集得到候选，
+    再确认字段中包含完整的查询词
+    """
+
+    def __init__(self, ranking: dict, columns: RankingColumns, fetched_at: float = 0):
+        self.ranking = ranking
+        self.page_type = ranking.get("page_type", "")
+        self.columns = columns
+        self.fetched_at = fetched_at
+        self.fields = INDEX_FIELDS.get(self.page_type, [])
+        # 每行每个字段的key
+        self._keys: List[List[str]] = [[normalize_key(self._field(f, i)) for f in self.fields]
+                                       for i in range(len(columns))]
+        self._index: Dict[str, Set[int]] = {}
+        for i, keys in enumerate(self._keys):
+            for key in keys:
+                for gram in ngrams(key):
+                    self._index.setdefault(gram, set()).add(i)
+
+    def _field(self, field: str, i: int) -> str:
+        if field == "industry":
+            return self.columns.value(field, i)
+        return getattr(self.columns, field)[i]
+
+    def __len__(self):
+        return len(self.columns)
+
+    def is_expired(self, ttl: float = RANKING_CACHE_TTL) -> bool:
+        return time.time() - self.fetched_at > ttl
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        检索人名、企业名称、CEO或行业包含查询词的记录
+
+        Args:
+            query: 如 "任正非"、"华为"、"汽车"
+            limit: 最多返回的数量，为空时返回全部
+
+        Returns: 按匹配程度（字段完全相同优先、人名/企业名称优先于行业）和榜单顺序排列的记录（RankingColumns.row）
+        """
+        return [self.columns.row(i) for i in self.search_ids(query, limit)]
+
+    def search_ids(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """同 search，返回 columns 中的行号"""
+        key = normalize_key(query)
+        if not key:
+            return []
+        grams = {key} if len(key) == 1 else {key[i:i + 2] for i in range(len(key) - 1)}
+        ids: Optional[Set[int]] = None
+        for gram in sorted(grams, key=lambda g: len(self._index.get(g, ()))):
+            matched = self._index.get(gram)
+            if not matched:
+                return []
+            ids = set(matched) if ids is None else ids & matched
+            if not ids:
+                return []
+        ranked: List[Tuple[int, int, int]] = []
+        for i in ids:
+            for f, field_key in enumerate(self._keys[i]):
+                if key in field_key:
+                    ranked.append((0 if field_key == key else 1, f, i))
+                    break
+        ranked.sort()
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [i for _, _, i in ranked]
+
+
+def cache_path(num: str, cache_dir: pathlib.Path = RANKING_CACHE_DIR) -> pathlib.Path:
+    return pathlib.Path(cache_dir) / f"{num}.json"
+
+
+def load_ranking_cache(ranking: dict, cache_dir: pathlib.Path = RANKING_CACHE_DIR) -> Optional[RankingIndex]:
+    """加载榜单缓存，不存在时返回None"""
+    path = cache_path(ranking["num"], cache_dir)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            dic = json.load(f)
+    except Exception as e:
+        logging.exception(f"加载榜单缓存异常: {path}, {e}")
+        return None
+    if "columns" in dic:
+        columns = RankingColumns.from_dict(dic["columns"])
+    else:
+        # 旧格式：保存的是接口返回的原始记录
+        columns = RankingColumns.from_rows(ranking.get("page_type", ""), dic.get("rows") or [])
+    return RankingIndex(ranking, columns, dic.get("fetched_at") or 0)
+
+
+def save_ranking_cache(index: RankingIndex, cache_dir: pathlib.Path = RANKING_CACHE_DIR):
+    """保存榜单缓存（列式结构，先写临时文件再替换）"""
+    path = cache_path(index.ranking["num"], cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"ranking": index.ranking, "fetched_at": index.fetched_at, "columns": index.columns.to_dict()}, f,
+                  ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# 进程内的榜单索引：num => (文件修改时间, 索引)
+_INDEXES: Dict[str, Tuple[Optional[int], RankingIndex]] = {}
+
+
+def get_ranking_index(ranking: dict, cache_dir: pathlib.Path = RANKING_CACHE_DIR,
+                      ttl: Optional[float] = None) -> Optional[RankingIndex]:
+    """
+    进程内共享的榜单索引，缓存文件有更新时重新加载
+
+    Args:
+        ranking: 榜单
+        cache_dir: 缓存目录
+        ttl: 缓存有效期（秒），缓存过期时返回None；为空时不检查有效期
+
+    Returns: 榜单索引，没有缓存（或缓存已过期）时返回None
+    """
+    num = ranking["num"]
+    try:
+        mtime = os.stat(cache_path(num, cache_dir)).st_mtime_ns
+    except OSError:
+        return None
+    cached = _INDEXES.get(num)
+    if cached is None or cached[0] != mtime:
+        index = load_ranking_cache(ranking, cache_dir)
+        if index is None:
+            return None
+        _INDEXES[num] = (mtime, index)
+    index = _INDEXES[num][1]
+    if ttl is not None and index.is_expired(ttl):
+        logging.warning(f"榜单缓存已过期，不再使用，可以用 warm_up_rankings 刷新: {ranking.get('name')}")
+        return None
+    return index
+
+
+async def refresh_ranking_cache(hurun_utils, ranking: dict, ttl: float = RANKING_CACHE_TTL, force: bool = False,
+                                cache_dir: pathlib.Path = RANKING_CACHE_DIR,
+                                history_dir: Optional[pathlib.Path] = RANKING_HISTORY_DIR) -> Optional[RankingIndex]:
+    """
+    获取榜单索引：缓存未过期时直接使用，否则下载完整榜单并更新缓存；
+    下载失败或条数与榜单总条数不一致时不更新缓存，继续使用旧的缓存
+
+    下载的榜单有变化时同时保存为榜单历史的新版本（ranking_history）
+
+    Args:
+        hurun_utils: hurun_utils.CsbUtils
+        ranking: 榜单，如 {"page_type": "rich", "num": "ODQWW2BI", "name": "胡润百富榜单"}
+        ttl: 缓存有效期（秒）
+        force: 是否忽略有效期强制刷新
+        cache_dir: 缓存目录
+        history_dir: 历史版本目录，为空时不保存历史版本
+
+    Returns: 榜单索引，没有缓存且下载失败时返回None
+    """
+    index = get_ranking_index(ranking, cache_dir)
+    if index is not None and not force and not index.is_expired(ttl):
+        return index
+    try:
+        full = await hurun_utils.fetch_full_ranking(ranking["num"])
+    except Exception as e:
+        logging.exception(f"下载榜单异常: {ranking.get('name')}, {e}")
+        return index
+    rows = full["rows"]
+    if not rows or len(rows) != full["total"]:
+        # 不完整的榜单会让检索漏掉记录，不保存
+        logging.error(f"榜单不完整，不更新缓存: {ranking.get('name')}, {len(rows)} / {full['total']}")
+        return index
+    fresh = RankingIndex(ranking, RankingColumns.from_rows(ranking.get("page_type", ""), rows), time.time())
+    save_ranking_cache(fresh, cache_dir)
+    if history_dir is not None:
+        record_ranking_version(ranking, fresh.columns, full["total"], history_dir=history_dir)
+    return get_ranking_index(ranking, cache_dir) or fresh
@@ -0,0 +1,279 @@
+"""
+榜单的列式存储：只保留用到的字段，排名、财富等数值存为 array，字符串驻留，行业等重复较多的字段按字典编码
+"""
+import heapq
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# 各类榜单用到的字段 => 列名（只使用榜单页面原来就读取的字段，没有的字段对应的列为空）
+RANK_FIELDS = {
+    "rich": {
+        "rank": "hs_Rank_Rich_Ranking",
+        "wealth": "hs_Rank_Rich_Wealth",
+        "change": "hs_Rank_Rich_Ranking_Change",
+        "person": "hs_Rank_Rich_ChaName_Cn",
+        "industry": "hs_Rank_Rich_Industry_Cn",
+    },
+    "ctop500": {
+        "rank": "hs_Rank_CTop500_Ranking",
+        "wealth": "hs_Rank_CTop500_Wealth",
+        "person": "hs_Rank_CTop500_ChaName_Cn",
+        "company": "hs_Rank_CTop500_ComName_Cn",
+        "industry": "hs_Rank_CTop500_Industry_Cn",
+    },
+}
+# 字典编码的列
+CODED_COLUMNS = ("industry", "gender", "age")
+
+
+def _intern(value) -> str:
+    return sys.intern(str(value)) if value is not None else ""
+
+
+def _number(value):
+    """数值字段：保留原来的int/float类型，不是数值时为0"""
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """对象及其引用的dict/list/str等占用的内存（字节），相同对象只计算一次"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+class RankingColumns:
+    """
+    单个榜单的列式存储
+
+    每一行为榜单中的一条记录，行号即原始顺序；rank/wealth 为 array，wealth 统一存为 'd'，
+    另用 wealth_is_int（'b'）标记原来是整数的值，输出时还原为int（见 wealth_value），
+    person/company 以及 change（原始的排名变化文本，可能不是数字）为驻留的字符串列表，
+    industry/gender/age 为字典编码（codes + values）
+    """
+
+    def __init__(self, page_type: str):
+        self.page_type = page_type
+        self.rank = array("i")
+        self.wealth = array("d")
+        self.wealth_is_int = array("b")
+        self.change: List[str] = []
+        self.person: List[str] = []
+        self.company: List[str] = []
+        # 字典编码：列名 => (编码数组, 取值列表)
+        self._codes: Dict[str, array] = {c: array("H") for c in CODED_COLUMNS}
+        self._values: Dict[str, List[str]] = {c: [] for c in CODED_COLUMNS}
+        self._value_ids: Dict[str, Dict[str, int]] = {c: {} for c in CODED_COLUMNS}
+
+    def __len__(self):
+        return len(self.rank)
+
+    def _encode(self, column: str, value: str) -> int:
+        ids = self._value_ids[column]
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(self._values[column])
+            self._values[column].append(sys.intern(value))
+        return code
+
+    def _append_wealth(self, value):
+        self.wealth.append(value)
+        self.wealth_is_int.append(isinstance(value, int))
+
+    def wealth_value(self, i: int):
+        """第i行的财富，保留原来的int/float类型"""
+        return int(self.wealth[i]) if self.wealth_is_int[i] else self.wealth[i]
+
+    def value(self, column: str, i: int) -> str:
+        """字典编码列第i行的值"""
+        return self._values[column][self._codes[column][i]]
+
+    def values(self, column: str) -> List[str]:
+        """字典编码列的所有取值"""
+        return list(self._values[column])
+
+    @classmethod
+    def from_rows(cls, page_type: str, rows: Iterable[dict]) -> "RankingColumns":
+        """从接口返回的记录构建，只保留用到的字段"""
+        columns = cls(page_type)
+        fields = RANK_FIELDS.get(page_type, {})
+        for row in rows:
+            character = (row.get("hs_Character") or [{}])[0] or {}
+            columns.rank.append(int(_number(row.get(fields.get("rank")))))
+            columns._append_wealth(_number(row.get(fields.get("wealth"))))
+            columns.change.append(_intern(row.get(fields.get("change"))))
+            columns.person.append(_intern(row.get(fields.get("person"))))
+            columns.company.append(_intern(row.get(fields.get("company"))))
+            columns._codes["industry"].append(columns._encode("industry", _intern(row.get(fields.get("industry")))))
+            columns._codes["gender"].append(columns._encode("gender", _intern(character.get("hs_Character_Gender"))))
+            columns._codes["age"].append(columns._encode("age", _intern(character.get("hs_Character_Age"))))
+        return columns
+
+    @classmethod
+    def from_records(cls, page_type: str, records: Iterable[dict]) -> "RankingColumns":
+        """从 row() 格式的记录构建"""
+        columns = cls(page_type)
+        for record in records:
+            columns.rank.append(int(record["rank"]))
+            columns._append_wealth(record["wealth"])
+            columns.change.append(_intern(record["change"]))
+            columns.person.append(sys.intern(record["person"]))
+            columns.company.append(sys.intern(record["company"]))
+            for c in CODED_COLUMNS:
+                columns._codes[c].append(columns._encode(c, record[c]))
+        return columns
+
+    def to_dict(self) -> dict:
+        """转换为可以保存为json的列式结构"""
+        return {
+            "page_type": self.page_type,
+            "rank": self.rank.tolist(),
+            "wealth": [self.wealth_value(i) for i in range(len(self))],
+            "change": self.change,
+            "person": self.person,
+            "company": self.company,
+            "codes": {c: self._codes[c].tolist() for c in CODED_COLUMNS},
+            "values": self._values,
+        }
+
+    @classmethod
+    def from_dict(cls, dic: dict) -> "RankingColumns":
+        """从 to_dict() 的结果构建"""
+        columns = cls(dic["page_type"])
+        columns.rank = array("i", dic["rank"])
+        for value in dic["wealth"]:
+            columns._append_wealth(value)
+        columns.change = [_intern(s) for s in dic["change"]]
+        columns.person = [sys.intern(s) for s in dic["person"]]
+        columns.company = [sys.intern(s) for s in dic["company"]]
+        for c in CODED_COLUMNS:
+            columns._values[c] = [sys.intern(s) for s in dic["values"][c]]
+            columns._value_ids[c] = {v: i for i, v in enumerate(columns._values[c])}
+            columns._codes[c] = array("H", dic["codes"][c])
+        return columns
+
+    def filter(self, industry: Optional[str] = None, min_wealth: Optional[float] = None,
+               max_wealth: Optional[float] = None) -> List[int]:
+        """
+        按行业、财富区间过滤
+
+        Args:
+            industry: 行业（完全相同）
+            min_wealth: 最低财富
+            max_wealth: 最高财富
+
+        Returns: 符合条件的行号（原始顺序）
+        """
+        ids = range(len(self))
+        if industry is not None:
+            code = self._value_ids["industry"].get(industry)
+            if code is None:
+                return []
+            codes = self._codes["industry"]
+            ids = [i for i in ids if codes[i] == code]
+        wealth = self.wealth
+        if min_wealth is not None:
+            ids = [i for i in ids if wealth[i] >= min_wealth]
+        if max_wealth is not None:
+            ids = [i for i in ids if wealth[i] <= max_wealth]
+        return list(ids)
+
+    def sort(self, by: str = "wealth", reverse: bool = True, ids: Optional[Sequence[int]] = None) -> List[int]:
+        """
+        排序
+
+        Args:
+            by: rank / wealth / change（change 按数值排序，不是数字的为0）
+            reverse: 是否从大到小
+            ids: 参与排序的行号，为空时为所有行
+
+        Returns: 排序后的行号
+        """
+        return sorted(range(len(self)) if ids is None else ids, key=self._sort_key(by), reverse=reverse)
+
+    def _sort_key(self, by: str):
+        if by == "change":
+            return lambda i: _number(self.change[i])
+        return getattr(self, by).__getitem__
+
+    def top_k(self, k: int, by: str = "wealth", industry: Optional[str] = None) -> List[int]:
+        """按 by 从大到小取前k行，可以限定行业"""
+        ids = self.filter(industry=industry) if industry is not None else range(len(self))
+        return heapq.nlargest(k, ids, key=self._sort_key(by))
+
+    def industry_totals(self) -> Dict[str, float]:
+        """各行业的财富合计"""
+        totals = [0] * len(self._values["industry"])
+        for i, code in enumerate(self._codes["industry"]):
+            totals[code] += self.wealth_value(i)
+        return dict(zip(self._values["industry"], totals))
+
+    def row(self, i: int) -> dict:
+        """第i行转换为dict"""
+        return {
+            "rank": self.rank[i],
+            "wealth": self.wealth_value(i),
+            "change": self.change[i],
+            "person": self.person[i],
+            "company": self.company[i],
+            "industry": self.value("industry", i),
+            "gender": self.value("gender", i),
+            "age": self.value("age", i),
+        }
+
+    def records(self) -> List[dict]:
+        """所有行转换为dict"""
+        return [self.row(i) for i in range(len(self))]
+
+    def markdown_lines(self, ids: Optional[Iterable[int]] = None) -> List[str]:
+        """榜单的csv格式行（含表头），不支持的榜单类型返回空"""
+        ids = range(len(self)) if ids is None else ids
+        if self.page_type == "rich":
+            # 百富榜
+            lines = ["排名,财富(￥),排名变化,个人信息,企业信息"]
+            for i in ids:
+                industry = self.value("industry", i)
+                line = [
+                    str(self.rank[i]),
+                    str(self.wealth_value(i)),
+                    self.change[i],
+                    f"{self.person[i]} {self.value('gender', i)} {self.value('age', i)}岁",
+                    f"{industry} 行业：{industry}",
+                ]
+                lines.append(",".join(line).replace("\n", " "))
+        elif self.page_type == "ctop500":
+            # 中国500强
+            lines = ["排名,企业估值(￥),企业信息,CEO,行业"]
+            for i in ids:
+                line = [
+                    str(self.rank[i]),
+                    str(self.wealth_value(i)),
+                    self.company[i],
+                    self.person[i],
+                    self.value("industry", i),
+                ]
+                lines.append(",".join(line).replace("\n", " "))
+        else:
+            return []
+        return lines
+
+    def memory_bytes(self) -> int:
+        """占用的内存（字节）"""
+        return deep_sizeof([self.rank, self.wealth, self.wealth_is_int, self.change, self.person,
+                            self.company, self._codes, self._values, self._value_ids])
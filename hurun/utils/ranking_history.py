@@ -0,0 +1,290 @@
+"""
+榜单历史版本：每次下载到有变化的榜单时保存一个新版本，只保存与上一版本的差异（新上榜、落榜、排名/财富等变化）
+
+可以按需重建任意版本，并且不用重新下载或比较完整的json就能查询排名/财富变化最大的记录
+"""
+import json
+import logging
+import os
+import pathlib
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .ranking_columns import RankingColumns
+
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+# 历史版本目录：每个榜单一个文件 <num>.json
+RANKING_HISTORY_DIR = SCRIPT_ROOT / "rankings_history"
+# 历史文件格式的版本，格式不同的旧文件不再使用
+RANKING_HISTORY_FORMAT = 4
+# 各类榜单中识别同一条记录的列，只用各版本之间不变的列：百富榜为人名+性别（行业的写法每年可能调整，不作为key），
+# 中国500强为企业名称
+HISTORY_KEY = {
+    "rich": ("person", "gender"),
+    "ctop500": ("company",),
+}
+
+
+def record_key(page_type: str, record: dict) -> str:
+    """记录的key，如 "张三|先生" """
+    return "|".join(str(record[f]) for f in HISTORY_KEY.get(page_type, ("person",)))
+
+
+def records_by_key(page_type: str, records: List[dict]) -> Dict[str, dict]:
+    """记录按 record_key 转换为 {key: record}，key完全相同的记录（极少）按排名先后加上序号"""
+    dic: Dict[str, dict] = {}
+    for record in records:
+        base_key = key = record_key(page_type, record)
+        n = 1
+        while key in dic:
+            n += 1
+            key = f"{base_key}#{n}"
+        dic[key] = record
+    return dic
+
+
+def diff_records(old: Dict[str, dict], new: Dict[str, dict]) -> dict:
+    """
+    两个版本的差异
+
+    Returns: {"added": {key: record}, "removed": [key, ...], "changed": {key: {列名: [旧值, 新值]}}}
+    """
+    added = {key: record for key, record in new.items() if key not in old}
+    removed = [key for key in old if key not in new]
+    changed = {}
+    for key, record in new.items():
+        old_record = old.get(key)
+        if old_record is None:
+            continue
+        fields = {f: [old_record.get(f), v] for f, v in record.items() if old_record.get(f) != v}
+        if fields:
+            changed[key] = fields
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def apply_delta(records: Dict[str, dict], delta: dict) -> Dict[str, dict]:
+    """在上一版本的记录上应用差异，返回新版本的记录（按排名排序）"""
+    records = dict(records)
+    for key in delta["removed"]:
+        records.pop(key, None)
+    for key, fields in delta["changed"].items():
+        records[key] = {**records[key], **{f: values[1] for f, values in fields.items()}}
+    records.update(delta["added"])
+    return dict(sorted(records.items(), key=lambda item: item[1]["rank"]))
+
+
+class RankingHistory:
+    """
+    单个榜单的历史版本
+
+    文件格式::
+
+        {
+          "format": 4,
+          "ranking": {"page_type": "rich", "num": "ODQWW2BI", "name": "胡润百富榜单"},
+          "base": {"version": 1, "label": "2024-11-01", "saved_at": "...", "records": {key: record}},
+          "deltas": [
+            {"version": 2, "label": "2025-10-30", "saved_at": "...", "added": {...}, "removed": [...], "changed": {...}}
+          ]
+        }
+
+    record 为 RankingColumns.row() 的格式
+    """
+
+    def __init__(self, ranking: dict, base: Optional[dict] = None, deltas: Optional[List[dict]] = None):
+        self.ranking = ranking
+        self.page_type = ranking.get("page_type", "")
+        self.base = base
+        self.deltas: List[dict] = deltas or []
+        # 最新版本的记录，避免每次都从第一个版本开始重建
+        self._latest: Optional[Tuple[int, Dict[str, dict]]] = None
+
+    @property
+    def latest_version(self) -> int:
+        """最新的版本号，没有版本时为0"""
+        if self.deltas:
+            return self.deltas[-1]["version"]
+        return self.base["version"] if self.base else 0
+
+    def versions(self) -> List[dict]:
+        """所有版本，如 [{"version": 1, "label": "2024-11-01", "saved_at": "..."}]"""
+        entries = ([self.base] if self.base else []) + self.deltas
+        return [{"version": e["version"], "label": e["label"], "saved_at": e["saved_at"]} for e in entries]
+
+    def delta(self, version: int) -> dict:
+        """某个版本相对上一版本的差异，第一个版本没有差异"""
+        for delta in self.deltas:
+            if delta["version"] == version:
+                return delta
+        raise KeyError(f"没有版本 {version} 的差异")
+
+    def _check_version(self, version: int):
+        if not 1 <= version <= self.latest_version:
+            raise ValueError(f"没有版本 {version}，版本号为 1 ~ {self.latest_version}")
+
+    def _records(self, version: Optional[int] = None) -> Dict[str, dict]:
+        if not self.base:
+            return {}
+        version = self.latest_version if version is None else version
+        self._check_version(version)
+        if self._latest is not None and self._latest[0] == version:
+            return self._latest[1]
+        records = self.base["records"]
+        for delta in self.deltas:
+            if delta["version"] > version:
+                break
+            records = apply_delta(records, delta)
+        if version == self.latest_version:
+            self._latest = (version, records)
+        return records
+
+    def rebuild(self, version: Optional[int] = None) -> RankingColumns:
+        """
+        重建某个版本的榜单
+
+        Args:
+            version: 版本号，为空时为最新版本
+
+        Returns: 列式榜单，没有版本时为空；版本号不存在时抛出 ValueError
+        """
+        return RankingColumns.from_records(self.page_type, self._records(version).values())
+
+    def add_version(self, columns: RankingColumns, label: str = "") -> Optional[dict]:
+        """
+        保存新版本（只保存与最新版本的差异），需要调用 save() 保存到文件
+
+        Args:
+            columns: 新下载的榜单
+            label: 版本说明，如榜单年份，默认为当天日期
+
+        Returns: 新版本的差异，与最新版本相同时不保存并返回None
+        """
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        label = label or time.strftime("%Y-%m-%d")
+        records = records_by_key(self.page_type, columns.records())
+        if not self.base:
+            self.base = {"version": 1, "label": label, "saved_at": now, "records": records}
+            self._latest = (1, records)
+            return {"version": 1, "label": label, "saved_at": now, "added": records, "removed": [], "changed": {}}
+        delta = diff_records(self._records(), records)
+        if not delta["added"] and not delta["removed"] and not delta["changed"]:
+            return None
+        version = self.latest_version + 1
+        delta = {"version": version, "label": label, "saved_at": now, **delta}
+        self.deltas.append(delta)
+        self._latest = (version, dict(sorted(records.items(), key=lambda item: item[1]["rank"])))
+        return delta
+
+    def movers(self, version: Optional[int] = None, since: Optional[int] = None, by: str = "rank",
+               limit: Optional[int] = 10, rising: bool = True) -> List[dict]:
+        """
+        排名/财富变化最大的记录（两个版本中都在榜的记录）
+
+        Args:
+            version: 版本号，为空时为最新版本；第一个版本之前没有版本可以对比，since 为空时返回空
+            since: 对比的版本号，为空时为上一版本（直接使用保存的差异）
+            by: rank / wealth
+            limit: 最多返回的数量，为空时返回全部
+            rising: True为上升最多，False为下降最多
+
+        Returns: 如 [{"key": "张三|先生", "rank": [10, 3], "wealth": [500, 800], "rise": 7}]，
+                 rise为排名上升的名次或财富增加的数值；version/since 不是已有的版本号（如0）时抛出 ValueError
+        """
+        if not self.base:
+            return []
+        version = self.latest_version if version is None else version
+        self._check_version(version)
+        if since is None:
+            if version == 1:
+                return []
+            since = version - 1
+        self._check_version(since)
+        if since == version - 1:
+            changed = self.delta(version)["changed"]
+        else:
+            changed = diff_records(self._records(since), self._records(version))["changed"]
+        results = []
+        for key, fields in changed.items():
+            if by not in fields:
+                continue
+            old, new = fields[by]
+            rise = old - new if by == "rank" else new - old
+            if (rise > 0) != rising or rise == 0:
+                continue
+            results.append({"key": key, **fields, "rise": rise})
+        results.sort(key=lambda r: (-r["rise"] if rising else r["rise"], r["key"]))
+        return results if limit is None else results[:limit]
+
+    @classmethod
+    def load(cls, ranking: dict, history_dir: pathlib.Path = RANKING_HISTORY_DIR) -> "RankingHistory":
+        """加载历史版本，文件不存在时返回空历史"""
+        path = history_path(ranking["num"], history_dir)
+        if not path.exists():
+            return cls(ranking)
+        with open(path, "r", encoding="utf-8") as f:
+            dic = json.load(f)
+        if dic.get("format") != RANKING_HISTORY_FORMAT:
+            logging.warning(f"榜单历史文件格式不同，重新开始记录: {path}")
+            return cls(ranking)
+        return cls(ranking, dic.get("base"), dic.get("deltas"))
+
+    def save(self, history_dir: pathlib.Path = RANKING_HISTORY_DIR):
+        """保存历史版本（先写临时文件再替换）"""
+        path = history_path(self.ranking["num"], history_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format": RANKING_HISTORY_FORMAT, "ranking": self.ranking, "base": self.base,
+                       "deltas": self.deltas}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def history_path(num: str, history_dir: pathlib.Path = RANKING_HISTORY_DIR) -> pathlib.Path:
+    return pathlib.Path(history_dir) / f"{num}.json"
+
+
+# 进程内的榜单历史：num => (文件修改时间, 历史版本)
+_HISTORIES: Dict[str, Tuple[Optional[int], RankingHistory]] = {}
+
+
+def get_ranking_history(ranking: dict, history_dir: pathlib.Path = RANKING_HISTORY_DIR) -> RankingHistory:
+    """进程内共享的榜单历史，文件有更新时重新加载"""
+    num = ranking["num"]
+    try:
+        mtime = os.stat(history_path(num, history_dir)).st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _HISTORIES.get(num)
+    if cached is None or cached[0] != mtime:
+        _HISTORIES[num] = (mtime, RankingHistory.load(ranking, history_dir))
+    return _HISTORIES[num][1]
+
+
+def record_ranking_version(ranking: dict, columns: RankingColumns, total: int, label: str = "",
+                           history_dir: pathlib.Path = RANKING_HISTORY_DIR) -> Optional[dict]:
+    """
+    榜单有变化时保存新版本
+
+    只保存完整的榜单：不完整的榜单会让缺少的记录变成“落榜”，下一个完整的版本又变成“新上榜”，排名变化就丢失了
+
+    Args:
+        ranking: 榜单
+        columns: 下载的榜单
+        total: 榜单的总条数，与 columns 的条数不一致时不保存
+        label: 版本说明
+        history_dir: 历史版本目录
+
+    Returns: 新版本的差异，与最新版本相同或榜单不完整时返回None
+    """
+    if len(columns) != total:
+        logging.error(f"榜单不完整，不保存历史版本: {ranking.get('name')}, {len(columns)} / {total}")
+        return None
+    try:
+        history = get_ranking_history(ranking, history_dir)
+        delta = history.add_version(columns, label)
+        if delta is not None:
+            history.save(history_dir)
+        return delta
+    except Exception as e:
+        logging.exception(f"保存榜单历史版本异常: {ranking.get('name')}, {e}")
+        return None
@@ -0,0 +1,88 @@
+"""
+按域名限速的令牌桶
+
+只有通用的实现，各网站的限速配置由使用的项目传入（如 cninfo_utils.HOST_LIMITS）；
+cninfo、hurun 的 utils 中各有一份相同的副本（各项目单独运行），修改时同步修改，见 cninfo/test_shared_utils.py
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# 默认限速（没有单独配置的域名）：每秒补充的令牌数（持续速率）、桶容量（突发请求数）
+DEFAULT_RATE = 0.5
+DEFAULT_CAPACITY = 3
+
+
+class TokenBucket:
+    """
+    令牌桶：以 rate 个/秒的速度补充令牌，最多积攒 capacity 个
+
+    acquire() 采用预约的方式：令牌不足时直接把余额记为负数，并按欠下的令牌数计算需要等待的时间，
+    因此不需要 asyncio.Lock，先到先得，也不绑定具体的事件循环
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: int = DEFAULT_CAPACITY):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"无效的限速配置: rate={rate}, capacity={capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """预约令牌，返回需要等待的秒数（0表示立即可用）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self, tokens: float = 1):
+        """获取令牌，不足时异步等待"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class HostRateLimiter:
+    """
+    按域名分别维护令牌桶，同一进程内的所有请求共享
+
+    Args:
+        limits: 各域名的限速配置 {域名: (持续速率, 突发容量)}，没有配置的域名使用默认限速
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default_rate: float = DEFAULT_RATE, default_capacity: int = DEFAULT_CAPACITY):
+        self.limits = dict(limits or {})
+        self.default_rate = default_rate
+        self.default_capacity = default_capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, rate: float, capacity: int):
+        """调整某个域名的限速配置"""
+        with self._lock:
+            self.limits[host] = (rate, capacity)
+            self._buckets[host] = TokenBucket(rate, capacity)
+
+    def bucket(self, host: str) -> TokenBucket:
+        """获取域名对应的令牌桶"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, capacity = self.limits.get(host, (self.default_rate, self.default_capacity))
+                bucket = TokenBucket(rate, capacity)
+                self._buckets[host] = bucket
+            return bucket
+
+    async def acquire(self, url: str):
+        """按url的域名获取令牌"""
+        await self.bucket(urlsplit(url).hostname or "").acquire()
+
@@ -12,3 +12,9 @@ from utils.jobsalary_utils import jobs, crawl
 # rs = crawl("經營管理主管")
 rs = crawl("營建工程人員")
 print(rs)
+
+# # 岗位索引：按岗位代码前缀、部分名称检索，列出某个分类下的所有岗位
+# from utils.jobsalary_utils import search_jobs, category_jobs
+# print(search_jobs("人力資源", limit=5))
+# print(search_jobs("1001"))
+# print(category_jobs("1001"))
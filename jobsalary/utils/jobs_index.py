@@ -0,0 +1,277 @@
+"""
+岗位分类索引：保留 大类(ct=1) > 中类(ct=2) > 岗位(ct=3) 的分类树，按代码/名称O(1)查找，支持前缀、部分名称检索和按分类列出岗位
+
+分类树保存在 jobs_menus.json 中（jobs(is_update=True) 写入所有层级的节点，带 level）；
+只有岗位的旧文件按岗位代码的前缀推导分类，分类没有名称，只能按代码查找。
+jobs_index.pickle 只是构建结果（排序后的代码、名称等）的本地缓存，不提交，jobs_menus.json 更新后自动重新构建
+"""
+import bisect
+import json
+import logging
+import os
+import pathlib
+import pickle
+import unicodedata
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_ROOT = pathlib.Path(__file__).parent
+JOBS_MENU_PATH = SCRIPT_ROOT / "jobs_menus.json"
+JOBS_INDEX_PATH = SCRIPT_ROOT / "jobs_index.pickle"
+# 索引文件格式的版本，格式变化时旧文件自动重新构建
+JOBS_INDEX_FORMAT = 1
+# 岗位的层级（最终检索的岗位）
+LEAF_LEVEL = 3
+# jobs_menus.json 中只有岗位（旧格式，没有 level）时，按岗位代码的前缀推导分类：大类为前2位，中类为前4位
+CATEGORY_PREFIX = {1: 2, 2: 4}
+
+# 匹配等级，越小越靠前
+MATCH_EXACT = 0  # 代码或名称完全相同
+MATCH_PREFIX = 1  # 代码或名称以查询开头
+MATCH_SUBSTRING = 2  # 名称包含查询
+
+
+def normalize_key(text) -> str:
+    """检索用的key：NFKC标准化（全角转半角）、去掉空白、忽略大小写"""
+    return "".join(unicodedata.normalize("NFKC", str(text or "")).split()).casefold()
+
+
+class JobsIndex:
+    """
+    岗位分类索引
+
+    节点按分类树的先序排列（分类后面紧跟它下面的所有节点），每个节点保存代码、名称、层级、父节点，
+    以及子树的结束位置：某个分类下的所有岗位为 [i + 1, ends[i]) 中层级为3的节点
+    """
+
+    def __init__(self, codes: List[str], names: List[str], levels: array, parents: array,
+                 derived: Optional[tuple] = None):
+        self.codes = codes
+        self.names = names
+        self.levels = levels
+        self.parents = parents
+        # 由前面几列计算出来的数据，加载索引文件时直接使用保存的结果
+        self._keys, self.ends, code_order, key_order = derived or self._derive()
+        self._by_code: Dict[str, int] = {code: i for i, code in enumerate(codes)}
+        self._by_name: Dict[str, int] = {}
+        for i, key in enumerate(self._keys):
+            # 同名时岗位优先于分类
+            if key not in self._by_name or levels[i] == LEAF_LEVEL:
+                self._by_name[key] = i
+        # 按代码、名称排序的岗位，用于前缀检索
+        self._code_order = code_order
+        self._key_order = key_order
+        self._sorted_codes = [codes[i] for i in code_order]
+        self._sorted_keys = [self._keys[i] for i in key_order]
+
+    def _derive(self) -> Tuple[List[str], array, array, array]:
+        keys = [normalize_key(name) for name in self.names]
+        # 子树的结束位置：子节点都在父节点后面，倒序遍历时子节点先更新父节点
+        ends = array("i", range(1, len(self.codes) + 1))
+        for i in range(len(self.codes) - 1, -1, -1):
+            parent = self.parents[i]
+            if parent >= 0 and ends[i] > ends[parent]:
+                ends[parent] = ends[i]
+        leaves = [i for i in range(len(self.codes)) if self.levels[i] == LEAF_LEVEL]
+        code_order = array("i", sorted(leaves, key=self.codes.__getitem__))
+        key_order = array("i", sorted(leaves, key=keys.__getitem__))
+        return keys, ends, code_order, key_order
+
+    def __len__(self):
+        """岗位（ct=3）的数量"""
+        return len(self._code_order)
+
+    @classmethod
+    def from_tree(cls, entries: List[dict]) -> "JobsIndex":
+        """
+        从分类树构建
+
+        Args:
+            entries: 按网站返回的顺序排列的所有节点，如 [{"jobCode": "100000", "jobName": "經營／人資類", "level": 1}, ...]
+        """
+        codes, names, levels, parents = [], [], array("B"), array("i")
+        # 当前路径上每一层的节点
+        stack: List[int] = []
+        for entry in entries:
+            level = int(entry.get("level") or LEAF_LEVEL)
+            while stack and levels[stack[-1]] >= level:
+                stack.pop()
+            parents.append(stack[-1] if stack else -1)
+            stack.append(len(codes))
+            codes.append(str(entry["jobCode"]))
+            names.append(entry.get("jobName") or "")
+            levels.append(level)
+        return cls(codes, names, levels, parents)
+
+    @classmethod
+    def from_jobs(cls, jobs: List[dict]) -> "JobsIndex":
+        """从只有岗位的 jobs_menus.json（旧格式）构建，分类按岗位代码的前缀推导（分类名称为代码前缀）"""
+        entries = []
+        current = {}
+        for job in sorted(jobs, key=lambda row: str(row["jobCode"])):
+            code = str(job["jobCode"])
+            for level, size in CATEGORY_PREFIX.items():
+                prefix = code[:size]
+                if len(code) > size and current.get(level) != prefix:
+                    current[level] = prefix
+                    # 上一级分类变化时，下一级也重新开始
+                    for sub_level in CATEGORY_PREFIX:
+                        if sub_level > level:
+                            current.pop(sub_level, None)
+                    entries.append({"jobCode": prefix, "jobName": prefix, "level": level})
+            entries.append({"jobCode": code, "jobName": job.get("jobName"), "level": LEAF_LEVEL})
+        return cls.from_tree(entries)
+
+    def _job(self, i: int) -> dict:
+        return {"jobCode": self.codes[i], "jobName": self.names[i], "level": self.levels[i]}
+
+    def _find(self, query) -> Optional[int]:
+        i = self._by_code.get(str(query).strip())
+        return self._by_name.get(normalize_key(query)) if i is None else i
+
+    def get(self, query) -> dict:
+        """
+        按代码或名称查找岗位或分类
+
+        Returns: 如 {"jobCode": "100101", "jobName": "經營管理主管", "level": 3}，找不到时返回空
+        """
+        i = self._find(query)
+        return self._job(i) if i is not None else {}
+
+    def path(self, query) -> List[dict]:
+        """从大类到该节点的路径，找不到时返回空"""
+        i = self._find(query)
+        path = []
+        while i is not None and i >= 0:
+            path.append(self._job(i))
+            i = self.parents[i]
+        return path[::-1]
+
+    def leaves(self, category=None) -> List[dict]:
+        """
+        某个分类下的所有岗位
+
+        Args:
+            category: 分类的代码或名称，为空时返回所有岗位
+
+        Returns: 按分类树顺序排列的岗位，找不到分类时返回空
+        """
+        if category is None:
+            start, end = 0, len(self.codes)
+        else:
+            i = self._find(category)
+            if i is None:
+                return []
+            start, end = i, self.ends[i]
+        return [self._job(j) for j in range(start, end) if self.levels[j] == LEAF_LEVEL]
+
+    def categories(self, level: Optional[int] = None) -> List[dict]:
+        """所有分类，可以指定层级"""
+        return [self._job(i) for i in range(len(self.codes))
+                if self.levels[i] != LEAF_LEVEL and (level is None or self.levels[i] == level)]
+
+    @staticmethod
+    def _prefix(sorted_keys: List[str], order: array, prefix: str) -> List[int]:
+        ids = []
+        i = bisect.bisect_left(sorted_keys, prefix)
+        while i < len(sorted_keys) and sorted_keys[i].startswith(prefix):
+            ids.append(order[i])
+            i += 1
+        return ids
+
+    def search(self, query, limit: Optional[int] = None) -> List[dict]:
+        """
+        检索岗位（ct=3）
+
+        Args:
+            query: 岗位代码或其前缀（如 "1001"），岗位名称或其中的部分文字（如 "人力資源"）
+            limit: 最多返回的数量，为空时返回全部
+
+        Returns: 按匹配程度、代码排序的岗位，如 [{"jobCode": "100201", "jobName": "...", "level": 3, "match": 1}]
+        """
+        key = normalize_key(query)
+        if not key:
+            return []
+        matches: Dict[int, int] = {}
+        for i in self._prefix(self._sorted_codes, self._code_order, key):
+            matches[i] = MATCH_EXACT if self.codes[i] == key else MATCH_PREFIX
+        for i in self._prefix(self._sorted_keys, self._key_order, key):
+            match = MATCH_EXACT if self._keys[i] == key else MATCH_PREFIX
+            matches[i] = min(match, matches.get(i, match))
+        for i, name_key in enumerate(self._keys):
+            if i not in matches and self.levels[i] == LEAF_LEVEL and key in name_key:
+                matches[i] = MATCH_SUBSTRING
+        ranked = sorted(matches.items(), key=lambda item: (item[1], self.codes[item[0]]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [{**self._job(i), "match": match} for i, match in ranked]
+
+    def save(self, path: pathlib.Path = JOBS_INDEX_PATH, source: pathlib.Path = JOBS_MENU_PATH):
+        """
+        保存为索引文件（先写临时文件再替换）
+
+        Args:
+            path: 索引文件
+            source: 构建索引的 jobs_menus.json，记录它的修改时间和大小，文件变化时索引自动失效
+        """
+        path = pathlib.Path(path)
+        stat = os.stat(source)
+        data = (JOBS_INDEX_FORMAT, (stat.st_mtime_ns, stat.st_size), self.codes, self.names, self._keys,
+                self.levels.tobytes(), self.parents.tobytes(), self.ends.tobytes(),
+                self._code_order.tobytes(), self._key_order.tobytes())
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_menus(cls, entries: List[dict]) -> "JobsIndex":
+        """从 jobs_menus.json 的内容构建：有 level 时为完整的分类树，否则为只有岗位的旧格式"""
+        if any("level" in entry for entry in entries):
+            return cls.from_tree(entries)
+        return cls.from_jobs(entries)
+
+    @classmethod
+    def load(cls, path: pathlib.Path = JOBS_INDEX_PATH, source: pathlib.Path = JOBS_MENU_PATH) -> Optional["JobsIndex"]:
+        """加载索引文件，文件不存在、格式不同或 jobs_menus.json 有变化时返回None"""
+        try:
+            with open(path, "rb") as f:
+                fmt, source_stat, codes, names, keys, levels, parents, ends, code_order, key_order = pickle.load(f)
+            stat = os.stat(source)
+        except Exception:
+            return None
+        if fmt != JOBS_INDEX_FORMAT or tuple(source_stat) != (stat.st_mtime_ns, stat.st_size):
+            return None
+        return cls(codes, names, array("B", levels), array("i", parents),
+                   (keys, array("i", ends), array("i", code_order), array("i", key_order)))
+
+
+def build_jobs_index(source: pathlib.Path = JOBS_MENU_PATH, path: pathlib.Path = JOBS_INDEX_PATH) -> JobsIndex:
+    """从 jobs_menus.json 构建索引并保存（保存失败时只在内存中使用）"""
+    with open(source, "r", encoding="utf-8") as f:
+        index = JobsIndex.from_menus(json.load(f))
+    try:
+        index.save(path, source)
+    except OSError as e:
+        logging.warning(f"保存岗位索引失败: {path}, {e}")
+    return index
+
+
+_DEFAULT_INDEX: Optional[JobsIndex] = None
+_DEFAULT_INDEX_MTIME: Optional[int] = None
+
+
+def get_jobs_index(source: pathlib.Path = JOBS_MENU_PATH, path: pathlib.Path = JOBS_INDEX_PATH) -> JobsIndex:
+    """进程内共享的岗位索引：优先加载索引文件，jobs_menus.json 有更新时重新构建"""
+    global _DEFAULT_INDEX, _DEFAULT_INDEX_MTIME
+    try:
+        mtime = os.stat(source).st_mtime_ns
+    except OSError:
+        mtime = None
+    if _DEFAULT_INDEX is None or mtime != _DEFAULT_INDEX_MTIME:
+        if mtime is None:
+            _DEFAULT_INDEX = JobsIndex([], [], array("B"), array("i"))
+        else:
+            _DEFAULT_INDEX = JobsIndex.load(path, source) or build_jobs_index(source, path)
+        _DEFAULT_INDEX_MTIME = mtime
+    return _DEFAULT_INDEX
@@ -6,12 +6,15 @@ import json
 import logging
 import pathlib
 import random
-from typing import Dict
+from typing import Dict, Optional
 
 import aiohttp
 from aiohttp import ClientTimeout
 from bs4 import BeautifulSoup
 
+from .jobs_index import get_jobs_index
+from .parse_executor import get_parse_executor
+
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 COMMON_HEADERS = {
     "User-Agent": USER_AGENT,
@@ -30,6 +33,11 @@ class JobSalaryUtils:
 
     async def get_jobs_menu(self) -> list:
         """获取工作岗位列表"""
+        tree = await self.get_jobs_tree()
+        return [{"jobCode": row["jobCode"], "jobName": row["jobName"]} for row in tree if row["level"] == 3]
+
+    async def get_jobs_tree(self) -> list:
+        """获取岗位分类树（所有层级），见 parse_jobs_tree"""
         v = random.random()
         url = f"{self.base_url_job_menu}{v}"
         headers = COMMON_HEADERS
@@ -39,7 +47,7 @@ class JobSalaryUtils:
                 async with session.get(url, headers=headers) as response:
                     if response.status == 200:
                         html = await response.text()
-                        results = await self.extract_jobs_data(html)
+                        results = self.parse_jobs_tree(html)
                         return results
                     else:
                         logging.error(f"请求失败，状态码: {response.status}")
@@ -55,22 +63,35 @@ class JobSalaryUtils:
         Args:
             html:
 
-        Returns:
+        Returns: 最终检索的岗位（ct=3），如 [{"jobCode": 100101, "jobName": "經營管理主管"}]
+
+        """
+        return [{"jobCode": row["jobCode"], "jobName": row["jobName"]}
+                for row in JobSalaryUtils.parse_jobs_tree(html) if row["level"] == 3]
+
+    @staticmethod
+    def parse_jobs_tree(html: str) -> list:
+        """
+        解析出岗位分类树
+
+        Args:
+            html: tCodeDutyNM.js 的内容
+
+        Returns: 按原来顺序排列的所有层级的节点，如 [{"jobCode": ..., "jobName": ..., "level": 1}, ...]，
+                 level为ct：1大类、2中类、3岗位
 
         """
         strip_s = "tcodeParams['tCodeDutyNM'] = "
         e1 = html.find(strip_s)
-        if e1:
-            html = html[e1 + len(strip_s)]
+        if e1 >= 0:
+            html = html[e1 + len(strip_s):]
         s = html.replace(";", "")
         try:
             dic = json.loads(s)
             if not dic.get("arr"):
                 return []
             menus = dic.get("arr")
-            # 只返回ct=3的岗位（最终检索的岗位）
-            lis = [{"jobCode": v["k"], "jobName": v["v"]} for v in menus if v.get("ct") == 3]
-            return lis
+            return [{"jobCode": v["k"], "jobName": v["v"], "level": v.get("ct")} for v in menus if v.get("ct")]
         except Exception as e:
             logging.exception(f"解析数据失败: {e}")
             return []
@@ -126,7 +147,7 @@ class JobSalaryUtils:
                 async with session.get(url, headers=headers) as response:
                     if response.status == 200:
                         html = await response.text()
-                        results = self.extract_salary_data(html)
+                        results = await get_parse_executor().run(self.extract_salary_data, html)
                         return results
                     else:
                         logging.error(f"请求失败，状态码: {response.status}")
@@ -135,9 +156,10 @@ class JobSalaryUtils:
             logging.exception(f"发生错误: {e}")
             return []
 
-    def extract_salary_data(self, html_content: str):
+    @staticmethod
+    def extract_salary_data(html_content: str):
         """
-        按照指定路径提取薪资数据
+        按照指定路径提取薪资数据（静态方法，可以在解析执行器的进程池中执行）
         """
         soup = BeautifulSoup(html_content, "html.parser")
 
@@ -155,7 +177,7 @@ class JobSalaryUtils:
 
         for topic_box in topic_boxes:
             # 获取对应的教育水平（从前面的a标签中获取）
-            education_level = self.get_education_level(topic_box)
+            education_level = JobSalaryUtils.get_education_level(topic_box)
 
             # 3.1 找到 <div class="avgSalaryListPart01">，提取ol>li的文本内容
             years_part = topic_box.find("div", class_="avgSalaryListPart01")
@@ -220,23 +242,42 @@ def jobs(is_update: bool = False) -> list:
         if is_update:
             # 加载新记录
             job_utils = JobSalaryUtils()
-            lis = asyncio.run(job_utils.get_jobs_menu())
+            tree = asyncio.run(job_utils.get_jobs_tree())
+            lis = [{"jobCode": row["jobCode"], "jobName": row["jobName"]} for row in tree if row["level"] == 3]
             if lis:
-                # 更新最新的工作岗位信息
+                # 更新最新的工作岗位信息：保存所有层级的节点，岗位索引按分类树构建（jobs_menus.json 变化后自动重新构建）
                 with open(job_menu_path, "w", encoding="utf-8") as f:
-                    f.write(json.dumps(lis))
+                    f.write(json.dumps(tree))
                 return lis
         # 加载旧记录
-        # 从之前的记录中加载
+        # 从之前的记录中加载，只返回岗位（ct=3），只有岗位的旧文件没有 level
         with open(job_menu_path, "r", encoding="utf-8") as f:
             s = f.read()
             lis = json.loads(s)
-        return lis
+        return [{"jobCode": row["jobCode"], "jobName": row["jobName"]} for row in lis if row.get("level", 3) == 3]
     except Exception as e:
         logging.exception(f"加载工作岗位异常: {e}")
         return []
 
 
+def search_jobs(query: str, limit: Optional[int] = None) -> list:
+    """
+    按岗位代码前缀或部分名称检索岗位
+
+    Returns: 按匹配程度排序的岗位，如 [{"jobCode": "100201", "jobName": "...", "level": 3, "match": 1}]
+    """
+    return get_jobs_index().search(query, limit)
+
+
+def category_jobs(category: str) -> list:
+    """
+    某个分类（代码或名称）下的所有岗位；jobs_menus.json 为只有岗位的旧格式时分类没有名称，只能按代码前缀（如 "1001"）查找
+
+    Returns: 如 [{"jobCode": "100101", "jobName": "經營管理主管", "level": 3}]，找不到分类时返回空
+    """
+    return get_jobs_index().leaves(category)
+
+
 def crawl(query: str) -> Dict[str, str]:
     """
     Performs a crawl operation based on the given query string.
@@ -252,18 +293,12 @@ def crawl(query: str) -> Dict[str, str]:
     if not query or not query.strip():
         return {"query": query, "result": "", "url": ""}
 
-    # 获取岗位列表
-    jobs_menu = jobs()
-    if not jobs_menu:
+    # 匹配出岗位代码和岗位名称：只爬取代码或名称完全相同的岗位，部分匹配的候选岗位用 search_jobs 检索
+    job = get_jobs_index().get(query)
+    if job.get("level") != 3:
         return {"query": query, "result": "", "url": ""}
-    # 匹配出岗位代码和岗位名称
-    job_code = ""
-    job_name = ""
-    for row in jobs_menu:
-        if row.get("jobCode") == query or row.get("jobName") == query:
-            job_code = row.get("jobCode")
-            job_name = row.get("jobName")
-            break
+    job_code = job["jobCode"]
+    job_name = job["jobName"]
 
     # 初始化工具
     job_utils = JobSalaryUtils()